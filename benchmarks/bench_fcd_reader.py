@@ -0,0 +1,78 @@
+"""
+Benchmark for reading SUMO FCD output with fcd_reader.
+Generates synthetic FCD files of increasing length and measures throughput and the
+peak Python memory (tracemalloc) of fcd_reader.convert_fcd, which should stay the same
+for every file size, compared with parsing the whole file with ElementTree.parse.
+
+Usage: python benchmarks/bench_fcd_reader.py [--vehicles 200] [--timesteps 250 1000 4000] [--format parquet]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fcd_reader
+
+vehicle_types = ["vehicle.audi.a2", "vehicle.tesla.model3", "vehicle.nissan.patrol"]
+
+
+def write_synthetic_fcd(filename, timesteps, vehicles):
+    rng = random.Random(42)
+    with open(filename, "w") as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n<fcd-export>\n')
+        for step in range(timesteps):
+            file.write(f'    <timestep time="{step * 0.05:.2f}">\n')
+            for vehicle in range(vehicles):
+                file.write(
+                    f'        <vehicle id="{vehicle}" x="{rng.uniform(0, 400):.2f}" y="{rng.uniform(0, 400):.2f}" '
+                    f'angle="{rng.uniform(0, 360):.2f}" type="{vehicle_types[vehicle % 3]}" '
+                    f'speed="{rng.uniform(0, 14):.2f}" pos="{rng.uniform(0, 100):.2f}" lane="{vehicle % 40}_0" slope="0.00"/>\n'
+                )
+            file.write('    </timestep>\n')
+        file.write('</fcd-export>\n')
+
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vehicles", type=int, default=200)
+    parser.add_argument("--timesteps", nargs="+", type=int, default=[250, 1000, 4000])
+    parser.add_argument("--format", default="parquet", choices=["parquet", "arrow", "csv"])
+    parser.add_argument("--skip-dom", action="store_true", help="do not measure ElementTree.parse")
+    args = parser.parse_args()
+
+    hud_data = {"vehicle.audi.a2": {'HUDname': "HUD 1", 'max_speed': 120, 'min_Gap': 1.2, 'brightness': 0.4,
+                                    'frequency': "average", 'relevance': "neutral", 'field of view': 60.0}}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for timesteps in args.timesteps:
+            fcd_filename = os.path.join(tmp_dir, f"fcd_{timesteps}.xml")
+            write_synthetic_fcd(fcd_filename, timesteps, args.vehicles)
+            size_mb = os.path.getsize(fcd_filename) / 2**20
+            output = os.path.join(tmp_dir, f"fcd_{timesteps}.{args.format}")
+
+            rows, elapsed, peak = measure(lambda: fcd_reader.convert_fcd(fcd_filename, output, hud_data))
+            print(f"{size_mb:8.1f} MB  fcd_reader: {rows / elapsed:10.0f} rows/s  peak {peak / 2**20:7.1f} MiB")
+
+            if not args.skip_dom:
+                _, elapsed, peak = measure(lambda: ET.parse(fcd_filename))
+                print(f"{'':11}  ET.parse:   {rows / elapsed:10.0f} rows/s  peak {peak / 2**20:7.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
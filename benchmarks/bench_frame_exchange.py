@@ -0,0 +1,114 @@
+"""
+Benchmark for the camera frame handoff of the spectator client with synthetic
+1920x1080 BGRA frames.
+
+1. Handoff cost per frame: the original handoff (np.frombuffer + reshape + copy in
+   the sensor callback, another copy before drawing) against FrameExchange.publish +
+   acquire, with the bytes allocated per frame.
+2. A sensor thread publishing at --fps while the display loop needs --draw-ms per
+   frame, reporting received, displayed and dropped frames.
+
+Usage: python benchmarks/bench_frame_exchange.py [--frames 200] [--fps 30] [--draw-ms 50] [--seconds 3]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_exchange import FrameExchange
+
+WIDTH, HEIGHT = 1920, 1080
+
+
+class OriginalHandoff:
+    """process_image and display_camera_output as originally implemented, without drawing."""
+    def __init__(self):
+        self.image_data = None
+
+    def process_image(self, raw_data, height, width):
+        array = np.frombuffer(raw_data, dtype=np.uint8)
+        array = np.reshape(array, (height, width, 4))
+        self.image_data = array.copy()
+
+    def display(self):
+        if self.image_data is not None:
+            return self.image_data.copy()
+        return None
+
+
+def handoff_cost(publish, acquire, raw_frames):
+    """Seconds and allocated bytes per frame for publishing and acquiring every frame."""
+    start = time.perf_counter()
+    for raw_data in raw_frames:
+        publish(raw_data, HEIGHT, WIDTH)
+        acquire()
+    seconds = (time.perf_counter() - start) / len(raw_frames)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for raw_data in raw_frames[:20]:
+        publish(raw_data, HEIGHT, WIDTH)
+        acquire()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak - before
+
+
+def threaded_run(fps, draw_seconds, seconds, raw_frames):
+    frames = FrameExchange()
+    stop = threading.Event()
+
+    def sensor():
+        index = 0
+        while not stop.is_set():
+            frames.publish(raw_frames[index % len(raw_frames)], HEIGHT, WIDTH)
+            index += 1
+            time.sleep(1 / fps)
+
+    thread = threading.Thread(target=sensor)
+    thread.start()
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        if frames.acquire() is not None:
+            time.sleep(draw_seconds)
+        else:
+            time.sleep(0.001)
+    stop.set()
+    thread.join()
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--fps", type=float, default=30, help="camera frames per second of the sensor thread")
+    parser.add_argument("--draw-ms", type=float, default=50, help="time the display loop needs per frame")
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    raw_frames = [rng.integers(0, 256, HEIGHT * WIDTH * 4, dtype=np.uint8).tobytes() for _ in range(4)]
+    raw_frames = [raw_frames[i % len(raw_frames)] for i in range(args.frames)]
+
+    original = OriginalHandoff()
+    original_seconds, original_bytes = handoff_cost(original.process_image, original.display, raw_frames)
+    frames = FrameExchange()
+    exchange_seconds, exchange_bytes = handoff_cost(frames.publish, frames.acquire, raw_frames)
+
+    print(f"original handoff: {original_seconds * 1000:6.2f} ms/frame, {original_bytes / 2**20:6.1f} MiB allocated")
+    print(f"frame exchange:   {exchange_seconds * 1000:6.2f} ms/frame, {exchange_bytes / 2**20:6.1f} MiB allocated  "
+          f"({original_seconds / exchange_seconds:.1f}x)")
+
+    frames = threaded_run(args.fps, args.draw_ms / 1000, args.seconds, raw_frames)
+    print(f"\n{args.fps:g} fps camera, {args.draw_ms:g} ms per displayed frame for {args.seconds:g} s: "
+          f"{frames.received} received, {frames.displayed} displayed, {frames.dropped} dropped")
+
+
+if __name__ == '__main__':
+    main()
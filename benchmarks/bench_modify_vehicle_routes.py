@@ -0,0 +1,167 @@
+"""
+Benchmark for simulation.modify_vehicle_routes on a synthetic route file
+(default 200000 vehicles with an inline route each, 4 HUDs).
+
+1. Drawing the vehicle types alone: one random.choices call per vehicle (original),
+   random.choices in batches of simulation.ROUTE_DRAW_BATCH, and the vectorized numpy
+   draw used by modify_vehicle_routes.
+2. The whole rewrite: the original implementation (whole file parsed into a tree,
+   written back in place) against the streaming rewrite to a new file. Reports the run
+   time, the peak traced memory, how far the drawn type frequencies are from the HUD
+   probabilities and whether the routes are otherwise unchanged.
+
+Usage: python benchmarks/bench_modify_vehicle_routes.py [--vehicles 200000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import simulation
+
+HUDS = [
+    {'entry': "3", 'vehicle_type': "vehicle.audi.tt"},
+    {'entry': "1", 'vehicle_type': "vehicle.mini.cooper_s"},
+    {'entry': "2", 'vehicle_type': "vehicle.seat.leon"},
+    {'entry': "5", 'vehicle_type': "vehicle.nissan.patrol"},
+]
+
+
+def write_synthetic_routes(filename, num_vehicles):
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n<routes>\n')
+        for i in range(num_vehicles):
+            file.write(f'    <vehicle id="{i}" depart="{i * 0.1:.2f}">\n'
+                       f'        <route edges="e{i % 97} e{i % 89} e{i % 83} e{i % 79}"/>\n'
+                       f'    </vehicle>\n')
+        file.write('</routes>\n')
+
+
+def modify_vehicle_routes_original(routes_file):
+    """modify_vehicle_routes as originally implemented, returns the vehicle type mapping."""
+    vehicle_type_mapping = {}
+    tree = ET.parse(routes_file)
+    root = tree.getroot()
+
+    vehicle_types = [hud['vehicle_type'] for hud in simulation.string_hud_frames]
+    probabilities = [int(hud['entry']) for hud in simulation.string_hud_frames]
+
+    for vehicle in root.findall('vehicle'):
+        if vehicle_types:
+            vehicle_id = vehicle.get('id')
+            chosen_type = random.choices(vehicle_types, probabilities)[0]
+            if chosen_type == "vehicle.unknown":
+                chosen_type = "vehicle.audi.a2"
+            vehicle.set('type', chosen_type)
+            vehicle_type_mapping[vehicle_id] = chosen_type
+
+    tree.write(routes_file)
+    return vehicle_type_mapping
+
+
+def draw_per_vehicle(vehicle_types, probabilities, n):
+    rng = random.Random(42)
+    return [rng.choices(vehicle_types, probabilities)[0] for _ in range(n)]
+
+
+def draw_batched_choices(vehicle_types, probabilities, n):
+    rng = random.Random(42)
+    drawn = []
+    for start in range(0, n, simulation.ROUTE_DRAW_BATCH):
+        drawn.extend(rng.choices(vehicle_types, probabilities, k=min(simulation.ROUTE_DRAW_BATCH, n - start)))
+    return drawn
+
+
+def draw_numpy(vehicle_types, probabilities, n):
+    generator = np.random.default_rng(42)
+    type_names = np.array(vehicle_types, dtype=object)
+    weights = np.array(probabilities, dtype=np.float64)
+    weights /= weights.sum()
+    drawn = []
+    for start in range(0, n, simulation.ROUTE_DRAW_BATCH):
+        codes = generator.choice(len(type_names), size=min(simulation.ROUTE_DRAW_BATCH, n - start), p=weights)
+        drawn.extend(type_names[codes].tolist())
+    return drawn
+
+
+def largest_frequency_error(mapping):
+    """Largest difference between the share of a type among the vehicles and its HUD probability."""
+    counts = Counter(mapping.values())
+    total_weight = sum(int(hud['entry']) for hud in HUDS)
+    return max(abs(counts[hud['vehicle_type']] / len(mapping) - int(hud['entry']) / total_weight) for hud in HUDS)
+
+
+def measure(function, *args):
+    """
+    Run function twice with a fixed seed, timed and with traced memory allocations;
+    returns (seconds, peak traced bytes, result).
+    """
+    random.seed(42)
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+
+    random.seed(42)
+    tracemalloc.start()
+    result = function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def without_types(filename):
+    root = ET.parse(filename).getroot()
+    for vehicle in root.iter("vehicle"):
+        vehicle.attrib.pop("type", None)
+    return ET.tostring(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vehicles", type=int, default=200000)
+    args = parser.parse_args()
+
+    simulation.string_hud_frames[:] = HUDS
+    vehicle_types = [hud['vehicle_type'] for hud in HUDS]
+    probabilities = [int(hud['entry']) for hud in HUDS]
+    draw_times = {}
+    for name, draw in (("per vehicle", draw_per_vehicle), ("batched choices", draw_batched_choices),
+                       ("numpy", draw_numpy)):
+        start = time.perf_counter()
+        draw(vehicle_types, probabilities, args.vehicles)
+        draw_times[name] = time.perf_counter() - start
+        print(f"draw {name:<16} {draw_times[name] * 1000:8.1f} ms  "
+              f"({draw_times['per vehicle'] / draw_times[name]:.1f}x)")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        original_file = os.path.join(tmp_dir, "original.rou.xml")
+        streamed_file = os.path.join(tmp_dir, "streamed.rou.xml")
+        write_synthetic_routes(original_file, args.vehicles)
+        original_routes = without_types(original_file)
+        print(f"route file: {os.path.getsize(original_file) / 2**20:.1f} MiB, {args.vehicles} vehicles")
+
+        def streaming():
+            return simulation.modify_vehicle_routes("synthetic", original_file, streamed_file, rng=random.Random(42))
+
+        streamed, streamed_peak, _ = measure(streaming)
+        streamed_mapping = dict(simulation.vehicle_type_mapping)
+        original, original_peak, original_mapping = measure(modify_vehicle_routes_original, original_file)
+
+        print(f"original:  {original:7.2f} s  peak {original_peak / 2**20:7.1f} MiB")
+        print(f"streaming: {streamed:7.2f} s  peak {streamed_peak / 2**20:7.1f} MiB  ({original / streamed:.1f}x)")
+        print(f"largest type frequency error: original {largest_frequency_error(original_mapping):.4f}, "
+              f"streaming {largest_frequency_error(streamed_mapping):.4f}")
+        print(f"same routes otherwise: {without_types(streamed_file) == original_routes}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark for the memory used by buffered simulation samples.
+Compares one Python list [vehicle_id, simTime, x, y, speed, gap, accel, distance, time_loss]
+per sample with data_output.SampleBuffer (interned vehicle codes and a float64 array per column),
+measured with tracemalloc for the same synthetic samples.
+
+Usage: python benchmarks/bench_sample_buffer.py [--samples 1000000] [--vehicles 600]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_output
+
+
+def generate_samples(num_samples, num_vehicles):
+    """Yield samples like run_simulation records them, with a fresh ID string per sample as TraCI returns it."""
+    rng = random.Random(42)
+    for i in range(num_samples):
+        yield (str(rng.randrange(num_vehicles)), float(i), rng.uniform(0, 400), rng.uniform(0, 400),
+               rng.uniform(0, 50), rng.uniform(2, 20), rng.uniform(-3, 3), rng.uniform(0, 5000), rng.uniform(0, 100))
+
+
+def fill_lists(samples):
+    buffer = []
+    for sample in samples:
+        buffer.append(list(sample))
+    return buffer
+
+
+def fill_sample_buffer(samples):
+    buffer = data_output.SampleBuffer()
+    for vehicle_id, *values in samples:
+        buffer.append(vehicle_id, values)
+    return buffer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--vehicles", type=int, default=600)
+    args = parser.parse_args()
+
+    results = {}
+    for name, fill in (("list per sample", fill_lists), ("SampleBuffer", fill_sample_buffer)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        buffer = fill(generate_samples(args.samples, args.vehicles))
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del buffer
+        results[name] = current
+        print(f"{name:<16} {current / 2**20:9.1f} MiB  {current / args.samples:7.1f} bytes/sample  "
+              f"(peak {peak / 2**20:.1f} MiB, {elapsed:.2f} s)")
+
+    print(f"reduction: {results['list per sample'] / results['SampleBuffer']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark for exporting recorded simulation data to CSV on a synthetic dataset
+(default 5M rows, 11 HUD vehicle types, all 24 columns selected).
+
+Compares the original per-row export (24 Tk BooleanVar lookups, three dict lookups,
+a new dict and csv.DictWriter per row) with data_output.SimulationDataWriter
+(columns resolved once, per-HUD tuple templates, csv.writer.writerows), and checks
+that both produce the same file.
+
+Usage: python benchmarks/bench_save_simulation_data.py [--rows 5000000] [--vehicles 600]
+"""
+import argparse
+import csv
+import filecmp
+import os
+import random
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_output
+
+vehicle_types = [
+    "vehicle.audi.a2", "vehicle.audi.tt",
+    "vehicle.chevrolet.impala", "vehicle.mini.cooper_s",
+    "vehicle.mercedes.coupe", "vehicle.bmw.grandtourer",
+    "vehicle.citroen.c3", "vehicle.ford.mustang",
+    "vehicle.volkswagen.t2", "vehicle.lincoln.mkz_2017",
+    "vehicle.seat.leon"
+]
+
+
+def build_synthetic_data(num_rows, num_vehicles):
+    rng = random.Random(42)
+    hud_data = {}
+    hud_id_mapping = {}
+    for i, vtype in enumerate(vehicle_types, start=1):
+        hud_id_mapping[vtype] = str(i)
+        hud_data[vtype] = {
+            'HUDname': f"HUD {i}", 'distraction_level': rng.randint(1, 10), 'fatigueness_level': rng.randint(1, 10),
+            'awareness_level': rng.randint(1, 10), 'reactTime': rng.random(), 'max_speed': rng.randint(50, 150),
+            'min_Gap': rng.random() + 1, 'speed_factor': rng.random(), 'accel_factor': rng.random() * 5,
+            'brightness': 0.4, 'frequency': "average", 'relevance': "neutral", 'field of view': 60.0
+        }
+    vehicle_type_mapping = {str(v): rng.choice(vehicle_types) for v in range(num_vehicles)}
+
+    # A pool of distinct samples, repeated to the requested length to keep the list affordable
+    pool = [
+        [str(rng.randrange(num_vehicles)), float(i), rng.uniform(0, 400), rng.uniform(0, 400),
+         rng.uniform(0, 50), rng.uniform(2, 20), rng.uniform(-3, 3), rng.uniform(0, 5000), rng.uniform(0, 100)]
+        for i in range(20000)
+    ]
+    simulation_data = [pool[i % len(pool)] for i in range(num_rows)]
+    return simulation_data, hud_data, hud_id_mapping, vehicle_type_mapping
+
+
+def save_baseline(csv_filename, simulation_data, map_name, checkbox_vars, hud_data, hud_id_mapping, vehicle_type_mapping):
+    """The per-row export as originally implemented in main.save_simulation_data."""
+    fieldnames = [name for name, var in zip(data_output.COLUMNS, checkbox_vars) if var.get()]
+    with open(csv_filename, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+
+        for entry in simulation_data:
+            row_data = {}
+            vtype = vehicle_type_mapping.get(entry[0], "unknown")
+            hud_data_for_type = hud_data.get(vtype, {})
+
+            hud_name = hud_data_for_type.get('HUDname', 'N/A')
+            hud_id_val = hud_id_mapping.get(vtype, "unknown")
+            idName = f"{hud_id_val}_{hud_name}"
+
+            if checkbox_vars[0].get():  row_data['map'] = map_name
+            if checkbox_vars[1].get():  row_data['vehicle_id'] = entry[0]
+            if checkbox_vars[2].get():  row_data['hud_id'] = idName
+            if checkbox_vars[3].get():  row_data['simulation_time'] = entry[1]
+            if checkbox_vars[4].get():  row_data['vehicle_type'] = vtype
+            if checkbox_vars[5].get():  row_data['position_x'] = entry[2]
+            if checkbox_vars[6].get():  row_data['position_y'] = entry[3]
+            if checkbox_vars[7].get():  row_data['current_speed'] = entry[4]
+            if checkbox_vars[8].get():  row_data['current_gap'] = entry[5]
+            if checkbox_vars[9].get():  row_data['current_acceleration'] = entry[6]
+            if checkbox_vars[10].get(): row_data['distance_traveled'] = entry[7]
+            if checkbox_vars[11].get(): row_data['time_loss'] = entry[8]
+            if checkbox_vars[12].get(): row_data['maxSpeed'] = hud_data_for_type.get('max_speed', 'N/A')
+            if checkbox_vars[13].get(): row_data['speedAdherenceFactor'] = hud_data_for_type.get('speed_factor', 'N/A')
+            if checkbox_vars[14].get(): row_data['reactionTime'] = hud_data_for_type.get('reactTime', 'N/A')
+            if checkbox_vars[15].get(): row_data['fatiguenessLevel'] = hud_data_for_type.get('fatigueness_level', 'N/A')
+            if checkbox_vars[16].get(): row_data['awarenessLevel'] = hud_data_for_type.get('awareness_level', 'N/A')
+            if checkbox_vars[17].get(): row_data['acceleration'] = hud_data_for_type.get('accel_factor', 'N/A')
+            if checkbox_vars[18].get(): row_data['minGapFactor'] = hud_data_for_type.get('min_Gap', 'N/A')
+            if checkbox_vars[19].get(): row_data['distractionLevel'] = hud_data_for_type.get('distraction_level', 'N/A')
+            if checkbox_vars[20].get(): row_data['brightness'] = hud_data_for_type.get('brightness', 'N/A')
+            if checkbox_vars[21].get(): row_data['information_frequency'] = hud_data_for_type.get('frequency', 'N/A')
+            if checkbox_vars[22].get(): row_data['information_relevance'] = hud_data_for_type.get('relevance', 'N/A')
+            if checkbox_vars[23].get(): row_data['FoV'] = hud_data_for_type.get('field of view', 'N/A')
+
+            writer.writerow(row_data)
+
+
+def save_streaming(csv_filename, simulation_data, map_name, checkbox_vars, hud_data, hud_id_mapping, vehicle_type_mapping):
+    selected_columns = [var.get() for var in checkbox_vars]
+    writer = data_output.SimulationDataWriter(
+        csv_filename, map_name, selected_columns, hud_data, hud_id_mapping, vehicle_type_mapping
+    )
+    for entry in simulation_data:
+        writer.add(entry)
+    writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--vehicles", type=int, default=600)
+    args = parser.parse_args()
+
+    print(f"Building {args.rows} synthetic rows...")
+    simulation_data, hud_data, hud_id_mapping, vehicle_type_mapping = build_synthetic_data(args.rows, args.vehicles)
+
+    # Tcl interpreter without a window, so the BooleanVar lookups cost the same as in the GUI
+    tcl = tk.Tcl()
+    checkbox_vars = [tk.BooleanVar(master=tcl, value=True) for _ in data_output.COLUMNS]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = {}
+        for name, save in (("baseline", save_baseline), ("streaming", save_streaming)):
+            csv_filename = os.path.join(tmp_dir, f"{name}.csv")
+            start = time.perf_counter()
+            save(csv_filename, simulation_data, "Town01", checkbox_vars, hud_data, hud_id_mapping, vehicle_type_mapping)
+            elapsed = time.perf_counter() - start
+            results[name] = (csv_filename, elapsed)
+            print(f"{name:<10} {elapsed:8.2f} s  {args.rows / elapsed:12.0f} rows/s")
+
+        identical = filecmp.cmp(results["baseline"][0], results["streaming"][0], shallow=False)
+        print(f"speedup: {results['baseline'][1] / results['streaming'][1]:.2f}x, identical output: {identical}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark for drawing the HUD icons of the spectator client on synthetic
+1920x1080 BGRA camera frames, with all 12 icons shown (relevance "unimportant").
+
+Compares the original drawing (cv2.imread + cv2.resize of every icon in every
+frame, blended channel by channel in float64) with the cached icons of
+hud_overlay.IconCache blended one by one, and with the single pre-composited
+layer of hud_overlay.HudCompositor. Reports the frames per second and the
+largest pixel difference to the original.
+
+Usage: python benchmarks/bench_spectator_overlay.py [--frames 100] [--scale 90] [--alpha 0.6]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+
+from hud_overlay import HUD_ICONS, HudCompositor, IconCache
+
+ICON_PATH = os.path.join(repo_dir, "icons")
+WIDTH, HEIGHT = 1920, 1080
+
+# Medium FoV layout of the spectator for hud_area_start (0.58, 0.32)
+X, Y = 0.58, 0.32
+SPEED_HUD_LOCATION = (X, Y + 0.1)
+ICON_POSITIONS = [
+    (X, Y + 0.05), (X, Y + 0.15), (X - .1, Y + 0.1), (X - .1, Y + 0.05), (X - .1, Y + 0.15), (X, Y + 0.2),
+    (X - .1, Y + 0.2), (X, Y), (X - .1, Y), (X, Y + 0.25), (X - .1, Y + 0.25)
+]
+
+
+def icon_layout():
+    """(icon name, relative (y, x)) of every icon, like CarlaCameraClient.update_hud_layer."""
+    layout = []
+    poscount = 0
+    for icon_name in HUD_ICONS:
+        if icon_name == 'icon_stopwatch':
+            layout.append((icon_name, SPEED_HUD_LOCATION))
+        else:
+            layout.append((icon_name, ICON_POSITIONS[poscount]))
+            poscount += 1
+    return layout
+
+
+def overlay_icon_original(image, icon, position, hud_alpha):
+    """CarlaCameraClient.overlay_icon as originally implemented."""
+    y, x = position
+    h, w = icon.shape[:2]
+    if y + h > image.shape[0] or x + w > image.shape[1]:
+        return
+
+    if icon.shape[2] == 4:
+        alpha_s = (icon[:, :, 3] / 255.0) * hud_alpha
+        alpha_l = 1.0 - alpha_s
+        for c in range(3):
+            image[y:y+h, x:x+w, c] = alpha_s * icon[:, :, c] + alpha_l * image[y:y+h, x:x+w, c]
+    else:
+        for c in range(3):
+            image[y:y+h, x:x+w, c] = (
+                hud_alpha * icon[:, :, c] + (1.0 - hud_alpha) * image[y:y+h, x:x+w, c]
+            )
+
+
+def overlay_icon_cached(image, planes, position):
+    """Blend a prepared icon (see hud_overlay.IconCache.prepare) onto the BGR(A) image with its top left corner at position (y, x)."""
+    y, x = position
+    color, inverse_alpha = planes
+    h, w = inverse_alpha.shape[:2]
+
+    # Clipping if the icon is out of bounds
+    if y + h > image.shape[0] or x + w > image.shape[1]:
+        return
+
+    region = image[y:y+h, x:x+w, :3]
+    region[...] = color + inverse_alpha * region
+
+
+def draw_original(image, positions, scale, hud_alpha):
+    for icon_name, filename in HUD_ICONS.items():
+        icon = cv2.imread(os.path.join(ICON_PATH, filename), cv2.IMREAD_UNCHANGED)
+        icon = cv2.resize(icon, scale)
+        overlay_icon_original(image, icon, positions[icon_name], hud_alpha)
+
+
+def draw_cached(image, positions, icon_cache):
+    for icon_name in HUD_ICONS:
+        icon = icon_cache.get(icon_name)
+        if icon is not None:
+            overlay_icon_cached(image, icon, positions[icon_name])
+
+
+def draw_composited(image, hud_compositor):
+    hud_compositor.blend(image)
+
+
+def frames_per_second(draw, frames, *args):
+    start = time.perf_counter()
+    for frame in frames:
+        draw(frame.copy(), *args)
+    return len(frames) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--scale", type=int, default=90, help="icon size in pixels")
+    parser.add_argument("--alpha", type=float, default=0.6, help="HUD alpha (1 - brightness)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    templates = [rng.integers(0, 256, (HEIGHT, WIDTH, 4), dtype=np.uint8) for _ in range(4)]
+    frames = [templates[i % len(templates)] for i in range(args.frames)]
+    layout = icon_layout()
+    positions = {icon_name: (int(HEIGHT * y), int(WIDTH * x)) for icon_name, (y, x) in layout}
+    scale = (args.scale, args.scale)
+
+    start = time.perf_counter()
+    icon_cache = IconCache(ICON_PATH, HUD_ICONS)
+    icon_cache.prepare(scale, args.alpha)
+    startup = time.perf_counter() - start
+    start = time.perf_counter()
+    hud_compositor = HudCompositor(icon_cache)
+    hud_compositor.set_layout(layout)
+    hud_compositor.build((HEIGHT, WIDTH))
+    layer = time.perf_counter() - start
+
+    original = frames_per_second(draw_original, frames, positions, scale, args.alpha)
+    cached = frames_per_second(draw_cached, frames, positions, icon_cache)
+    composited = frames_per_second(draw_composited, frames, hud_compositor)
+
+    original_image = templates[0].copy()
+    draw_original(original_image, positions, scale, args.alpha)
+
+    def difference(image):
+        return np.abs(original_image.astype(np.int16) - image.astype(np.int16)).max()
+
+    cached_image = templates[0].copy()
+    draw_cached(cached_image, positions, icon_cache)
+    composited_image = templates[0].copy()
+    draw_composited(composited_image, hud_compositor)
+
+    print(f"icon cache startup: {startup * 1000:.1f} ms, HUD layer: {layer * 1000:.1f} ms")
+    print(f"original:   {original:8.1f} fps")
+    print(f"cached:     {cached:8.1f} fps  ({cached / original:.1f}x)  largest pixel difference {difference(cached_image)}")
+    print(f"composited: {composited:8.1f} fps  ({composited / original:.1f}x)  "
+          f"largest pixel difference {difference(composited_image)}")
+
+
+if __name__ == '__main__':
+    main()
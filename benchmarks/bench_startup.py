@@ -0,0 +1,110 @@
+"""
+Benchmark that tracks the cold start of the launcher (main.py).
+1. Runs the imports of main.py in a fresh interpreter with `python -X importtime`
+   and reports the total import time, the slowest modules and which heavy
+   modules (traci, numpy, pyarrow, minidom) were loaded.
+2. Runs main.py with a patched mainloop that measures the time until the
+   window is first drawn and closes it again (needs a display).
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--top 15]
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+main_path = os.path.join(repo_dir, "main.py")
+
+# Modules that should only be imported once their feature is used
+HEAVY_MODULES = ["traci", "libsumo", "numpy", "pyarrow", "xml.dom.minidom", "carla", "cv2"]
+
+# Runs main.py, but reports the time until the window is drawn instead of entering the mainloop
+WINDOW_SCRIPT = """
+import time
+start = time.perf_counter()
+import runpy, tkinter
+def mainloop(self, n=0):
+    self.update()
+    print(f"{{time.perf_counter() - start:.6f}}")
+    self.destroy()
+tkinter.Tk.mainloop = mainloop
+runpy.run_path({main_path!r}, run_name="__main__")
+"""
+
+
+def launcher_imports():
+    """The top-level import statements of main.py as source code."""
+    with open(main_path) as file:
+        tree = ast.parse(file.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def measure_imports(source):
+    """Import source in a new interpreter and return {module: (self_us, cumulative_us, depth)}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", source],
+        cwd=repo_dir, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def measure_window():
+    """Seconds until the launcher window is drawn, or None without a display."""
+    result = subprocess.run(
+        [sys.executable, "-c", WINDOW_SCRIPT.format(main_path=main_path)],
+        cwd=repo_dir, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold start of the launcher.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="number of slowest modules to list")
+    args = parser.parse_args()
+
+    # Modules that the interpreter imports by itself are not counted
+    interpreter_modules = measure_imports("pass")
+    source = launcher_imports()
+    runs = [measure_imports(source) for _ in range(args.runs)]
+    totals = [
+        sum(c for name, (_, c, depth) in modules.items() if depth == 0 and name not in interpreter_modules)
+        for modules in runs
+    ]
+    print(f"Launcher imports: median {statistics.median(totals) / 1000:.1f} ms, "
+          f"min {min(totals) / 1000:.1f} ms over {args.runs} runs")
+
+    modules = runs[-1]
+    print("\nSlowest modules (cumulative, last run):")
+    slowest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us, _) in slowest:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:8.1f} ms self  {name}")
+
+    loaded = [name for name in HEAVY_MODULES if name in modules]
+    print(f"\nHeavy modules loaded at startup: {', '.join(loaded) if loaded else 'none'}")
+
+    window_times = [measure_window() for _ in range(args.runs)]
+    if None in window_times:
+        print("\nTime to first window: skipped (main.py could not open a window, no display?)")
+    else:
+        print(f"\nTime to first window: median {statistics.median(window_times) * 1000:.1f} ms, "
+              f"min {min(window_times) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark that compares the simulation throughput (steps per second) of the
+traci and libsumo backends on the bundled Town configurations.
+Each run steps SUMO headless and collects the same per-vehicle variables as
+main.run_simulation (via subscriptions), without writing any output.
+
+Usage: python benchmarks/bench_sumo_backends.py [--maps Town01 Town04] [--steps 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import traci.constants as tc
+from sumo_backend import load_sumo_backend
+
+sumo_examples_dir = os.path.join(config.carla_base_dir, "Co-Simulation", "Sumo", "examples")
+
+SUBSCRIBED_VEHICLE_VARS = (
+    tc.VAR_MINGAP,
+    tc.VAR_SPEED,
+    tc.VAR_POSITION,
+    tc.VAR_ACCELERATION,
+    tc.VAR_DISTANCE,
+    tc.VAR_TIMELOSS
+)
+
+
+def bench_backend(backend_name, map_name, max_steps):
+    sumo = load_sumo_backend(backend_name)
+    if backend_name == "libsumo" and sumo.__name__ != "libsumo":
+        return None
+
+    path = os.path.join(sumo_examples_dir, map_name + ".sumocfg")
+    sumo.start(["sumo", "-c", path, "--no-step-log", "true"])
+
+    steps = 0
+    samples = 0
+    start = time.perf_counter()
+    while steps < max_steps and sumo.simulation.getMinExpectedNumber() > 0:
+        sumo.simulationStep()
+        for vehicle_id in sumo.simulation.getDepartedIDList():
+            sumo.vehicle.subscribe(vehicle_id, SUBSCRIBED_VEHICLE_VARS)
+        samples += len(sumo.vehicle.getAllSubscriptionResults())
+        sumo.simulation.getTime()
+        steps += 1
+    elapsed = time.perf_counter() - start
+    sumo.close()
+
+    return steps, samples, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--maps", nargs="+", default=["Town01", "Town04", "Town05"])
+    parser.add_argument("--steps", type=int, default=2000, help="maximum number of steps per run")
+    args = parser.parse_args()
+
+    print(f"{'map':<8} {'backend':<8} {'steps':>7} {'samples':>9} {'seconds':>9} {'steps/s':>9}")
+    for map_name in args.maps:
+        for backend_name in ("traci", "libsumo"):
+            result = bench_backend(backend_name, map_name, args.steps)
+            if result is None:
+                print(f"{map_name:<8} {backend_name:<8} skipped (libsumo not installed)")
+                continue
+            steps, samples, elapsed = result
+            print(f"{map_name:<8} {backend_name:<8} {steps:>7} {samples:>9} {elapsed:>9.2f} {steps / elapsed:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
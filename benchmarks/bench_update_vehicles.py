@@ -0,0 +1,131 @@
+"""
+Benchmark for simulation.update_vehicles on a synthetic vType file
+(default 5000 vTypes, 500 of them with a HUD).
+
+Compares the original implementation (linear findall scan of all vTypes and XPath
+param lookups per HUD entry) with the indexed update, and with
+simulation.prepare_vtypes_file for HUD attributes whose vType file is already in the
+scenario cache (every later run with the same HUDs, whatever the seed).
+
+Usage: python benchmarks/bench_update_vehicles.py [--vtypes 5000] [--huds 500]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import simulation
+
+
+def write_synthetic_vtypes(filename, num_vtypes):
+    root = ET.Element("routes")
+    for i in range(num_vtypes):
+        vtype = ET.SubElement(root, "vType", id=f"vehicle.synthetic.{i}", vClass="passenger",
+                              length="4.5", maxSpeed="50", speedFactor="1.0", accel="2.6")
+        ET.SubElement(vtype, "param", key="carla.blueprint", value=f"vehicle.synthetic.{i}")
+    ET.ElementTree(root).write(filename, encoding="utf-8", xml_declaration=True)
+
+
+def synthetic_hud_data(num_vtypes, num_huds):
+    rng = random.Random(42)
+    return {
+        f"vehicle.synthetic.{i}": {
+            'max_speed': rng.randint(80, 150), 'speed_factor': rng.random() + 0.5,
+            'accel_factor': rng.random() * 5, 'reactTime': rng.random()
+        }
+        for i in rng.sample(range(num_vtypes), num_huds)
+    }
+
+
+def update_vehicles_original(xml_file_path, local_data):
+    """update_vehicles as originally implemented in main.py."""
+    tree = ET.parse(xml_file_path)
+    root = tree.getroot()
+
+    for vehicle_type, data in local_data.items():
+        if vehicle_type.lower() == "vehicle.nissan.patrol":
+            continue
+
+        max_speed     = data['max_speed']
+        speedFactor   = data.get('speed_factor', '')
+        reactionTime  = data.get('reactTime')
+        accelFactor   = data.get('accel_factor')
+
+        for vtype_elem in root.findall('vType'):
+            vtype_id = vtype_elem.get('id')
+            if vtype_id == vehicle_type:
+                vtype_elem.set('maxSpeed', str(max_speed))
+                vtype_elem.set('speedFactor', str(speedFactor))
+                vtype_elem.set('accel', str(accelFactor))
+
+                driverstate_params = vtype_elem.findall("./param[@key='has.driverstate.device']")
+                if driverstate_params:
+                    driverstate_params[0].set('value', 'true')
+                else:
+                    driverstate_param1 = ET.SubElement(vtype_elem, 'param')
+                    driverstate_param1.set('key', 'has.driverstate.device')
+                    driverstate_param1.set('value', 'true')
+
+                reaction_time_params = vtype_elem.findall("./param[@key='actionStepLength']")
+                if reaction_time_params:
+                    reaction_time_params[0].set('value', str(reactionTime))
+                else:
+                    driverstate_param2 = ET.SubElement(vtype_elem, 'param')
+                    driverstate_param2.set('key', 'actionStepLength')
+                    driverstate_param2.set('value', str(reactionTime))
+
+                color = "#{:02x}{:02x}{:02x}".format(random.randint(0,255), random.randint(0,255), random.randint(0,255))
+                vtype_elem.set('color', color)
+
+    tree.write(xml_file_path, encoding='utf-8', xml_declaration=True)
+
+
+def without_colors(filename):
+    root = ET.parse(filename).getroot()
+    for vtype in root.iter("vType"):
+        vtype.attrib.pop("color", None)
+    return ET.tostring(root)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vtypes", type=int, default=5000)
+    parser.add_argument("--huds", type=int, default=500)
+    args = parser.parse_args()
+
+    hud_data = synthetic_hud_data(args.vtypes, args.huds)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        template = os.path.join(tmp_dir, "template.rou.xml")
+        write_synthetic_vtypes(template, args.vtypes)
+        original_file = os.path.join(tmp_dir, "original.rou.xml")
+        indexed_file = os.path.join(tmp_dir, "indexed.rou.xml")
+        shutil.copyfile(template, original_file)
+        shutil.copyfile(template, indexed_file)
+
+        original = timed(update_vehicles_original, original_file, hud_data)
+        indexed = timed(simulation.update_vehicles, indexed_file, hud_data)
+        simulation.vtypes_xml_path = template
+        cache_dir = os.path.join(tmp_dir, "scenario_cache")
+        simulation.prepare_vtypes_file(hud_data, cache_dir)
+        cached = timed(simulation.prepare_vtypes_file, hud_data, cache_dir)
+
+        print(f"original: {original * 1000:9.1f} ms")
+        print(f"indexed:  {indexed * 1000:9.1f} ms  ({original / indexed:.1f}x)")
+        print(f"cached:   {cached * 1000:9.1f} ms  ({original / cached:.0f}x)")
+        print(f"same vTypes (ignoring the random colors): {without_colors(original_file) == without_colors(indexed_file)}")
+
+
+if __name__ == '__main__':
+    main()
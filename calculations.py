@@ -1,3 +1,6 @@
+import math
+
+
 """
 Function that takes the information_relevance, information_frequency and fov (float in [30,100]) 
 and the calculated distraction_level (calc_distraction) and fatigueness_level (calc_fatigueness) 
@@ -312,3 +315,145 @@ def calc_acceleration(fatigueness_level, distraction_level, awareness_level, rel
     ) / 10
     
     return acceleration
+
+
+# Integer codes of the string options for the batch evaluation.
+# Any other value (e.g. "none" for the HUD-less car) is encoded as -1 and has no effect,
+# like the .get(..., 0) lookups of the scalar functions.
+RELEVANCE_CODES = {"unimportant": 0, "neutral": 1, "important": 2}
+FREQUENCY_CODES = {"minimum": 0, "average": 1, "maximum": 2}
+
+
+"""
+Functions that encode a sequence of information_relevance / information_frequency strings
+into an int array of RELEVANCE_CODES / FREQUENCY_CODES for calc_batch.
+"""
+def encode_relevance(values):
+    import numpy as np
+    return np.array([RELEVANCE_CODES.get(v, -1) for v in values], dtype=np.int64)
+
+
+def encode_frequency(values):
+    import numpy as np
+    return np.array([FREQUENCY_CODES.get(v, -1) for v in values], dtype=np.int64)
+
+
+def _power(base, exponent):
+    # The levels are small integers, so the power is taken once per distinct base with
+    # Python's float pow (numpy's pow can differ in the last bit)
+    import numpy as np
+    unique_bases, inverse = np.unique(base, return_inverse=True)
+    powers = []
+    for b in unique_bases.tolist():
+        try:
+            powers.append(math.pow(b, exponent))
+        except ValueError:
+            powers.append(math.nan)
+    return np.array(powers, dtype=np.float64)[inverse.reshape(np.shape(base))]
+
+
+"""
+Function that takes arrays of encoded information_relevance and information_frequency codes,
+brightness (floats in [0,0.9]) and fov (floats in [30,100]) of many HUD configurations
+and calculates all derived quantities in one vectorized pass.
+The return value is a dict of arrays with the same keys as the hud_data entries in main.py.
+Each array is identical to calling the scalar functions above for every configuration,
+including the int() truncation of the levels and the max speed.
+The only difference is a negative awareness level, where the scalar calc_ReactTime
+returns a complex number and the batch version returns nan.
+"""
+def calc_batch(relevance_codes, frequency_codes, brightness, fov):
+    # numpy is imported inside the batch functions, so that importing this module
+    # for the scalar functions stays cheap
+    import numpy as np
+    relevance_codes = np.asarray(relevance_codes, dtype=np.int64)
+    frequency_codes = np.asarray(frequency_codes, dtype=np.int64)
+    brightness = np.asarray(brightness, dtype=np.float64)
+    fov = np.asarray(fov, dtype=np.float64)
+
+    # Lookup tables in code order; the trailing 0 is selected by the unknown code -1
+    def table(*effects):
+        return np.array(effects + (0,), dtype=np.float64)
+
+    normalized_fov = (fov - 30) / (100 - 30)
+    normalized_brightness = brightness / 0.9
+
+    # calc_distraction
+    distraction_total = (
+        table(3 * 0.9, 2 * 0.9, 0 * 0.9)[relevance_codes]
+        + table(1 * 0.8, 2 * 0.8, 3 * 0.8)[frequency_codes]
+        + normalized_brightness * 3 * 0.4
+        + normalized_fov * 3 * 0.3
+    )
+    distraction_level = np.trunc(distraction_total * (6 / 4)).astype(np.int64)
+
+    # calc_fatigueness
+    fatigueness_total = (
+        table(3 * 0.8, 2 * 0.8, 0 * 0.8)[relevance_codes]
+        + table(1 * 0.9, 2 * 0.9, 3 * 0.9)[frequency_codes]
+        + normalized_brightness * 3 * 0.4
+    )
+    fatigueness_level = np.trunc(5 * (fatigueness_total / 3)).astype(np.int64)
+
+    # calc_awareness
+    awareness_total = (
+        table(0 * 0.9, 1 * 0.9, 3 * 0.9)[relevance_codes]
+        + table(2 * 0.8, 1 * 0.8, 0 * 0.8)[frequency_codes]
+        + normalized_fov * 3 * 0.4
+        + (distraction_level * 0.6 - fatigueness_level * 0.4)
+    )
+    awareness_level = np.trunc(5 * (awareness_total / 3)).astype(np.int64)
+
+    # calc_ReactTime
+    react_time = 0.9 + (
+        _power(0.6 * distraction_level + 0.2 * fatigueness_level, 0.3) - _power(0.7 * awareness_level, 0.4)
+    ) / 3
+
+    # calc_MinGap
+    min_gap_factor = 1.4 + (
+        _power(0.9 * awareness_level, 0.2)
+        - (0.6 * distraction_level + 0.2 * fatigueness_level) / 2
+        + normalized_fov * 3 * 0.3
+    ) / 3
+
+    # calc_SpeedAd
+    speed_total = (
+        table((2 * 0.7) ** 0.8, (0 * 0.7) ** 0.8, (1 * 0.7) ** 0.8)[relevance_codes]
+        + normalized_fov * 3 * 0.4
+        + _power(distraction_level * 0.9, 1.2)
+        + awareness_level * 0.8
+        + (fatigueness_level * 0.4) / 2
+        + table(3 * 0.6, 2 * 0.6, 1 * 0.6)[frequency_codes]
+    )
+    speed_factor = (0.95 * (speed_total / 6)) / 2
+
+    # calc_MaxSpeed
+    max_speed = np.trunc((
+        150 * (
+            awareness_level * 0.9
+            + fatigueness_level * 0.4
+            + distraction_level * 0.3
+            + table(1 * 0.2, 2 * 0.2, 3 * 0.2)[frequency_codes]
+        )
+    ) / 10).astype(np.int64)
+
+    # calc_acceleration
+    acceleration = (
+        6.5 * (
+            0.8 * awareness_level
+            + 0.2 * fatigueness_level
+            + 0.5 * distraction_level
+            + table(2 * 0.6, 0 * 0.6, 1 * 0.6)[relevance_codes]
+        )
+    ) / 10
+
+    return {
+        'distraction_level': distraction_level,
+        'fatigueness_level': fatigueness_level,
+        'awareness_level':   awareness_level,
+        'reactTime':         react_time,
+        'max_speed':         max_speed,
+        'min_Gap':           min_gap_factor,
+        'speed_factor':      speed_factor,
+        'accel_factor':      acceleration
+    }
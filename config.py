@@ -1,2 +1,6 @@
 carla_base_dir = r"Path/To/Carla/WindowsNoEditor"
-#location of CarlaUE4.exe
\ No newline at end of file
+#location of CarlaUE4.exe
+
+# Readiness probing when starting CARLA: RPC port and how long to wait for it (seconds)
+carla_port = 2000
+startup_timeout = 60.0
@@ -0,0 +1,395 @@
+import csv
+from array import array
+from operator import itemgetter
+
+# pyarrow is only imported when parquet/arrow output is first used (see load_pyarrow)
+pa = None
+pq = None
+
+# Column names of the simulation data CSV, in the order of the settings checkboxes
+COLUMNS = [
+    'map', 'vehicle_id', 'hud_id', 'simulation_time', 'vehicle_type',
+    'position_x', 'position_y', 'current_speed', 'current_gap',
+    'current_acceleration', 'distance_traveled', 'time_loss',
+    'maxSpeed', 'speedAdherenceFactor', 'reactionTime', 'fatiguenessLevel',
+    'awarenessLevel', 'acceleration', 'minGapFactor', 'distractionLevel',
+    'brightness', 'information_frequency', 'information_relevance', 'FoV'
+]
+
+# Output file formats for simulation data; parquet/arrow need pyarrow
+OUTPUT_FORMATS = ["csv", "parquet", "arrow"]
+
+# Columns that are constant per HUD, with their key in hud_data
+HUD_COLUMN_KEYS = {
+    'maxSpeed':              'max_speed',
+    'speedAdherenceFactor':  'speed_factor',
+    'reactionTime':          'reactTime',
+    'fatiguenessLevel':      'fatigueness_level',
+    'awarenessLevel':        'awareness_level',
+    'acceleration':          'accel_factor',
+    'minGapFactor':          'min_Gap',
+    'distractionLevel':      'distraction_level',
+    'brightness':            'brightness',
+    'information_frequency': 'frequency',
+    'information_relevance': 'relevance',
+    'FoV':                   'field of view'
+}
+
+# Position of the recorded values in a sample [vehicle_id, simTime, x, y, speed, gap, accel, distance, time_loss]
+SAMPLE_LENGTH = 9
+SAMPLE_COLUMN_INDEX = {
+    'simulation_time':      1,
+    'position_x':           2,
+    'position_y':           3,
+    'current_speed':        4,
+    'current_gap':          5,
+    'current_acceleration': 6,
+    'distance_traveled':    7,
+    'time_loss':            8
+}
+
+# Number of recorded rows kept in memory before they are written to disk
+CHUNK_SIZE = 10000
+
+
+class SampleBuffer:
+    """
+    Column storage for the recorded samples of one chunk.
+    Instead of one list of boxed values per sample, the vehicle ID is interned to an
+    int code and each of the SAMPLE_LENGTH - 1 recorded values is appended to the float64
+    array of its column (about 70 bytes per sample instead of close to 400 for a 9-element
+    list), which Arrow can wrap without copying.
+    The interned codes stay valid across chunks; clear only empties the sample arrays.
+    """
+    def __init__(self):
+        self.vehicle_ids = []
+        self.vehicle_id_codes = {}
+        self.clear()
+
+    def __len__(self):
+        return len(self.vehicle_codes)
+
+    def append(self, vehicle_id, values):
+        """Add one sample (values in the order of SAMPLE_COLUMN_INDEX); returns the new length."""
+        code = self.vehicle_id_codes.get(vehicle_id)
+        if code is None:
+            code = self.vehicle_id_codes[vehicle_id] = len(self.vehicle_ids)
+            self.vehicle_ids.append(vehicle_id)
+        self.vehicle_codes.append(code)
+        for append, value in zip(self.column_appends, values):
+            append(value)
+        return len(self.vehicle_codes)
+
+    def column(self, name):
+        """float64 array of one recorded column (see SAMPLE_COLUMN_INDEX); not a copy."""
+        return self.columns[SAMPLE_COLUMN_INDEX[name] - 1]
+
+    def clear(self):
+        # New arrays instead of resizing, as Arrow may still hold a view of the old ones
+        self.vehicle_codes = array('i')
+        self.columns = [array('d') for _ in range(SAMPLE_LENGTH - 1)]
+        self.column_appends = [column.append for column in self.columns]
+
+
+def load_pyarrow():
+    """Import pyarrow on first use; returns False if it is not installed."""
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            return False
+    return True
+
+
+def create_writer(output_format, base_filename, map_name, selected_columns, hud_data, hud_id_mapping,
+                  vehicle_type_mapping, chunk_size=CHUNK_SIZE):
+    """
+    Create the writer for output_format ("csv", "parquet" or "arrow").
+    base_filename is extended with the file suffixes, e.g. "Simulation_data/Town01_<timestamp>".
+    Falls back to CSV if pyarrow is not installed.
+    """
+    if output_format in ("parquet", "arrow"):
+        if load_pyarrow():
+            return ColumnarSimulationDataWriter(
+                output_format, base_filename, map_name, selected_columns,
+                hud_data, hud_id_mapping, vehicle_type_mapping, chunk_size
+            )
+        print("pyarrow is not installed, saving simulation data as CSV.")
+
+    return SimulationDataWriter(
+        f"{base_filename}_simulation_data.csv", map_name, selected_columns,
+        hud_data, hud_id_mapping, vehicle_type_mapping, chunk_size
+    )
+
+
+class SimulationDataWriter:
+    """
+    Streams recorded simulation data to CSV while the simulation runs.
+    Rows are buffered and written in chunks of chunk_size, so memory use stays
+    bounded for any run length and a crash only loses the last partial chunk.
+
+    The selected columns are resolved once. All values that are constant per
+    vehicle type (map, hud_id, vehicle_type and the HUD attributes) are built once
+    into a tuple template, and each row is picked from sample + template by a
+    single itemgetter and written with csv.writer.writerows.
+    Samples are buffered in a SampleBuffer, not as Python lists.
+    """
+    def __init__(self, csv_filename, map_name, selected_columns, hud_data, hud_id_mapping,
+                 vehicle_type_mapping, chunk_size=CHUNK_SIZE):
+        self.filename = csv_filename
+        self.map_name = map_name
+        self.fieldnames = [name for name, enabled in zip(COLUMNS, selected_columns) if enabled]
+        self.hud_data = hud_data
+        self.hud_id_mapping = hud_id_mapping
+        self.vehicle_type_mapping = vehicle_type_mapping
+        self.chunk_size = chunk_size
+        self.samples = SampleBuffer()
+        self.rows_written = 0
+        self.file = None
+        self.writer = None
+
+        # A row is picked from (*sample, *template); template holds the selected constant columns
+        sample_index = {'vehicle_id': 0, **SAMPLE_COLUMN_INDEX}
+        self.template_columns = [name for name in self.fieldnames if name not in sample_index]
+        indices = [
+            sample_index[name] if name in sample_index else SAMPLE_LENGTH + self.template_columns.index(name)
+            for name in self.fieldnames
+        ]
+        if len(indices) == 1:
+            self.row_getter = lambda source, index=indices[0]: (source[index],)
+        else:
+            self.row_getter = itemgetter(*indices)
+        # Template per interned vehicle code
+        self.vehicle_templates = []
+        self.type_templates = {}
+
+    def add_sample(self, vehicle_id, *values):
+        """Add one recorded sample: vehicle_id, simTime, x, y, speed, gap, accel, distance, time_loss."""
+        if self.samples.append(vehicle_id, values) >= self.chunk_size:
+            self.flush()
+
+    def add(self, entry):
+        """Add one recorded sample [vehicle_id, simTime, x, y, speed, gap, accel, distance, time_loss]."""
+        self.add_sample(*entry)
+
+    def flush(self):
+        """Write all buffered rows to the CSV file and empty the buffer."""
+        samples = self.samples
+        if not len(samples):
+            return
+        if self.file is None:
+            self.file = open(self.filename, mode='w', newline='')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.fieldnames)
+
+        vehicle_ids = samples.vehicle_ids
+        vehicle_templates = self.vehicle_templates
+        for vehicle_id in vehicle_ids[len(vehicle_templates):]:
+            vehicle_templates.append(self.vehicle_template(vehicle_id))
+
+        row_getter = self.row_getter
+        columns = [column.tolist() for column in samples.columns]
+        rows = [
+            row_getter((vehicle_ids[code], *sample, *vehicle_templates[code]))
+            for code, sample in zip(samples.vehicle_codes, zip(*columns))
+        ]
+
+        self.writer.writerows(rows)
+        self.file.flush()
+        self.rows_written += len(samples)
+        samples.clear()
+
+    def close(self):
+        """Flush the remaining rows and close the CSV file."""
+        self.flush()
+        if self.file is None:
+            print("No simulation data available!")
+            return
+        self.file.close()
+        self.file = None
+        print(f"Saved {self.rows_written} rows to {self.filename}")
+
+    def vehicle_template(self, vehicle_id):
+        """Return the (per type cached) constant column values for the vehicle type of vehicle_id."""
+        vtype = self.vehicle_type_mapping.get(vehicle_id, "unknown")
+        template = self.type_templates.get(vtype)
+        if template is None:
+            template = self.type_templates[vtype] = self.build_template(vtype)
+        return template
+
+    def build_template(self, vtype):
+        hud_data_for_type = self.hud_data.get(vtype, {})
+        hud_name = hud_data_for_type.get('HUDname', 'N/A')
+        hud_id_val = self.hud_id_mapping.get(vtype, "unknown")
+
+        values = []
+        for name in self.template_columns:
+            if name == 'map':
+                values.append(self.map_name)
+            elif name == 'hud_id':
+                values.append(f"{hud_id_val}_{hud_name}")
+            elif name == 'vehicle_type':
+                values.append(vtype)
+            else:
+                values.append(hud_data_for_type.get(HUD_COLUMN_KEYS[name], 'N/A'))
+        return tuple(values)
+
+
+def arrow_array(values, arrow_type):
+    """Wrap an array.array as an Arrow array of arrow_type without copying it."""
+    return pa.Array.from_buffers(arrow_type, len(values), [None, pa.py_buffer(values)])
+
+
+class DictionaryEncoder:
+    """
+    Assigns stable integer codes to string values across chunks, so every chunk
+    only extends the dictionary (written as a delta in Arrow IPC files).
+    """
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, items):
+        codes = self.codes
+        values = self.values
+        indices = []
+        for item in items:
+            if item is None:
+                indices.append(None)
+                continue
+            code = codes.get(item)
+            if code is None:
+                code = codes[item] = len(values)
+                values.append(item)
+            indices.append(code)
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(values, pa.string()))
+
+
+class ColumnarSimulationDataWriter:
+    """
+    Streams recorded simulation data to a compressed, typed columnar file
+    (Parquet or Arrow IPC), one row group / record batch per chunk.
+    String columns are dictionary-encoded. The per-HUD constants are not repeated
+    per row but written once to a side table (<base>_hud_data.<ext>) keyed by hud_id.
+    Samples are buffered in a SampleBuffer, whose typed arrays are handed to Arrow
+    without copying; its interned vehicle codes are the vehicle_id dictionary indices.
+    """
+    def __init__(self, output_format, base_filename, map_name, selected_columns, hud_data, hud_id_mapping,
+                 vehicle_type_mapping, chunk_size=CHUNK_SIZE):
+        extension = "parquet" if output_format == "parquet" else "arrow"
+        self.output_format = output_format
+        self.filename = f"{base_filename}_simulation_data.{extension}"
+        self.hud_filename = f"{base_filename}_hud_data.{extension}"
+        self.map_name = map_name
+        self.hud_data = hud_data
+        self.hud_id_mapping = hud_id_mapping
+        self.vehicle_type_mapping = vehicle_type_mapping
+        self.chunk_size = chunk_size
+
+        selected = [name for name, enabled in zip(COLUMNS, selected_columns) if enabled]
+        # hud_id is always kept as the key to join the side table
+        self.sample_columns = [
+            name for name in COLUMNS
+            if name not in HUD_COLUMN_KEYS and (name in selected or name == 'hud_id')
+        ]
+        self.hud_columns = [name for name in selected if name in HUD_COLUMN_KEYS]
+
+        fields = []
+        for name in self.sample_columns:
+            if name in SAMPLE_COLUMN_INDEX:
+                fields.append(pa.field(name, pa.float64()))
+            else:
+                fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        self.schema = pa.schema(fields)
+        self.encoders = {
+            name: DictionaryEncoder() for name in self.sample_columns
+            if name not in SAMPLE_COLUMN_INDEX and name != 'vehicle_id'
+        }
+
+        self.samples = SampleBuffer()
+        # vehicle_type per interned vehicle code
+        self.vehicle_types = []
+        self.rows_written = 0
+        self.writer = None
+
+    def add_sample(self, vehicle_id, *values):
+        """Add one recorded sample: vehicle_id, simTime, x, y, speed, gap, accel, distance, time_loss."""
+        if self.samples.append(vehicle_id, values) >= self.chunk_size:
+            self.flush()
+
+    def add(self, entry):
+        """Add one recorded sample [vehicle_id, simTime, x, y, speed, gap, accel, distance, time_loss]."""
+        self.add_sample(*entry)
+
+    def flush(self):
+        """Write all buffered rows as one row group / record batch and empty the buffer."""
+        samples = self.samples
+        rows = len(samples)
+        if not rows:
+            return
+        if self.writer is None:
+            if self.output_format == "parquet":
+                self.writer = pq.ParquetWriter(self.filename, self.schema, compression='zstd')
+            else:
+                options = pa.ipc.IpcWriteOptions(compression='zstd', emit_dictionary_deltas=True)
+                self.writer = pa.ipc.new_file(self.filename, self.schema, options=options)
+
+        for vehicle_id in samples.vehicle_ids[len(self.vehicle_types):]:
+            self.vehicle_types.append(self.vehicle_type_mapping.get(vehicle_id, "unknown"))
+        codes = samples.vehicle_codes
+        vehicle_types = [self.vehicle_types[code] for code in codes]
+
+        arrays = []
+        for name in self.sample_columns:
+            if name in SAMPLE_COLUMN_INDEX:
+                arrays.append(arrow_array(samples.column(name), pa.float64()))
+            elif name == 'map':
+                arrays.append(self.encoders[name].encode([self.map_name] * rows))
+            elif name == 'vehicle_id':
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    arrow_array(codes, pa.int32()), pa.array(samples.vehicle_ids, pa.string())
+                ))
+            elif name == 'hud_id':
+                arrays.append(self.encoders[name].encode([self.hud_label(vtype) for vtype in vehicle_types]))
+            elif name == 'vehicle_type':
+                arrays.append(self.encoders[name].encode(vehicle_types))
+
+        self.writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.rows_written += rows
+        samples.clear()
+
+    def close(self):
+        """Flush the remaining rows, close the data file and write the per-HUD side table."""
+        self.flush()
+        if self.writer is None:
+            print("No simulation data available!")
+            return
+        self.writer.close()
+        self.writer = None
+        self.write_hud_table()
+        print(f"Saved {self.rows_written} rows to {self.filename} (HUD attributes in {self.hud_filename})")
+
+    def hud_label(self, vtype):
+        hud_name = self.hud_data.get(vtype, {}).get('HUDname', 'N/A')
+        return f"{self.hud_id_mapping.get(vtype, 'unknown')}_{hud_name}"
+
+    def write_hud_table(self):
+        columns = {'hud_id': [], 'vehicle_type': []}
+        for name in self.hud_columns:
+            columns[name] = []
+        for vtype in self.hud_id_mapping:
+            hud_data_for_type = self.hud_data.get(vtype, {})
+            columns['hud_id'].append(self.hud_label(vtype))
+            columns['vehicle_type'].append(vtype)
+            for name in self.hud_columns:
+                columns[name].append(hud_data_for_type.get(HUD_COLUMN_KEYS[name]))
+
+        table = pa.Table.from_pydict(columns)
+        if self.output_format == "parquet":
+            pq.write_table(table, self.hud_filename, compression='zstd')
+        else:
+            options = pa.ipc.IpcWriteOptions(compression='zstd')
+            with pa.ipc.new_file(self.hud_filename, table.schema, options=options) as writer:
+                writer.write_table(table)
@@ -0,0 +1,219 @@
+import argparse
+import csv
+import gzip
+import math
+import xml.etree.ElementTree as ET
+from array import array
+
+import data_output
+
+# <vehicle> attributes of SUMO's FCD output that are read by default
+FCD_ATTRIBUTES = ['id', 'type', 'x', 'y', 'angle', 'speed', 'pos', 'lane', 'slope']
+
+# FCD attributes with numeric values; they are stored as float64, all others as strings
+FCD_NUMERIC_ATTRIBUTES = {
+    'x', 'y', 'z', 'angle', 'speed', 'pos', 'slope', 'posLat', 'acceleration',
+    'accelerationLat', 'odometer', 'distance', 'arrivalDelay'
+}
+
+# HUD attributes joined by vehicle type, with their key in hud_data; the numeric ones are stored as float64
+HUD_COLUMN_KEYS = {'hud_name': 'HUDname', **data_output.HUD_COLUMN_KEYS}
+HUD_STRING_COLUMNS = {'hud_name', 'information_frequency', 'information_relevance'}
+
+
+def open_fcd(filename):
+    """Open an FCD file for parsing, gzip-compressed if it ends with .gz."""
+    if filename.endswith(".gz"):
+        return gzip.open(filename, 'rb')
+    return open(filename, 'rb')
+
+
+def read_fcd(filename, attributes=FCD_ATTRIBUTES, chunk_size=data_output.CHUNK_SIZE):
+    """
+    Incrementally parse a SUMO FCD output file (plain or .gz) and yield its <vehicle> records
+    in chunks of up to chunk_size rows.
+    Every chunk is a dict of columns: 'time' and the given attributes, as array('d') for numeric
+    attributes (nan if missing) and as lists of strings otherwise (None if missing).
+    Parsed elements are cleared after every timestep, so memory use does not depend on the file size.
+    """
+    numeric_attributes = [name for name in attributes if name in FCD_NUMERIC_ATTRIBUTES]
+    string_attributes = [name for name in attributes if name not in FCD_NUMERIC_ATTRIBUTES]
+
+    def new_chunk():
+        chunk = {'time': array('d')}
+        for name in attributes:
+            chunk[name] = array('d') if name in FCD_NUMERIC_ATTRIBUTES else []
+        return chunk
+
+    chunk = new_chunk()
+    rows = 0
+    time = math.nan
+    nan = math.nan
+    with open_fcd(filename) as file:
+        context = ET.iterparse(file, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            tag = elem.tag
+            if event == 'start':
+                if tag == 'timestep':
+                    time = float(elem.get('time'))
+                continue
+
+            if tag == 'vehicle':
+                get = elem.get
+                chunk['time'].append(time)
+                for name in numeric_attributes:
+                    value = get(name)
+                    chunk[name].append(float(value) if value is not None else nan)
+                for name in string_attributes:
+                    chunk[name].append(get(name))
+                rows += 1
+                if rows >= chunk_size:
+                    yield chunk
+                    chunk = new_chunk()
+                    rows = 0
+            elif tag == 'timestep':
+                # Drop all elements parsed so far
+                root.clear()
+
+    if rows:
+        yield chunk
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def join_hud_attributes(chunk, hud_data):
+    """
+    Add the HUD attributes of each row's vehicle type (HUD_COLUMN_KEYS) as columns to a chunk of read_fcd.
+    hud_data maps vehicle types to hud_data entries (see simulation.calculate_hud_attributes);
+    rows of vehicles without HUD get nan / None. The chunk needs the 'type' column.
+    """
+    types = chunk['type']
+    for name, key in HUD_COLUMN_KEYS.items():
+        if name in HUD_STRING_COLUMNS:
+            values = {vtype: data.get(key) for vtype, data in hud_data.items()}
+            chunk[name] = [values.get(vtype) for vtype in types]
+        else:
+            values = {vtype: to_float(data.get(key)) for vtype, data in hud_data.items()}
+            chunk[name] = array('d', [values.get(vtype, math.nan) for vtype in types])
+    return chunk
+
+
+def hud_data_from_config(xml_file_path="hudconfig.xml"):
+    """Calculate the hud_data entries of the HUDs stored in hudconfig.xml."""
+    import simulation
+    return {
+        hud['vehicle_type']: simulation.calculate_hud_attributes(hud)
+        for hud in simulation.read_hud_config(xml_file_path)
+    }
+
+
+def convert_fcd(fcd_filename, output_filename, hud_data=None, attributes=FCD_ATTRIBUTES,
+                chunk_size=data_output.CHUNK_SIZE):
+    """
+    Convert an FCD file to a Parquet (.parquet), Arrow IPC (.arrow) or CSV file, chunk by chunk.
+    With hud_data, the HUD attributes are joined by vehicle type (needs 'type' in attributes).
+    Returns the number of converted rows.
+    """
+    columns = ['time'] + list(attributes)
+    if hud_data is not None:
+        if 'type' not in attributes:
+            raise ValueError("Joining HUD attributes needs the 'type' attribute")
+        columns += list(HUD_COLUMN_KEYS)
+    string_columns = {name for name in columns if name not in FCD_NUMERIC_ATTRIBUTES and name != 'time'}
+    string_columns -= set(HUD_COLUMN_KEYS) - HUD_STRING_COLUMNS
+
+    output_format = output_filename.rsplit(".", 1)[-1].lower()
+    if output_format in ("parquet", "arrow"):
+        if not data_output.load_pyarrow():
+            raise RuntimeError("pyarrow is needed for parquet/arrow output")
+        writer = ColumnarChunkWriter(output_filename, output_format, columns, string_columns)
+    elif output_format == "csv":
+        writer = CsvChunkWriter(output_filename, columns)
+    else:
+        raise ValueError(f"Unknown output format: {output_filename}")
+
+    rows = 0
+    try:
+        for chunk in read_fcd(fcd_filename, attributes, chunk_size):
+            if hud_data is not None:
+                join_hud_attributes(chunk, hud_data)
+            writer.write(chunk)
+            rows += len(chunk['time'])
+    finally:
+        writer.close()
+    return rows
+
+
+class CsvChunkWriter:
+    def __init__(self, filename, columns):
+        self.columns = columns
+        self.file = open(filename, mode='w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, chunk):
+        self.writer.writerows(zip(*(chunk[name] for name in self.columns)))
+
+    def close(self):
+        self.file.close()
+
+
+class ColumnarChunkWriter:
+    """Writes chunks as row groups / record batches, string columns dictionary-encoded."""
+    def __init__(self, filename, output_format, columns, string_columns):
+        pa = data_output.pa
+        self.columns = columns
+        self.string_columns = string_columns
+        self.schema = pa.schema([
+            pa.field(name, pa.dictionary(pa.int32(), pa.string()) if name in string_columns else pa.float64())
+            for name in columns
+        ])
+        self.encoders = {name: data_output.DictionaryEncoder() for name in string_columns}
+        if output_format == "parquet":
+            self.writer = data_output.pq.ParquetWriter(filename, self.schema, compression='zstd')
+        else:
+            options = pa.ipc.IpcWriteOptions(compression='zstd', emit_dictionary_deltas=True)
+            self.writer = pa.ipc.new_file(filename, self.schema, options=options)
+
+    def write(self, chunk):
+        pa = data_output.pa
+        arrays = []
+        for name in self.columns:
+            if name in self.string_columns:
+                arrays.append(self.encoders[name].encode(chunk[name]))
+            else:
+                arrays.append(data_output.arrow_array(chunk[name], pa.float64()))
+        self.writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert SUMO FCD output to Parquet, Arrow or CSV.")
+    parser.add_argument("fcd_file", help="FCD XML file, e.g. Simulation_data/<map>_<time>_fcd_data.xml(.gz)")
+    parser.add_argument("-o", "--output", help="output file, the format is taken from the extension "
+                                               "(.parquet, .arrow or .csv; default: <fcd_file>.parquet)")
+    parser.add_argument("--hud-config", help="join the HUD attributes of the HUDs in this hudconfig.xml")
+    parser.add_argument("--attributes", nargs="+", default=FCD_ATTRIBUTES, help="vehicle attributes to read")
+    parser.add_argument("--chunk-size", type=int, default=data_output.CHUNK_SIZE)
+    args = parser.parse_args()
+
+    output = args.output
+    if output is None:
+        base = args.fcd_file[:-3] if args.fcd_file.endswith(".gz") else args.fcd_file
+        output = (base[:-4] if base.endswith(".xml") else base) + ".parquet"
+    hud_data = hud_data_from_config(args.hud_config) if args.hud_config else None
+
+    rows = convert_fcd(args.fcd_file, output, hud_data, args.attributes, args.chunk_size)
+    print(f"Converted {rows} rows to {output}")
+
+
+if __name__ == '__main__':
+    main()
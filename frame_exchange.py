@@ -0,0 +1,48 @@
+import threading
+
+import numpy as np
+
+
+class FrameExchange:
+    """
+    Triple buffer that hands camera frames from the sensor thread to the display loop.
+    The sensor thread copies every frame once into its own back buffer (publish) and swaps
+    it with the ready buffer; the display loop swaps the ready buffer with its front buffer
+    (acquire) and may draw into it in place until the next acquire. Only the swaps hold the
+    lock, and the three buffers are reused, so no frame is allocated or copied again.
+    A frame that is replaced by a newer one before it was acquired is counted as dropped.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.back = None
+        self.ready = None
+        self.front = None
+        self.has_new_frame = False
+        self.received = 0
+        self.displayed = 0
+        self.dropped = 0
+
+    def publish(self, data, height, width, channels=4):
+        """Copy a raw uint8 frame (e.g. carla.Image.raw_data) into the exchange; called by the sensor thread."""
+        shape = (height, width, channels)
+        back = self.back
+        if back is None or back.shape != shape:
+            back = np.empty(shape, dtype=np.uint8)
+        np.copyto(back, np.frombuffer(data, dtype=np.uint8).reshape(shape))
+
+        with self.lock:
+            self.back, self.ready = self.ready, back
+            if self.has_new_frame:
+                self.dropped += 1
+            self.has_new_frame = True
+            self.received += 1
+
+    def acquire(self):
+        """The newest frame for the display loop to draw into, or None if there is no new frame since the last call."""
+        with self.lock:
+            if not self.has_new_frame:
+                return None
+            self.front, self.ready = self.ready, self.front
+            self.has_new_frame = False
+            self.displayed += 1
+            return self.front
@@ -0,0 +1,149 @@
+import os
+
+import cv2
+import numpy as np
+
+# HUD icons of the spectator client (files in the icons folder), in drawing order
+HUD_ICONS = {
+    'icon_stopwatch':      'stopwatch-svgrepo-com.png',
+    'icon_battery':        'battery-svgrepo-com.png',
+    'icon_calendar':       'calendar-svgrepo-com.png',
+    'icon_clock':          'clock-svgrepo-com.png',
+    'icon_music_player':   'music-player-svgrepo-com.png',
+    'icon_smartphone':     'smartphone-svgrepo-com.png',
+    'icon_speaker':        'speaker-svgrepo-com.png',
+    'icon_compass':        'compass-svgrepo-com.png',
+    'icon_placeholder':    'placeholder-svgrepo-com.png',
+    'icon_idea':           'idea-svgrepo-com.png',
+    'icon_minus':          'minus-svgrepo-com.png',
+    'icon_navigation':     'navigation-svgrepo-com.png'
+}
+
+
+class IconCache:
+    """
+    HUD icons of the spectator client, decoded from disk once.
+    Resized variants are kept per icon scale, and for the current scale and HUD alpha
+    every icon is prepared as float32 planes (see prepare), so drawing a frame needs
+    neither file I/O nor resizing.
+    """
+    def __init__(self, icon_path, icons):
+        self.originals = {}
+        for icon_name, filename in icons.items():
+            icon = cv2.imread(os.path.join(icon_path, filename), cv2.IMREAD_UNCHANGED)
+            if icon is None:
+                print(f"[WARNING] Icon {filename} not found in {icon_path}!")
+                continue
+            self.originals[icon_name] = icon
+        # iconscale -> {icon name: resized icon}
+        self.resized = {}
+        self.scale = None
+        self.alpha = None
+        self.planes = {}
+
+    def prepare(self, scale, alpha):
+        """
+        Prepare the icons for drawing at scale (width, height) with the HUD alpha.
+        Every icon becomes (color, inverse_alpha): its color planes premultiplied with
+        icon alpha * HUD alpha, and 1 - that alpha. Nothing is done if neither changed.
+        """
+        scale = tuple(scale)
+        if scale == self.scale and alpha == self.alpha:
+            return
+        resized = self.resized.get(scale)
+        if resized is None:
+            resized = {name: cv2.resize(icon, scale) for name, icon in self.originals.items()}
+            self.resized[scale] = resized
+
+        self.planes = {}
+        for icon_name, icon in resized.items():
+            if icon.ndim == 3 and icon.shape[2] == 4:
+                icon_alpha = icon[:, :, 3].astype(np.float32) * np.float32(alpha / 255.0)
+            else:
+                icon_alpha = np.full(icon.shape[:2], alpha, dtype=np.float32)
+            color = icon[:, :, :3].astype(np.float32) * icon_alpha[:, :, None]
+            self.planes[icon_name] = (color, (1.0 - icon_alpha)[:, :, None])
+        self.scale = scale
+        self.alpha = alpha
+
+    def get(self, icon_name):
+        """(color, inverse_alpha) of a prepared icon, or None if it could not be loaded."""
+        return self.planes.get(icon_name)
+
+
+class HudCompositor:
+    """
+    Draws all static HUD icons with a single blend per frame.
+    Whenever the layout changes (set_layout), the prepared icons of an IconCache are
+    composited into one premultiplied layer covering the bounding box of all icons,
+    stored in 8-bit fixed point as uint16: color * 256 and (1 - alpha) * 256.
+    blend then computes (color + inverse_alpha * pixel) >> 8 for the bounding box only,
+    into a preallocated buffer, so a frame allocates no temporaries.
+    """
+    def __init__(self, icon_cache):
+        self.icon_cache = icon_cache
+        self.layout = []
+        self.shape = None
+        self.bbox = None
+        self.color = None
+        self.inverse_alpha = None
+        self.buffer = None
+
+    def set_layout(self, layout):
+        """
+        Set the shown icons as a list of (icon name, (y, x)) with the top left corner of each icon
+        relative to the frame size, in drawing order. The layer is rebuilt for the next frame.
+        """
+        self.layout = list(layout)
+        self.shape = None
+
+    def build(self, shape):
+        """Composite the icons of the layout into the layer for frames of shape (height, width)."""
+        height, width = shape
+        placed = []
+        for icon_name, location in self.layout:
+            planes = self.icon_cache.get(icon_name)
+            if planes is None:
+                continue
+            y, x = int(height * location[0]), int(width * location[1])
+            h, w = planes[1].shape[:2]
+            # Clipping if the icon is out of bounds
+            if y + h > height or x + w > width:
+                continue
+            placed.append((planes, y, x, h, w))
+
+        self.shape = shape
+        if not placed:
+            self.bbox = None
+            return
+
+        y0 = min(y for _, y, _, _, _ in placed)
+        x0 = min(x for _, _, x, _, _ in placed)
+        y1 = max(y + h for _, y, _, h, _ in placed)
+        x1 = max(x + w for _, _, x, _, w in placed)
+        color = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.float32)
+        inverse_alpha = np.ones((y1 - y0, x1 - x0, 1), dtype=np.float32)
+        for (icon_color, icon_inverse_alpha), y, x, h, w in placed:
+            # Later icons are drawn over earlier ones
+            region = (slice(y - y0, y - y0 + h), slice(x - x0, x - x0 + w))
+            color[region] = icon_color + icon_inverse_alpha * color[region]
+            inverse_alpha[region] *= icon_inverse_alpha
+
+        self.bbox = (y0, y1, x0, x1)
+        self.color = np.rint(color * 256).astype(np.uint16)
+        self.inverse_alpha = np.rint(inverse_alpha * 256).astype(np.uint16)
+        self.buffer = np.empty(self.color.shape, dtype=np.uint16)
+
+    def blend(self, image):
+        """Blend the HUD layer onto the BGR(A) image in place."""
+        if self.shape != image.shape[:2]:
+            self.build(image.shape[:2])
+        if self.bbox is None:
+            return
+        y0, y1, x0, x1 = self.bbox
+        region = image[y0:y1, x0:x1, :3]
+        buffer = self.buffer
+        np.multiply(region, self.inverse_alpha, out=buffer)
+        buffer += self.color
+        buffer >>= 8
+        region[...] = buffer
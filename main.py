@@ -1,19 +1,19 @@
 import tkinter as tk
 import subprocess
-import xml.etree.ElementTree as ET
 from tkinter import messagebox
 import os
-import random
-import time
-import calculations
+import queue
+import threading
 from tkinter import ttk
-import xml.etree.cElementTree as ET
-import xml.dom.minidom as minidom
-from PIL import Image, ImageTk
-import traci
-import csv
-from datetime import datetime
 import config
+import data_output
+from recording import RecordingPolicy
+from startup import StartupTimer, wait_for_port
+from simulation import (
+    sumo_base_dir, maps, OUTPUT_MODES, vehicle_ui_map, base_frame,
+    hud_id_mapping, string_hud_frames,
+    run_simulation, prepare_scenario
+)
 
 # -----------------------------------------------------------------------
 #                          Global / Config
@@ -21,58 +21,25 @@ import config
 carla_base_dir = config.carla_base_dir
 config_script = os.path.join(carla_base_dir, "PythonAPI", "util", "config.py")
 
-sumo_base_dir = os.path.join(carla_base_dir, "Co-Simulation", "Sumo")
-
-maps = {
-    "Town01": "{}.sumocfg".format(os.path.join(sumo_base_dir, "examples", "Town01")),
-    "Town04": "{}.sumocfg".format(os.path.join(sumo_base_dir, "examples", "Town04")),
-    "Town05": "{}.sumocfg".format(os.path.join(sumo_base_dir, "examples", "Town05"))
-}
-
 information_frequency = ["minimum", "average", "maximum"]
 information_relevance = ["unimportant", "neutral", "important"]
 
-# Full SUMO type IDs
-vehicle_type_full = [
-    "vehicle.audi.a2", "vehicle.audi.tt",
-    "vehicle.chevrolet.impala", "vehicle.mini.cooper_s",
-    "vehicle.mercedes.coupe", "vehicle.bmw.grandtourer",
-    "vehicle.citroen.c3", "vehicle.ford.mustang",
-    "vehicle.volkswagen.t2", "vehicle.lincoln.mkz_2017",
-    "vehicle.seat.leon"
-]
-
-# Dictionary: short UI name -> full "vehicle.xxx"
-vehicle_ui_map = {
-    vt.replace("vehicle.", ""): vt for vt in vehicle_type_full
-}
 available_vehicle_types = list(vehicle_ui_map.keys())
 all_vehicle_types = available_vehicle_types[:]
 
-vtypes_xml_path = os.path.join(sumo_base_dir, "examples", "carlavtypes.rou.xml")
-
-# Base definition for "HUD-less" car
-base_frame = {
-    'HUDname': "HUD-less car",
-    'entry': 5,
-    'brightness_var': 0.4,   # numeric brightness
-    'frequency_var': "none",
-    'relevance_var': "none",
-    'fov_var': 60.0,         # numeric FoV
-    'vehicle_type': "vehicle.nissan.patrol",
-    'hud_id': "999"
-}
-
-# Used at runtime for mapping each SUMO vehicle ID -> custom vehicle type
-vehicle_type_mapping = {}
-
-hud_id_mapping = {}
-hud_data = {}
 hud_frames = []
-string_hud_frames = []
 checkbox_vars = []
 next_hud_id = 1
 
+# Worker thread of the running simulation, its progress messages and cancel flag
+simulation_thread = None
+simulation_queue = queue.Queue()
+cancel_event = threading.Event()
+PROGRESS_POLL_MS = 200
+
+# Choices of the recording interval in the Settings tab, in seconds of simulated time
+RECORDING_INTERVALS = {"every step": None, "0.5 s": 0.5, "1 s": 1.0, "5 s": 5.0}
+
 # -----------------------------------------------------------------------
 #                           Tooltip Class
 # -----------------------------------------------------------------------
@@ -172,308 +139,6 @@ def convert_hudFrames():
         string_hud_frames.append(hud_dict)
     print("Converted hud_frames => string_hud_frames:", string_hud_frames)
 
-# -----------------------------------------------------------------------
-# run_simulation
-# -----------------------------------------------------------------------
-def run_simulation(map_name):
-    """
-    Start SUMO with FCD-output, run step-by-step, adjusting minGap, collecting data.
-    """
-    now = datetime.now()
-    timestamp = now.strftime("%H-%M-%S_%Y-%m-%d")
-    fcd_filename = f'Simulation_data/{map_name}_{timestamp}_fcd_data.xml'
-
-    path = os.path.join(sumo_base_dir, "examples", map_name + ".sumocfg")
-    traci.start(["sumo", "-c", path, '--fcd-output', fcd_filename])
-
-    simulation_data = []
-
-    min_gap_mapping = {}
-    for vehicle_type, data in hud_data.items():
-        mg = data.get("min_Gap", 1.0)
-        min_gap_mapping[vehicle_type] = mg
-
-    while traci.simulation.getMinExpectedNumber() > 0:
-        traci.simulationStep()
-
-        for vehicle_id in traci.vehicle.getIDList():
-            current_gap = traci.vehicle.getMinGap(vehicle_id)
-            current_speed = traci.vehicle.getSpeed(vehicle_id) * 3.6
-            position = traci.vehicle.getPosition(vehicle_id)
-            current_acceleration = traci.vehicle.getAcceleration(vehicle_id)
-            distance_traveled = traci.vehicle.getDistance(vehicle_id)
-            time_loss = traci.vehicle.getTimeLoss(vehicle_id)
-            simTime = traci.simulation.getTime()
-
-            simulation_data.append([
-                vehicle_id,
-                simTime,
-                position[0],
-                position[1],
-                current_speed,
-                current_gap,
-                current_acceleration,
-                distance_traveled,
-                time_loss
-            ])
-
-            vtype_for_vehicle = vehicle_type_mapping.get(vehicle_id, "unknown")
-            min_gap_for_type = hud_data.get(vtype_for_vehicle, {}).get("min_Gap", 1)
-            new_min_gap = max(2.0, (current_speed * 0.5 * min_gap_for_type))
-            traci.vehicle.setMinGap(vehicle_id, new_min_gap)
-
-    traci.close()
-    save_simulation_data(simulation_data, map_name, timestamp)
-
-def save_simulation_data(simulation_data, map_name, timestamp):
-    """
-    Save relevant data to CSV, depending on checkboxes.
-    """
-    if not simulation_data or not isinstance(simulation_data, list):
-        print("No simulation data available!")
-        return
-
-    if not any(var.get() for var in checkbox_vars):
-        print("No simulation data will be saved!")
-        return
-
-    fieldnames = []
-    if checkbox_vars[0].get(): fieldnames.append('map')
-    if checkbox_vars[1].get(): fieldnames.append('vehicle_id')
-    if checkbox_vars[2].get(): fieldnames.append('hud_id')
-    if checkbox_vars[3].get(): fieldnames.append('simulation_time')
-    if checkbox_vars[4].get(): fieldnames.append('vehicle_type')
-    if checkbox_vars[5].get(): fieldnames.append('position_x')
-    if checkbox_vars[6].get(): fieldnames.append('position_y')
-    if checkbox_vars[7].get(): fieldnames.append('current_speed')
-    if checkbox_vars[8].get(): fieldnames.append('current_gap')
-    if checkbox_vars[9].get(): fieldnames.append('current_acceleration')
-    if checkbox_vars[10].get(): fieldnames.append('distance_traveled')
-    if checkbox_vars[11].get(): fieldnames.append('time_loss')
-    if checkbox_vars[12].get(): fieldnames.append('maxSpeed')
-    if checkbox_vars[13].get(): fieldnames.append('speedAdherenceFactor')
-    if checkbox_vars[14].get(): fieldnames.append('reactionTime')
-    if checkbox_vars[15].get(): fieldnames.append('fatiguenessLevel')
-    if checkbox_vars[16].get(): fieldnames.append('awarenessLevel')
-    if checkbox_vars[17].get(): fieldnames.append('acceleration')
-    if checkbox_vars[18].get(): fieldnames.append('minGapFactor')
-    if checkbox_vars[19].get(): fieldnames.append('distractionLevel')
-    if checkbox_vars[20].get(): fieldnames.append('brightness')
-    if checkbox_vars[21].get(): fieldnames.append('information_frequency')
-    if checkbox_vars[22].get(): fieldnames.append('information_relevance')
-    if checkbox_vars[23].get(): fieldnames.append('FoV')
-
-    csv_filename = f'Simulation_data/{map_name}_{timestamp}_simulation_data.csv'
-
-    with open(csv_filename, mode='w', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for entry in simulation_data:
-            row_data = {}
-            vtype = vehicle_type_mapping.get(entry[0], "unknown")
-            hud_data_for_type = hud_data.get(vtype, {})
-
-            hud_name = hud_data_for_type.get('HUDname', 'N/A')
-            hud_id_val = hud_id_mapping.get(vtype, "unknown")
-            idName = f"{hud_id_val}_{hud_name}"
-
-            if checkbox_vars[0].get():  row_data['map'] = map_name
-            if checkbox_vars[1].get():  row_data['vehicle_id'] = entry[0]
-            if checkbox_vars[2].get():  row_data['hud_id'] = idName
-            if checkbox_vars[3].get():  row_data['simulation_time'] = entry[1]
-            if checkbox_vars[4].get():  row_data['vehicle_type'] = vtype
-            if checkbox_vars[5].get():  row_data['position_x'] = entry[2]
-            if checkbox_vars[6].get():  row_data['position_y'] = entry[3]
-            if checkbox_vars[7].get():  row_data['current_speed'] = entry[4]
-            if checkbox_vars[8].get():  row_data['current_gap'] = entry[5]
-            if checkbox_vars[9].get():  row_data['current_acceleration'] = entry[6]
-            if checkbox_vars[10].get(): row_data['distance_traveled'] = entry[7]
-            if checkbox_vars[11].get(): row_data['time_loss'] = entry[8]
-            if checkbox_vars[12].get(): row_data['maxSpeed'] = hud_data_for_type.get('max_speed', 'N/A')
-            if checkbox_vars[13].get(): row_data['speedAdherenceFactor'] = hud_data_for_type.get('speed_factor', 'N/A')
-            if checkbox_vars[14].get(): row_data['reactionTime'] = hud_data_for_type.get('reactTime', 'N/A')
-            if checkbox_vars[15].get(): row_data['fatiguenessLevel'] = hud_data_for_type.get('fatigueness_level', 'N/A')
-            if checkbox_vars[16].get(): row_data['awarenessLevel'] = hud_data_for_type.get('awareness_level', 'N/A')
-            if checkbox_vars[17].get(): row_data['acceleration'] = hud_data_for_type.get('accel_factor', 'N/A')
-            if checkbox_vars[18].get(): row_data['minGapFactor'] = hud_data_for_type.get('min_Gap', 'N/A')
-            if checkbox_vars[19].get(): row_data['distractionLevel'] = hud_data_for_type.get('distraction_level', 'N/A')
-            if checkbox_vars[20].get(): row_data['brightness'] = hud_data_for_type.get('brightness', 'N/A')
-            if checkbox_vars[21].get(): row_data['information_frequency'] = hud_data_for_type.get('frequency', 'N/A')
-            if checkbox_vars[22].get(): row_data['information_relevance'] = hud_data_for_type.get('relevance', 'N/A')
-            if checkbox_vars[23].get(): row_data['FoV'] = hud_data_for_type.get('field of view', 'N/A')
-
-            writer.writerow(row_data)
-
-# -----------------------------------------------------------------------
-# hudSelection
-# -----------------------------------------------------------------------
-def hudSelection():
-    """
-    Convert the user selections to numeric brightness/fov, then call calculations
-    to build the hud_data dict for each vehicle type.
-    Now returns hud_data, avoiding a NoneType return.
-    """
-    global hud_data
-    hud_data.clear()
-
-    for hud in string_hud_frames:
-        brightness_str = hud['brightness_var']
-        frequency_str = hud['frequency_var']
-        relevance_str = hud['relevance_var']
-        fov_str = hud['fov_var']
-        vehicle_type = hud['vehicle_type']
-        HUDname = hud['HUDname']
-
-        try:
-            brightness_val = float(brightness_str)
-        except ValueError:
-            brightness_val = 0.4
-
-        try:
-            fov_val = float(fov_str)
-        except ValueError:
-            fov_val = 60.0
-
-        # Example: calling calculations from your 'calculations' module:
-        distraction_level = calculations.calc_distraction(relevance_str, frequency_str, brightness_val, fov_val)
-        fatigueness_level = calculations.calc_fatigueness(relevance_str, frequency_str, brightness_val)
-        awareness_level   = calculations.calc_awareness(relevance_str, frequency_str, distraction_level, fatigueness_level, fov_val)
-        reactTime         = calculations.calc_ReactTime(distraction_level, fatigueness_level, awareness_level)
-        maxSpeed          = calculations.calc_MaxSpeed(awareness_level, fatigueness_level, distraction_level, frequency_str)
-        minGap            = calculations.calc_MinGap(distraction_level, fatigueness_level, awareness_level, fov_val)
-        speedFactor       = calculations.calc_SpeedAd(fov_val, distraction_level, fatigueness_level, awareness_level, relevance_str, frequency_str)
-        accel             = calculations.calc_acceleration(fatigueness_level, distraction_level, awareness_level, relevance_str)
-
-        hud_data[vehicle_type] = {
-            'HUDname':           HUDname,
-            'distraction_level': distraction_level,
-            'fatigueness_level': fatigueness_level,
-            'awareness_level':   awareness_level,
-            'reactTime':         reactTime,
-            'max_speed':         maxSpeed,
-            "min_Gap":           minGap,
-            'speed_factor':      speedFactor,
-            'accel_factor':      accel,
-            'brightness':        brightness_val,
-            'frequency':         frequency_str,
-            'relevance':         relevance_str,
-            'field of view':     fov_val
-        }
-    print("hud_data built =>", hud_data)
-    return hud_data
-
-def update_vehicles(xml_file_path, local_data):
-    """
-    Updates the vehicle types in the .rou.xml with new behaviors (maxSpeed, etc.).
-    """
-    tree = ET.parse(xml_file_path)
-    root = tree.getroot()
-
-    for vehicle_type, data in local_data.items():
-        if vehicle_type.lower() == "vehicle.nissan.patrol":
-            continue
-
-        max_speed     = data['max_speed']
-        speedFactor   = data.get('speed_factor', '')
-        reactionTime  = data.get('reactTime')
-        accelFactor   = data.get('accel_factor')
-
-        for vtype_elem in root.findall('vType'):
-            vtype_id = vtype_elem.get('id')
-            if vtype_id == vehicle_type:
-                vtype_elem.set('maxSpeed', str(max_speed))
-                vtype_elem.set('speedFactor', str(speedFactor))
-                vtype_elem.set('accel', str(accelFactor))
-
-                driverstate_params = vtype_elem.findall("./param[@key='has.driverstate.device']")
-                if driverstate_params:
-                    driverstate_params[0].set('value', 'true')
-                else:
-                    driverstate_param1 = ET.SubElement(vtype_elem, 'param')
-                    driverstate_param1.set('key', 'has.driverstate.device')
-                    driverstate_param1.set('value', 'true')
-
-                reaction_time_params = vtype_elem.findall("./param[@key='actionStepLength']")
-                if reaction_time_params:
-                    reaction_time_params[0].set('value', str(reactionTime))
-                else:
-                    driverstate_param2 = ET.SubElement(vtype_elem, 'param')
-                    driverstate_param2.set('key', 'actionStepLength')
-                    driverstate_param2.set('value', str(reactionTime))
-
-                color = "#{:02x}{:02x}{:02x}".format(random.randint(0,255), random.randint(0,255), random.randint(0,255))
-                vtype_elem.set('color', color)
-
-    tree.write(xml_file_path, encoding='utf-8', xml_declaration=True)
-
-def modify_vehicle_routes(map_name):
-    """
-    Adjust the vehicle types in the .rou file by user-defined probabilities.
-    Also fallback if we get 'vehicle.unknown'.
-    """
-    original_routes_file = os.path.join(sumo_base_dir, "examples", "rou", map_name + ".rou.xml")
-    try:
-        tree = ET.parse(original_routes_file)
-        root = tree.getroot()
-
-        vehicle_types = []
-        probabilities = []
-        for hud in string_hud_frames:
-            probability = int(hud['entry'])
-            short_vtype = hud['vehicle_type']
-            # lookup in dictionary. If not found, fallback to 'vehicle.unknown'
-            full_vtype = vehicle_ui_map.get(short_vtype, "vehicle.unknown")
-            vehicle_types.append(full_vtype)
-            probabilities.append(probability)
-
-        for vehicle in root.findall('vehicle'):
-            if vehicle_types:
-                vehicle_id = vehicle.get('id')
-                chosen_type = random.choices(vehicle_types, probabilities)[0]
-                # fallback if still vehicle.unknown
-                if chosen_type == "vehicle.unknown":
-                    # pick a known fallback, e.g. 'vehicle.audi.a2'
-                    chosen_type = "vehicle.audi.a2"
-                vehicle.set('type', chosen_type)
-                vehicle_type_mapping[vehicle_id] = chosen_type
-
-        tree.write(original_routes_file)
-    except FileNotFoundError:
-        print(f"Couldn't find: {original_routes_file}")
-
-def writeXML(hud_list):
-    """
-    Writes hudconfig.xml for the spectator client, storing user-chosen strings.
-    """
-    root = ET.Element("Vehicles")
-
-    for hud in hud_list:
-        vehicle_type = hud['vehicle_type']
-        brightness_str = hud['brightness_var']
-        frequency = hud['frequency_var']
-        relevance = hud['relevance_var']
-        fov_str = hud['fov_var']
-        hud_name = hud['HUDname']
-
-        vehicle_element = ET.SubElement(root, "Vehicle", type_id=vehicle_type)
-        ET.SubElement(vehicle_element, "HUDName").text = hud_name
-        ET.SubElement(vehicle_element, "Brightness").text = brightness_str
-        ET.SubElement(vehicle_element, "Frequency").text = frequency
-        ET.SubElement(vehicle_element, "Relevance").text = relevance
-        ET.SubElement(vehicle_element, "FoV").text = fov_str
-
-    tree = ET.ElementTree(root)
-    xml_file_path = "hudconfig.xml"
-    tree.write(xml_file_path, encoding="utf-8", xml_declaration=True)
-
-    dom = minidom.parseString(ET.tostring(root))
-    pretty_xml = dom.toprettyxml()
-    with open(xml_file_path, "w") as f:
-        f.write(pretty_xml)
-
-    return xml_file_path
-
 def start_sumo(selected_sumocfg):
     """
     Start SUMO with GUI if present.
@@ -483,20 +148,16 @@ def start_sumo(selected_sumocfg):
     except FileNotFoundError:
         print("Couldn't start SUMO. Please check if your SUMO path is correct.")
 
-def map_vehicle_type_to_hud_id():
-    """
-    For each HUD in string_hud_frames, map the SUMO vType to the hud_id in hud_id_mapping.
-    """
-    hud_id_mapping.clear()
-    for hud in string_hud_frames:
-        vehicle_type = hud['vehicle_type']
-        hud_id = hud['hud_id']
-        hud_id_mapping[vehicle_type] = hud_id
-
 def start_simulation():
     """
     Combine all logic to start the sim. Co-Simulation with Carla or SUMO only.
+    The widget state is read here; the simulation itself runs on a worker thread,
+    so the GUI stays responsive and shows the progress.
     """
+    if simulation_thread is not None and simulation_thread.is_alive():
+        messagebox.showwarning("Simulation running", "Please wait for the running simulation to finish or cancel it.")
+        return
+
     if not map_list.curselection():
         messagebox.showwarning("No map selected", "Please select a map for the simulation.")
         return
@@ -509,6 +170,12 @@ def start_simulation():
         messagebox.showwarning("No simulation data", "Please allow simulation without HUD or create HUDs to simulate.")
         return
 
+    seed_text = seed_var.get().strip()
+    if seed_text and not seed_text.isdigit():
+        messagebox.showwarning("Invalid seed", "Please enter an integer >= 0 as random seed or leave it empty.")
+        return
+    seed = int(seed_text) if seed_text else None
+
     selected_index = map_list.curselection()
     # Convert frames => string-based data
     convert_hudFrames()
@@ -518,87 +185,189 @@ def start_simulation():
         string_hud_frames.append(base_frame)
         hud_id_mapping["vehicle.nissan.patrol"] = "999"
 
-    # build hud_id_mapping from string_hud_frames
-    map_vehicle_type_to_hud_id()
-    # build hud_data with calculations (IMPORTANT: must return hud_data)
-    local_data = hudSelection()  
-    # update .rou.xml for new behaviors
-    update_vehicles(vtypes_xml_path, local_data)
+    selected_map = map_list.get(selected_index[0]) if selected_index else None
+    selected_columns = [var.get() for var in checkbox_vars]
+    recording_policy = RecordingPolicy(interval=RECORDING_INTERVALS[recording_interval_var.get()])
+    start_simulation_thread(
+        selected_map, selected_columns, output_format_var.get(),
+        simulate_var.get(), spectate_var.get(), headless_var.get(), recording_policy, output_mode_var.get(), seed
+    )
 
-    if selected_index:
-        selected_map = map_list.get(selected_index[0])
-        # e.g., write an XML for spectator
-        writeXML(string_hud_frames)
-        # modify routes
-        modify_vehicle_routes(selected_map)
+def start_simulation_thread(*pipeline_args):
+    global simulation_thread
+    cancel_event.clear()
+    simulation_thread = threading.Thread(target=simulation_worker, args=pipeline_args, daemon=True)
+    simulation_thread.start()
+
+    btn_start.config(state="disabled")
+    btn_cancel.config(state="normal")
+    progress_label.config(text="Starting simulation...")
+    root.after(PROGRESS_POLL_MS, poll_simulation_progress)
+
+def simulation_worker(*pipeline_args):
+    """Run the simulation pipeline on the worker thread and report the result to the GUI."""
+    try:
+        run_simulation_pipeline(*pipeline_args)
+        if cancel_event.is_set():
+            simulation_queue.put(("done", "Simulation cancelled, recorded data was saved."))
+        else:
+            simulation_queue.put(("done", "Simulation finished."))
+    except Exception as e:
+        print("Simulation failed:", e)
+        simulation_queue.put(("done", f"Simulation failed: {e}"))
+
+def cancel_simulation():
+    """Ask the worker thread to stop; it closes TraCI and flushes the recorded data."""
+    cancel_event.set()
+    btn_cancel.config(state="disabled")
+    progress_label.config(text="Cancelling simulation...")
+
+def poll_simulation_progress():
+    """Show the progress reported by the worker thread; re-schedules itself until the run is done."""
+    done_message = None
+    progress = None
+    while True:
+        try:
+            kind, payload = simulation_queue.get_nowait()
+        except queue.Empty:
+            break
+        if kind == "progress":
+            progress = payload
+        else:
+            done_message = payload
+
+    if progress is not None and done_message is None:
+        elapsed = int(progress['elapsed'])
+        progress_label.config(text=(
+            f"Step {progress['step']}  |  sim time {progress['sim_time']:.0f} s\n"
+            f"{progress['steps_per_second']:.1f} steps/s  |  {progress['vehicles']} vehicles\n"
+            f"{progress['min_gap_writes_avoided']} setMinGap calls avoided\n"
+            f"elapsed {elapsed // 60:02d}:{elapsed % 60:02d}"
+        ))
+
+    if done_message is not None:
+        progress_label.config(text=done_message)
+        btn_start.config(state="normal")
+        btn_cancel.config(state="disabled")
+    else:
+        root.after(PROGRESS_POLL_MS, poll_simulation_progress)
+
+def wait_for_carla(startup_timer):
+    """
+    Wait until the CARLA RPC port accepts connections, instead of a fixed delay.
+    Returns False if the run was cancelled meanwhile.
+    Raises RuntimeError if CARLA did not get ready within config.startup_timeout.
+    """
+    print(f"Waiting for CARLA on port {config.carla_port}...")
+    if wait_for_port("127.0.0.1", config.carla_port, config.startup_timeout, cancel_event=cancel_event):
+        startup_timer.mark("CARLA ready")
+        return True
+    if cancel_event.is_set():
+        return False
+    raise RuntimeError(f"CARLA did not accept connections on port {config.carla_port} within {config.startup_timeout} s")
+
+def run_simulation_pipeline(selected_map, selected_columns, output_format, simulate, spectate, headless,
+                            recording_policy=None, output_mode="both", seed=None):
+    """
+    Prepare the HUD data, vehicle types and routes and start the selected components.
+    seed selects the scenario files (see prepare_scenario); without one, a new seed is drawn.
+    Runs on the worker thread and must not touch any Tk widget.
+    Raises RuntimeError if the simulation could not be started; returns early if the run
+    was cancelled while waiting for CARLA.
+    """
+    startup_timer = StartupTimer()
+    route_files = None
+
+    def run_configured(backend="traci"):
+        run_simulation(
+            selected_map, selected_columns, output_format, backend=backend, route_files=route_files, seed=seed,
+            progress_queue=simulation_queue, cancel_event=cancel_event, startup_timer=startup_timer,
+            recording_policy=recording_policy, output_mode=output_mode
+        )
+
+    if selected_map:
+        # hud_data, vType and route files with the HUD behaviors, hudconfig.xml for the spectator
+        # and a .sumocfg loading them; reused if this configuration was simulated before
+        try:
+            scenario = prepare_scenario(selected_map, seed)
+        except FileNotFoundError as e:
+            raise RuntimeError(f"Couldn't prepare the scenario files: {e}") from e
+        route_files = [scenario.vtypes_file, scenario.routes_file]
+        seed = scenario.seed
+        startup_timer.mark("scenario files")
 
         carla_exe = os.path.join(carla_base_dir, "CarlaUE4.exe")
 
-        if spectate_var.get() and simulate_var.get() == False:
+        if spectate and simulate == False:
             # Carla in RenderOffScreenMode
             try:
                 print("Starting CARLA in RenderOffScreenMode")
                 subprocess.Popen([carla_exe, "-RenderOffScreen"])
-                time.sleep(20)
+                if not wait_for_carla(startup_timer):
+                    return
                 print("Running config script:", config_script)
                 config_command = ["python", config_script, "--map", selected_map]
                 configsubprocess = subprocess.Popen(config_command, cwd=os.path.dirname(config_script))
                 configsubprocess.wait()
+                startup_timer.mark("config script")
 
                 sync_script = os.path.join(sumo_base_dir, "run_synchronization.py")
-                print("Starting synchronization script with SUMO:", maps[selected_map])
-                sync_command = ["python", sync_script, maps[selected_map], "--sumo-gui", "--sync-vehicle-color"]
+                print("Starting synchronization script with SUMO:", scenario.sumocfg)
+                sync_command = ["python", sync_script, scenario.sumocfg, "--sumo-gui", "--sync-vehicle-color"]
                 subprocess.Popen(sync_command, cwd=os.path.dirname(sync_script))
 
                 try:
                     print("Starting spectator")
                     spectatorpath = "./spectator.py"
-                    spectatordir = os.path.dirname(spectatorpath)
-                    subprocess.Popen(["python", spectatorpath, spectatordir])
+                    subprocess.Popen(["python", spectatorpath, scenario.hud_config])
                     print("Spectator started")
                 except FileNotFoundError as e:
                     print("Couldn't start the spectator:", e)
 
-                run_simulation(selected_map)
+                run_configured()
 
             except FileNotFoundError as e:
-                print("Couldn't start the simulation:", e)
+                raise RuntimeError(f"Couldn't start the simulation: {e}") from e
 
-        elif simulate_var.get():
+        elif simulate:
             try:
                 print("Starting CarlaUE4.exe...")
                 subprocess.Popen([carla_exe])
-                time.sleep(20)
+                if not wait_for_carla(startup_timer):
+                    return
                 print("Running config script:", config_script)
                 config_command = ["python", config_script, "--map", selected_map]
                 configsubprocess = subprocess.Popen(config_command, cwd=os.path.dirname(config_script))
                 configsubprocess.wait()
+                startup_timer.mark("config script")
 
                 sync_script = os.path.join(sumo_base_dir, "run_synchronization.py")
-                print("Starting synchronization script with SUMO:", maps[selected_map])
-                sync_command = ["python", sync_script, maps[selected_map], "--sumo-gui", "--sync-vehicle-color"]
+                print("Starting synchronization script with SUMO:", scenario.sumocfg)
+                sync_command = ["python", sync_script, scenario.sumocfg, "--sumo-gui", "--sync-vehicle-color"]
                 subprocess.Popen(sync_command, cwd=os.path.dirname(sync_script))
 
-                if spectate_var.get():
+                if spectate:
                     try:
                         print("Starting spectator")
                         spectatorpath = "./spectator.py"
-                        spectatordir = os.path.dirname(spectatorpath)
-                        subprocess.Popen(["python", spectatorpath, spectatordir])
+                        subprocess.Popen(["python", spectatorpath, scenario.hud_config])
                         print("Spectator started")
                     except FileNotFoundError as e:
                         print("Couldn't start the spectator:", e)
 
-                run_simulation(selected_map)
+                run_configured()
 
             except FileNotFoundError as e:
-                print("Couldn't start the simulation:", e)
+                raise RuntimeError(f"Couldn't start the simulation: {e}") from e
+
+        elif headless:
+            # SUMO only, stepped in-process without GUI
+            run_configured(backend="libsumo")
 
         else:
             # SUMO only
-            start_sumo_config = maps[selected_map]
-            start_sumo(start_sumo_config)
-            run_simulation(selected_map)
+            start_sumo(scenario.sumocfg)
+            run_configured()
 
 def create_hud_frame(hud_id):
     """
@@ -773,6 +542,10 @@ def remove_hud(hud_id):
         print(f"No HUD found with ID: {hud_id}")
 
 def close_window():
+    if simulation_thread is not None and simulation_thread.is_alive():
+        # Let the worker close TraCI and flush the recorded data before exiting
+        cancel_event.set()
+        simulation_thread.join(timeout=10)
     root.quit()
 
 root = tk.Tk()
@@ -849,6 +622,16 @@ hudless_cb = tk.Checkbutton(
 )
 hudless_cb.pack(pady=5)
 
+headless_var = tk.BooleanVar()
+headless_cb = tk.Checkbutton(
+    top_controls_frame,
+    text="Run SUMO-only simulations headless (libsumo, no SUMO GUI)",
+    variable=headless_var,
+    font=("Helvetica", 12),
+    bg="#f0f0f0"
+)
+headless_cb.pack(pady=5)
+
 # below that: row=1 => hud_list_frame + buttons_frame
 hud_list_frame = tk.Frame(main_frame, bg="white", bd=2, relief="sunken")
 hud_list_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
@@ -864,34 +647,24 @@ btn_start = tk.Button(buttons_frame, text="Start simulation", command=start_simu
                       bg="#32cd32", fg="white", width=15, font=("Helvetica", 10))
 btn_start.pack(pady=5)
 
+btn_cancel = tk.Button(buttons_frame, text="Cancel simulation", command=cancel_simulation, state="disabled",
+                       bg="#ff6347", fg="white", width=15, font=("Helvetica", 10))
+btn_cancel.pack(pady=5)
+
+progress_label = tk.Label(buttons_frame, text="", bg="#f0f0f0", font=("Helvetica", 9), justify="left")
+progress_label.pack(pady=5)
+
 btn_close = tk.Button(buttons_frame, text="Close", command=close_window,
                       bg="#a9a9a9", fg="white", width=15, font=("Helvetica", 10))
 btn_close.pack(pady=5)
 
 # ======================= SETTINGS TAB =====================
+# The Settings and Help tabs are only built when they are first selected,
+# the variables they show are created right away so that a simulation can be
+# started without ever opening them.
 settings_tab = ttk.Frame(notebook)
 notebook.add(settings_tab, text="Settings")
 
-set_canvas = tk.Canvas(settings_tab, bg="white", highlightthickness=0)
-set_scroll = ttk.Scrollbar(settings_tab, orient="vertical", command=set_canvas.yview)
-set_frame = tk.Frame(set_canvas, bg="white")
-
-def set_configure(e):
-    set_canvas.configure(scrollregion=set_canvas.bbox("all"))
-
-set_frame.bind("<Configure>", set_configure)
-set_canvas.create_window((0,0), window=set_frame, anchor="nw")
-set_canvas.configure(yscrollcommand=set_scroll.set)
-set_canvas.pack(side="left", fill="both", expand=True)
-set_scroll.pack(side="right", fill="y")
-
-intro_label = tk.Label(
-    set_frame,
-    text="Here you can enable or disable which data is saved to the CSV.",
-    font=("Arial", 12), bg="white"
-)
-intro_label.grid(row=0, column=0, padx=10, pady=10, sticky="w")
-
 checkbox_texts = [
     "Enable saving the map name:",
     "Enable saving the vehicle_id:",
@@ -919,55 +692,120 @@ checkbox_texts = [
     "Enable saving the selected FoV:"
 ]
 
-for i, text in enumerate(checkbox_texts, start=1):
-    lbl = tk.Label(set_frame, text=text, bg="white", font=("Helvetica", 10))
-    lbl.grid(row=i, column=0, padx=10, pady=5, sticky="w")
-    var = tk.BooleanVar(value=True)
-    cb = ttk.Checkbutton(set_frame, variable=var)
-    cb.grid(row=i, column=1, padx=5, pady=5, sticky="w")
-    checkbox_vars.append(var)
+for _ in checkbox_texts:
+    checkbox_vars.append(tk.BooleanVar(value=True))
+output_format_var = tk.StringVar(value="csv")
+recording_interval_var = tk.StringVar(value="every step")
+output_mode_var = tk.StringVar(value="both")
+seed_var = tk.StringVar(value="")
+
+def build_settings_tab():
+    set_canvas = tk.Canvas(settings_tab, bg="white", highlightthickness=0)
+    set_scroll = ttk.Scrollbar(settings_tab, orient="vertical", command=set_canvas.yview)
+    set_frame = tk.Frame(set_canvas, bg="white")
+
+    def set_configure(e):
+        set_canvas.configure(scrollregion=set_canvas.bbox("all"))
+
+    set_frame.bind("<Configure>", set_configure)
+    set_canvas.create_window((0,0), window=set_frame, anchor="nw")
+    set_canvas.configure(yscrollcommand=set_scroll.set)
+    set_canvas.pack(side="left", fill="both", expand=True)
+    set_scroll.pack(side="right", fill="y")
+
+    intro_label = tk.Label(
+        set_frame,
+        text="Here you can enable or disable which data is saved and choose the output file format\n"
+             "and how often the data is recorded.",
+        font=("Arial", 12), bg="white", justify="left"
+    )
+    intro_label.grid(row=0, column=0, padx=10, pady=10, sticky="w")
+
+    for i, text in enumerate(checkbox_texts, start=1):
+        lbl = tk.Label(set_frame, text=text, bg="white", font=("Helvetica", 10))
+        lbl.grid(row=i, column=0, padx=10, pady=5, sticky="w")
+        cb = ttk.Checkbutton(set_frame, variable=checkbox_vars[i - 1])
+        cb.grid(row=i, column=1, padx=5, pady=5, sticky="w")
+
+    output_format_row = len(checkbox_texts) + 1
+    output_format_lbl = tk.Label(set_frame, text="Output file format:", bg="white", font=("Helvetica", 10))
+    output_format_lbl.grid(row=output_format_row, column=0, padx=10, pady=5, sticky="w")
+    output_format_menu = ttk.Combobox(set_frame, textvariable=output_format_var, values=data_output.OUTPUT_FORMATS,
+                                      state="readonly", width=10, font=("Helvetica", 10))
+    output_format_menu.grid(row=output_format_row, column=1, padx=5, pady=5, sticky="w")
+
+    recording_interval_lbl = tk.Label(set_frame, text="Record data every:", bg="white", font=("Helvetica", 10))
+    recording_interval_lbl.grid(row=output_format_row + 1, column=0, padx=10, pady=5, sticky="w")
+    recording_interval_menu = ttk.Combobox(set_frame, textvariable=recording_interval_var,
+                                           values=list(RECORDING_INTERVALS), state="readonly", width=10,
+                                           font=("Helvetica", 10))
+    recording_interval_menu.grid(row=output_format_row + 1, column=1, padx=5, pady=5, sticky="w")
+
+    output_mode_lbl = tk.Label(set_frame, text="Save data via (TraCI columns, SUMO FCD output or both):",
+                               bg="white", font=("Helvetica", 10))
+    output_mode_lbl.grid(row=output_format_row + 2, column=0, padx=10, pady=5, sticky="w")
+    output_mode_menu = ttk.Combobox(set_frame, textvariable=output_mode_var, values=OUTPUT_MODES,
+                                    state="readonly", width=10, font=("Helvetica", 10))
+    output_mode_menu.grid(row=output_format_row + 2, column=1, padx=5, pady=5, sticky="w")
+
+    seed_lbl = tk.Label(set_frame, text="Random seed of the vehicle types (empty: new types every run):",
+                        bg="white", font=("Helvetica", 10))
+    seed_lbl.grid(row=output_format_row + 3, column=0, padx=10, pady=5, sticky="w")
+    seed_entry = tk.Entry(set_frame, textvariable=seed_var, width=12, font=("Helvetica", 10))
+    seed_entry.grid(row=output_format_row + 3, column=1, padx=5, pady=5, sticky="w")
 
 # ======================== HELP TAB ========================
 help_tab = ttk.Frame(notebook)
 notebook.add(help_tab, text="Help")
 
-help_canvas = tk.Canvas(help_tab, bg="white", highlightthickness=0)
-help_scroll = ttk.Scrollbar(help_tab, orient="vertical", command=help_canvas.yview)
-help_frame = tk.Frame(help_canvas, bg="white")
-
-def help_configure(e):
-    help_canvas.configure(scrollregion=help_canvas.bbox("all"))
-
-help_frame.bind("<Configure>", help_configure)
-help_canvas.create_window((0,0), window=help_frame, anchor="nw")
-help_canvas.configure(yscrollcommand=help_scroll.set)
-help_canvas.pack(side="left", fill="both", expand=True)
-help_scroll.pack(side="right", fill="y")
-
-help_text = tk.Label(
-    help_frame,
-    text=(
-        "HELP PAGE\n\n"
-        "1. Use 'Add HUD' to create new HUD configurations.\n"
-        "2. Adjust brightness and FoV via sliders (the current value is shown).\n"
-        "3. Probability sets how often that HUD is chosen.\n"
-        "4. Frequency and relevance control how/when info is displayed.\n"
-        "5. Start the simulation via 'Start simulation' on the main page.\n"
-        "6. Use the 'Settings' tab to control what data is saved.\n"
-        "Scroll if content is large."
-    ),
-    bg="white",
-    font=("Helvetica", 12),
-    wraplength=600,
-    justify="left"
-)
-help_text.pack(padx=10, pady=10, anchor="nw")
+def build_help_tab():
+    help_canvas = tk.Canvas(help_tab, bg="white", highlightthickness=0)
+    help_scroll = ttk.Scrollbar(help_tab, orient="vertical", command=help_canvas.yview)
+    help_frame = tk.Frame(help_canvas, bg="white")
+
+    def help_configure(e):
+        help_canvas.configure(scrollregion=help_canvas.bbox("all"))
+
+    help_frame.bind("<Configure>", help_configure)
+    help_canvas.create_window((0,0), window=help_frame, anchor="nw")
+    help_canvas.configure(yscrollcommand=help_scroll.set)
+    help_canvas.pack(side="left", fill="both", expand=True)
+    help_scroll.pack(side="right", fill="y")
+
+    help_text = tk.Label(
+        help_frame,
+        text=(
+            "HELP PAGE\n\n"
+            "1. Use 'Add HUD' to create new HUD configurations.\n"
+            "2. Adjust brightness and FoV via sliders (the current value is shown).\n"
+            "3. Probability sets how often that HUD is chosen.\n"
+            "4. Frequency and relevance control how/when info is displayed.\n"
+            "5. Start the simulation via 'Start simulation' on the main page.\n"
+            "6. Use the 'Settings' tab to control what data is saved.\n"
+            "Scroll if content is large."
+        ),
+        bg="white",
+        font=("Helvetica", 12),
+        wraplength=600,
+        justify="left"
+    )
+    help_text.pack(padx=10, pady=10, anchor="nw")
+
+lazy_tabs = {str(settings_tab): build_settings_tab, str(help_tab): build_help_tab}
+
+def on_tab_changed(event):
+    build_tab = lazy_tabs.pop(notebook.select(), None)
+    if build_tab:
+        build_tab()
+
+notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
 
 # Optionally create some default HUDs
 def create_default_huds():
     for _ in range(2):
         add_hud()
 
-create_default_huds()
+# Added once the window is shown
+root.after_idle(create_default_huds)
 
 root.mainloop()
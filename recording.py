@@ -0,0 +1,77 @@
+import math
+
+
+class RecordingPolicy:
+    """
+    Decides which samples run_simulation records, so that only the data needed
+    for the analysis is fetched from TraCI and stored.
+    All given conditions have to hold for a sample to be recorded:
+    - every_n_steps: only every Nth simulation step (1 = every step)
+    - interval: only the first step at or after each multiple of interval seconds of simulated time
+    - hud_types: only vehicles with one of these vehicle types (HUDs)
+    - speed_threshold / gap_threshold: event-triggered, only when the speed (km/h) or the gap (m)
+      changed by at least the threshold since the last recorded sample of the vehicle
+    The default policy records every vehicle at every step.
+    """
+    def __init__(self, every_n_steps=1, interval=None, hud_types=None, speed_threshold=None, gap_threshold=None):
+        if every_n_steps < 1:
+            raise ValueError("every_n_steps must be at least 1")
+        if interval is not None and interval <= 0:
+            raise ValueError("interval must be positive")
+        self.every_n_steps = every_n_steps
+        self.interval = interval
+        self.hud_types = set(hud_types) if hud_types else None
+        self.speed_threshold = speed_threshold
+        self.gap_threshold = gap_threshold
+        self.next_record_time = None
+
+        # Whether record_vehicle has to be called at all
+        self.filters_vehicles = self.hud_types is not None or self.event_triggered
+        # Recorded flag per HUD index of the registry (see bind), last entry for vehicles without HUD
+        self.recorded_huds = None
+
+    @property
+    def event_triggered(self):
+        return self.speed_threshold is not None or self.gap_threshold is not None
+
+    @property
+    def records_every_sample(self):
+        """Whether every vehicle is recorded at every step, i.e. nothing is ever skipped."""
+        return self.every_n_steps == 1 and self.interval is None and not self.filters_vehicles
+
+    def bind(self, registry):
+        """Resolve hud_types to the HUD indices of a vehicle_registry.VehicleRegistry."""
+        self.next_record_time = None
+        if self.hud_types is None:
+            self.recorded_huds = None
+        else:
+            self.recorded_huds = [vehicle_type in self.hud_types for vehicle_type in registry.hud_types] + [False]
+
+    def record_step(self, step, sim_time):
+        """Whether anything is recorded in this step."""
+        if step % self.every_n_steps:
+            return False
+        if self.interval is not None:
+            if self.next_record_time is not None and sim_time < self.next_record_time - 1e-9:
+                return False
+            self.next_record_time = (math.floor(sim_time / self.interval + 1e-9) + 1) * self.interval
+        return True
+
+    def record_vehicle(self, registry, slot, speed, gap):
+        """Whether the vehicle in slot is recorded in a recorded step; updates its event state."""
+        if self.recorded_huds is not None and not self.recorded_huds[registry.hud_index[slot]]:
+            return False
+        if not self.event_triggered:
+            return True
+
+        # nan (nothing recorded yet) never compares below the threshold
+        if self.speed_threshold is not None and not abs(speed - registry.last_recorded_speed[slot]) < self.speed_threshold:
+            changed = True
+        elif self.gap_threshold is not None and not abs(gap - registry.last_recorded_gap[slot]) < self.gap_threshold:
+            changed = True
+        else:
+            changed = False
+        if changed:
+            registry.last_recorded_speed[slot] = speed
+            registry.last_recorded_gap[slot] = gap
+        return changed
@@ -0,0 +1,94 @@
+import argparse
+import json
+import sys
+
+import data_output
+import simulation
+from recording import RecordingPolicy
+
+
+def load_hud_config(path):
+    """
+    Read a HUD configuration file: a JSON list of HUD objects with the fields
+    HUDname, entry, brightness_var, frequency_var, relevance_var, fov_var, vehicle_type and hud_id.
+    """
+    with open(path) as file:
+        huds = json.load(file)
+    if isinstance(huds, dict):
+        huds = huds.get('huds', [])
+
+    required = ['HUDname', 'entry', 'brightness_var', 'frequency_var', 'relevance_var', 'fov_var', 'vehicle_type', 'hud_id']
+    for hud in huds:
+        missing = [key for key in required if key not in hud]
+        if missing:
+            raise ValueError(f"HUD {hud.get('HUDname', '?')} is missing {', '.join(missing)}")
+    return huds
+
+
+def parse_columns(names):
+    """Turn a list of column names into the boolean selection used by run_simulation."""
+    unknown = [name for name in names if name not in data_output.COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return [column in names for column in data_output.COLUMNS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one HUD configuration without the GUI.")
+    parser.add_argument("hud_config", help="JSON file with the list of HUDs")
+    parser.add_argument("--map", required=True, choices=list(simulation.maps))
+    parser.add_argument("--columns", nargs="+", help="output columns (default: all)")
+    parser.add_argument("--seed", type=int, help="random seed for vehicle types and SUMO (default: drawn and printed)")
+    parser.add_argument("--output-format", default="csv", choices=data_output.OUTPUT_FORMATS)
+    parser.add_argument("--hudless", action="store_true", help="add the HUD-less baseline car")
+    parser.add_argument("--backend", default="traci", choices=["traci", "libsumo"])
+    parser.add_argument("--port", type=int, help="TraCI port (default: chosen by SUMO), only with --backend traci")
+    parser.add_argument("--scenario-cache", default=simulation.SCENARIO_CACHE_DIR,
+                        help="folder of the generated (and reused) scenario files")
+    parser.add_argument("--output-dir", default="Simulation_data")
+    parser.add_argument("--run-name", help="prefix of the output files (default: <map>_<timestamp>)")
+    parser.add_argument("--output-mode", default="both", choices=simulation.OUTPUT_MODES,
+                        help="save the selected columns via TraCI, SUMO's FCD output (.xml.gz), or both")
+    parser.add_argument("--fcd-attributes", nargs="+", help="vehicle attributes written to the FCD output (default: all)")
+    parser.add_argument("--fcd-period", type=float, help="write the FCD output every this many seconds")
+    recording = parser.add_argument_group("recording", "which samples are saved (default: every vehicle at every step)")
+    recording.add_argument("--every-n-steps", type=int, default=1, help="only record every Nth simulation step")
+    recording.add_argument("--record-interval", type=float, help="only record every this many seconds of simulated time")
+    recording.add_argument("--record-hud-types", nargs="+", help="only record vehicles of these vehicle types")
+    recording.add_argument("--speed-threshold", type=float,
+                           help="only record a vehicle once its speed changed by this many km/h")
+    recording.add_argument("--gap-threshold", type=float, help="only record a vehicle once its gap changed by this many m")
+    args = parser.parse_args()
+    if args.port is not None and args.backend == "libsumo":
+        parser.error("--port only applies to --backend traci, libsumo runs SUMO in-process")
+
+    try:
+        huds = load_hud_config(args.hud_config)
+        selected_columns = parse_columns(args.columns) if args.columns else [True] * len(data_output.COLUMNS)
+        hud_types = [simulation.vehicle_ui_map.get(v, v) for v in args.record_hud_types or []]
+        recording_policy = RecordingPolicy(
+            args.every_n_steps, args.record_interval, hud_types, args.speed_threshold, args.gap_threshold
+        )
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    if args.hudless:
+        huds.append(dict(simulation.base_frame))
+    if not huds:
+        parser.error("The HUD configuration is empty.")
+
+    data_file = simulation.run_headless(
+        huds, args.map, selected_columns, seed=args.seed, output_format=args.output_format, backend=args.backend,
+        cache_dir=args.scenario_cache, port=args.port, output_dir=args.output_dir, run_name=args.run_name,
+        recording_policy=recording_policy, output_mode=args.output_mode, fcd_attributes=args.fcd_attributes,
+        fcd_period=args.fcd_period
+    )
+    if not data_file:
+        print("Simulation produced no data.")
+        return 1
+    print(f"Simulation data written to {data_file}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,823 @@
+import hashlib
+import json
+import os
+import random
+import shutil
+import time
+import xml.etree.cElementTree as ET
+from collections import namedtuple
+from datetime import datetime
+
+import calculations
+import config
+import data_output
+from sumo_backend import load_sumo_backend
+from recording import RecordingPolicy
+from vehicle_registry import VehicleRegistry
+
+# -----------------------------------------------------------------------
+#                          Global / Config
+# -----------------------------------------------------------------------
+carla_base_dir = config.carla_base_dir
+
+sumo_base_dir = os.path.join(carla_base_dir, "Co-Simulation", "Sumo")
+
+maps = {
+    "Town01": "{}.sumocfg".format(os.path.join(sumo_base_dir, "examples", "Town01")),
+    "Town04": "{}.sumocfg".format(os.path.join(sumo_base_dir, "examples", "Town04")),
+    "Town05": "{}.sumocfg".format(os.path.join(sumo_base_dir, "examples", "Town05"))
+}
+
+# Full SUMO type IDs
+vehicle_type_full = [
+    "vehicle.audi.a2", "vehicle.audi.tt",
+    "vehicle.chevrolet.impala", "vehicle.mini.cooper_s",
+    "vehicle.mercedes.coupe", "vehicle.bmw.grandtourer",
+    "vehicle.citroen.c3", "vehicle.ford.mustang",
+    "vehicle.volkswagen.t2", "vehicle.lincoln.mkz_2017",
+    "vehicle.seat.leon"
+]
+
+# Dictionary: short UI name -> full "vehicle.xxx"
+vehicle_ui_map = {
+    vt.replace("vehicle.", ""): vt for vt in vehicle_type_full
+}
+
+vtypes_xml_path = os.path.join(sumo_base_dir, "examples", "carlavtypes.rou.xml")
+
+# Base definition for "HUD-less" car
+base_frame = {
+    'HUDname': "HUD-less car",
+    'entry': 5,
+    'brightness_var': 0.4,   # numeric brightness
+    'frequency_var': "none",
+    'relevance_var': "none",
+    'fov_var': 60.0,         # numeric FoV
+    'vehicle_type': "vehicle.nissan.patrol",
+    'hud_id': "999"
+}
+
+# Used at runtime for mapping each SUMO vehicle ID -> custom vehicle type
+vehicle_type_mapping = {}
+
+hud_id_mapping = {}
+hud_data = {}
+string_hud_frames = []
+
+# Generated scenario files, one folder per map, HUD configuration and seed (see prepare_scenario)
+SCENARIO_CACHE_DIR = "scenario_cache"
+# Number of scenario folders (and shared vType files) kept in the cache, the most recently used ones
+SCENARIO_CACHE_SIZE = 50
+
+# Minimal wall-clock seconds between two progress messages of run_simulation
+PROGRESS_INTERVAL = 0.5
+
+# Number of vehicle types drawn at once by modify_vehicle_routes
+ROUTE_DRAW_BATCH = 10000
+# Number of parsed route file elements written at once by modify_vehicle_routes
+ROUTE_WRITE_BATCH = 1000
+
+# What run_simulation saves: the selected columns read via TraCI, SUMO's FCD output, or both
+OUTPUT_MODES = ["both", "traci", "fcd"]
+
+# minGap changes (in m) up to this tolerance are not sent to SUMO by run_simulation
+MIN_GAP_TOLERANCE = 0.01
+
+# -----------------------------------------------------------------------
+# run_simulation
+# -----------------------------------------------------------------------
+def run_simulation(map_name, selected_columns, output_format="csv", use_subscriptions=True, backend="traci",
+                   route_files=None, port=None, output_dir="Simulation_data", run_name=None,
+                   progress_queue=None, cancel_event=None, startup_timer=None, seed=None,
+                   min_gap_tolerance=MIN_GAP_TOLERANCE, recording_policy=None, output_mode="both",
+                   fcd_attributes=None, fcd_period=None):
+    """
+    Start SUMO with FCD-output, run step-by-step, adjusting minGap, collecting data.
+    selected_columns are the enabled data columns (see data_output.COLUMNS),
+    output_format is one of data_output.OUTPUT_FORMATS.
+    With use_subscriptions, every vehicle is subscribed to the variables needed at every
+    step once on departure and their values arrive with the step response, instead of one
+    TraCI round-trip per variable and vehicle.
+    backend selects "traci" (socket) or "libsumo" (in-process, headless only).
+    route_files replace the route files of the map's .sumocfg, port sets the TraCI port,
+    and all output goes to output_dir as <run_name>_... (default <map>_<timestamp>).
+    seed is passed to SUMO as its random seed.
+    If given, ("progress", {...}) messages are put on progress_queue about every
+    PROGRESS_INTERVAL seconds, and the run stops early once cancel_event is set.
+    With a startup.StartupTimer, the TraCI connection and the first step are timed
+    and the startup phase timings are printed.
+    The last minGap sent to each vehicle is cached, and setMinGap is skipped while the
+    new value differs from it by at most min_gap_tolerance.
+    recording_policy (a recording.RecordingPolicy, default: every vehicle at every step)
+    selects the recorded samples; unless it keeps every sample, only the speed and minGap
+    are subscribed and the other values are fetched for the recorded samples only.
+    output_mode is one of OUTPUT_MODES: "traci" records the selected columns without FCD output,
+    "fcd" only lets SUMO write the gzip-compressed FCD output (<run_name>_fcd_data.xml.gz) and reads
+    nothing but the speed for the minGap control, "both" does both.
+    fcd_attributes (list of vehicle attributes) and fcd_period (seconds) limit the FCD output.
+    Returns the filename of the saved simulation data (the FCD file in "fcd" mode), or None.
+    """
+    if output_mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode: {output_mode}")
+    sumo = load_sumo_backend(backend)
+    import traci.constants as tc
+
+    if run_name is None:
+        now = datetime.now()
+        run_name = f"{map_name}_{now.strftime('%H-%M-%S_%Y-%m-%d')}"
+    base_filename = os.path.join(output_dir, run_name)
+    fcd_filename = f'{base_filename}_fcd_data.xml.gz'
+
+    path = os.path.join(sumo_base_dir, "examples", map_name + ".sumocfg")
+    sumo_command = ["sumo", "-c", path]
+    if output_mode != "traci":
+        # SUMO compresses the output because of the .gz suffix
+        sumo_command += ['--fcd-output', fcd_filename]
+        if fcd_attributes:
+            sumo_command += ['--fcd-output.attributes', ",".join(fcd_attributes)]
+        if fcd_period:
+            sumo_command += ['--device.fcd.period', str(fcd_period)]
+    if route_files:
+        sumo_command += ['--route-files', ",".join(route_files)]
+    if seed is not None:
+        sumo_command += ['--seed', str(seed)]
+    if port is None:
+        sumo.start(sumo_command)
+    else:
+        sumo.start(sumo_command, port=port)
+    if startup_timer:
+        startup_timer.mark("SUMO connected")
+
+    if output_mode == "fcd":
+        writer = None
+    else:
+        writer = open_simulation_data_writer(map_name, base_filename, selected_columns, output_format)
+
+    if recording_policy is None:
+        recording_policy = RecordingPolicy()
+
+    # Per-vehicle variables collected each step when subscriptions are used: the speed for the
+    # minGap control and, if anything is recorded, the minGap for the recording policy. The other
+    # recorded variables are only subscribed if the policy keeps every sample; otherwise they
+    # are fetched for the recorded samples only.
+    if writer is None:
+        subscribed_vehicle_vars = (tc.VAR_SPEED,)
+    elif recording_policy.records_every_sample:
+        subscribed_vehicle_vars = (
+            tc.VAR_MINGAP,
+            tc.VAR_SPEED,
+            tc.VAR_POSITION,
+            tc.VAR_ACCELERATION,
+            tc.VAR_DISTANCE,
+            tc.VAR_TIMELOSS
+        )
+    else:
+        subscribed_vehicle_vars = (tc.VAR_MINGAP, tc.VAR_SPEED)
+    samples_subscribed = use_subscriptions and tc.VAR_POSITION in subscribed_vehicle_vars
+
+    # Slot per vehicle with its min-gap factor and last sent minGap, see vehicle_registry.py
+    registry = VehicleRegistry(hud_data, vehicle_type_mapping)
+    slots = registry.slots
+    min_gap_factor = registry.min_gap_factor
+    last_min_gap = registry.last_min_gap
+
+    recording_policy.bind(registry)
+    filters_vehicles = recording_policy.filters_vehicles
+
+    # Number of setMinGap calls sent / skipped
+    min_gap_writes = 0
+    min_gap_writes_avoided = 0
+
+    step = 0
+    start_time = time.perf_counter()
+    last_report_time = start_time
+    last_report_step = 0
+
+    try:
+        while sumo.simulation.getMinExpectedNumber() > 0:
+            if cancel_event is not None and cancel_event.is_set():
+                print("Simulation cancelled.")
+                break
+
+            sumo.simulationStep()
+            step += 1
+            if startup_timer and step == 1:
+                startup_timer.mark("first step")
+                startup_timer.report()
+
+            if use_subscriptions:
+                for vehicle_id in sumo.simulation.getDepartedIDList():
+                    sumo.vehicle.subscribe(vehicle_id, subscribed_vehicle_vars)
+                    registry.add(vehicle_id)
+                subscription_results = sumo.vehicle.getAllSubscriptionResults()
+            simTime = sumo.simulation.getTime()
+            recording = writer is not None and recording_policy.record_step(step, simTime)
+
+            vehicle_ids = sumo.vehicle.getIDList()
+            for vehicle_id in vehicle_ids:
+                slot = slots.get(vehicle_id)
+                if slot is None:
+                    slot = registry.add(vehicle_id)
+
+                if use_subscriptions:
+                    values = subscription_results[vehicle_id]
+                    current_speed = values[tc.VAR_SPEED] * 3.6
+                else:
+                    current_speed = sumo.vehicle.getSpeed(vehicle_id) * 3.6
+
+                # The other variables are only read for samples the recording policy keeps
+                if recording:
+                    if use_subscriptions:
+                        current_gap = values[tc.VAR_MINGAP]
+                    else:
+                        current_gap = sumo.vehicle.getMinGap(vehicle_id)
+
+                    if not filters_vehicles or recording_policy.record_vehicle(registry, slot, current_speed, current_gap):
+                        if samples_subscribed:
+                            position = values[tc.VAR_POSITION]
+                            current_acceleration = values[tc.VAR_ACCELERATION]
+                            distance_traveled = values[tc.VAR_DISTANCE]
+                            time_loss = values[tc.VAR_TIMELOSS]
+                        else:
+                            position = sumo.vehicle.getPosition(vehicle_id)
+                            current_acceleration = sumo.vehicle.getAcceleration(vehicle_id)
+                            distance_traveled = sumo.vehicle.getDistance(vehicle_id)
+                            time_loss = sumo.vehicle.getTimeLoss(vehicle_id)
+
+                        writer.add_sample(
+                            vehicle_id,
+                            simTime,
+                            position[0],
+                            position[1],
+                            current_speed,
+                            current_gap,
+                            current_acceleration,
+                            distance_traveled,
+                            time_loss
+                        )
+
+                new_min_gap = max(2.0, (current_speed * 0.5 * min_gap_factor[slot]))
+                # nan (nothing sent yet) never compares within the tolerance
+                if abs(new_min_gap - last_min_gap[slot]) <= min_gap_tolerance:
+                    min_gap_writes_avoided += 1
+                else:
+                    sumo.vehicle.setMinGap(vehicle_id, new_min_gap)
+                    last_min_gap[slot] = new_min_gap
+                    min_gap_writes += 1
+
+            for vehicle_id in sumo.simulation.getArrivedIDList():
+                registry.release(vehicle_id)
+
+            if progress_queue is not None:
+                now = time.perf_counter()
+                if now - last_report_time >= PROGRESS_INTERVAL:
+                    progress_queue.put(("progress", {
+                        'step': step,
+                        'sim_time': sumo.simulation.getTime(),
+                        'vehicles': len(vehicle_ids),
+                        'steps_per_second': (step - last_report_step) / (now - last_report_time),
+                        'elapsed': now - start_time,
+                        'min_gap_writes_avoided': min_gap_writes_avoided
+                    }))
+                    last_report_time = now
+                    last_report_step = step
+
+        total_writes = min_gap_writes + min_gap_writes_avoided
+        if total_writes:
+            print(f"setMinGap: {min_gap_writes} sent, {min_gap_writes_avoided} avoided "
+                  f"({100 * min_gap_writes_avoided / total_writes:.1f}%)")
+    finally:
+        try:
+            sumo.close()
+        finally:
+            # Flush what was recorded so far, also if the simulation crashed
+            if writer:
+                writer.close()
+
+    if output_mode == "fcd":
+        return fcd_filename
+    return writer.filename if writer and writer.rows_written else None
+
+def open_simulation_data_writer(map_name, base_filename, selected_columns, output_format="csv"):
+    """
+    Create the streaming writer for a run with the selected columns and output format.
+    Returns None if no column is selected.
+    """
+    if not any(selected_columns):
+        print("No simulation data will be saved!")
+        return None
+
+    return data_output.create_writer(
+        output_format, base_filename, map_name,
+        selected_columns, hud_data, hud_id_mapping, vehicle_type_mapping
+    )
+
+# -----------------------------------------------------------------------
+# hudSelection
+# -----------------------------------------------------------------------
+def hudSelection():
+    """
+    Convert the user selections to numeric brightness/fov, then call calculations
+    to build the hud_data dict for each vehicle type.
+    Now returns hud_data, avoiding a NoneType return.
+    """
+    global hud_data
+    hud_data.clear()
+
+    for hud in string_hud_frames:
+        hud_data[hud['vehicle_type']] = calculate_hud_attributes(hud)
+    print("hud_data built =>", hud_data)
+    return hud_data
+
+def calculate_hud_attributes(hud):
+    """
+    Calculate the hud_data entry (levels, driver behavior and HUD settings) of one HUD
+    in the format of string_hud_frames.
+    """
+    brightness_str = hud['brightness_var']
+    frequency_str = hud['frequency_var']
+    relevance_str = hud['relevance_var']
+    fov_str = hud['fov_var']
+    HUDname = hud['HUDname']
+
+    try:
+        brightness_val = float(brightness_str)
+    except ValueError:
+        brightness_val = 0.4
+
+    try:
+        fov_val = float(fov_str)
+    except ValueError:
+        fov_val = 60.0
+
+    # Example: calling calculations from your 'calculations' module:
+    distraction_level = calculations.calc_distraction(relevance_str, frequency_str, brightness_val, fov_val)
+    fatigueness_level = calculations.calc_fatigueness(relevance_str, frequency_str, brightness_val)
+    awareness_level   = calculations.calc_awareness(relevance_str, frequency_str, distraction_level, fatigueness_level, fov_val)
+    reactTime         = calculations.calc_ReactTime(distraction_level, fatigueness_level, awareness_level)
+    maxSpeed          = calculations.calc_MaxSpeed(awareness_level, fatigueness_level, distraction_level, frequency_str)
+    minGap            = calculations.calc_MinGap(distraction_level, fatigueness_level, awareness_level, fov_val)
+    speedFactor       = calculations.calc_SpeedAd(fov_val, distraction_level, fatigueness_level, awareness_level, relevance_str, frequency_str)
+    accel             = calculations.calc_acceleration(fatigueness_level, distraction_level, awareness_level, relevance_str)
+
+    return {
+        'HUDname':           HUDname,
+        'distraction_level': distraction_level,
+        'fatigueness_level': fatigueness_level,
+        'awareness_level':   awareness_level,
+        'reactTime':         reactTime,
+        'max_speed':         maxSpeed,
+        "min_Gap":           minGap,
+        'speed_factor':      speedFactor,
+        'accel_factor':      accel,
+        'brightness':        brightness_val,
+        'frequency':         frequency_str,
+        'relevance':         relevance_str,
+        'field of view':     fov_val
+    }
+
+def vtype_updates(local_data):
+    """The vType attributes update_vehicles writes per HUD vehicle type: (maxSpeed, speedFactor, accel, actionStepLength)."""
+    updates = {}
+    for vehicle_type, data in local_data.items():
+        if vehicle_type.lower() == "vehicle.nissan.patrol":
+            continue
+        updates[vehicle_type] = (
+            str(data['max_speed']),
+            str(data.get('speed_factor', '')),
+            str(data.get('accel_factor')),
+            str(data.get('reactTime'))
+        )
+    return updates
+
+def update_vehicles(xml_file_path, local_data, rng=None):
+    """
+    Updates the vehicle types in the .rou.xml with new behaviors (maxSpeed, etc.).
+    The vTypes are looked up in an id index built once per parse.
+    The colors are drawn from rng (a random.Random, default: unseeded).
+    """
+    if rng is None:
+        rng = random.Random()
+
+    tree = ET.parse(xml_file_path)
+    root = tree.getroot()
+    vtype_index = {vtype_elem.get('id'): vtype_elem for vtype_elem in root.findall('vType')}
+
+    for vehicle_type, (max_speed, speedFactor, accelFactor, reactionTime) in vtype_updates(local_data).items():
+        vtype_elem = vtype_index.get(vehicle_type)
+        if vtype_elem is None:
+            continue
+
+        vtype_elem.set('maxSpeed', max_speed)
+        vtype_elem.set('speedFactor', speedFactor)
+        vtype_elem.set('accel', accelFactor)
+
+        params = {}
+        for param in vtype_elem.findall('param'):
+            params.setdefault(param.get('key'), param)
+        for key, value in (('has.driverstate.device', 'true'), ('actionStepLength', reactionTime)):
+            param = params.get(key)
+            if param is None:
+                param = ET.SubElement(vtype_elem, 'param')
+                param.set('key', key)
+            param.set('value', value)
+
+        color = "#{:02x}{:02x}{:02x}".format(rng.randint(0,255), rng.randint(0,255), rng.randint(0,255))
+        vtype_elem.set('color', color)
+
+    tree.write(xml_file_path, encoding='utf-8', xml_declaration=True)
+
+def file_signature(path):
+    """Modification time and size of a file, to notice changes made by others."""
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def modify_vehicle_routes(map_name, routes_file=None, output_file=None, rng=None):
+    """
+    Assign the vehicle types in the .rou file by user-defined probabilities.
+    Also fallback if we get 'vehicle.unknown'.
+    routes_file defaults to the map's route file in the CARLA examples folder and is not modified;
+    the result is streamed to output_file (default: scenario_route_file), element by element,
+    so memory use does not depend on the number of vehicles.
+    The types are drawn in batches of ROUTE_DRAW_BATCH by one vectorized numpy draw each,
+    from a numpy generator seeded by rng (a random.Random, default: unseeded).
+    Returns output_file, or None if routes_file does not exist.
+    """
+    if rng is None:
+        rng = random.Random()
+    original_routes_file = routes_file or map_route_file(map_name)
+    output_file = output_file or scenario_route_file(map_name)
+    vehicle_type_mapping.clear()
+
+    vehicle_types = []
+    probabilities = []
+    for hud in string_hud_frames:
+        probability = int(hud['entry'])
+        short_vtype = hud['vehicle_type']
+        # string_hud_frames already hold full type IDs; short UI names are looked up
+        full_vtype = vehicle_ui_map.get(short_vtype, short_vtype)
+        # fallback if still vehicle.unknown: pick a known type
+        if full_vtype == "vehicle.unknown":
+            full_vtype = "vehicle.audi.a2"
+        vehicle_types.append(full_vtype)
+        probabilities.append(probability)
+    drawn_types = iter(())
+    if vehicle_types:
+        # numpy is imported here, so that importing this module stays cheap
+        import numpy as np
+        generator = np.random.default_rng(rng.getrandbits(64))
+        type_names = np.array(vehicle_types, dtype=object)
+        weights = np.array(probabilities, dtype=np.float64)
+        weights /= weights.sum()
+
+    try:
+        with open(original_routes_file, 'rb') as source, open(output_file, 'w', encoding='utf-8') as out:
+            out.write("<?xml version='1.0' encoding='utf-8'?>\n")
+            root = None
+            root_written = False
+            completed = 0
+            depth = 0
+            for event, elem in ET.iterparse(source, events=('start', 'end')):
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                    depth += 1
+                    continue
+
+                depth -= 1
+                if depth == 1:
+                    if elem.tag == 'vehicle' and vehicle_types:
+                        chosen_type = next(drawn_types, None)
+                        if chosen_type is None:
+                            codes = generator.choice(len(type_names), size=ROUTE_DRAW_BATCH, p=weights)
+                            drawn_types = iter(type_names[codes].tolist())
+                            chosen_type = next(drawn_types)
+                        elem.set('type', chosen_type)
+                        vehicle_type_mapping[elem.get('id')] = chosen_type
+                    completed += 1
+                    if completed > ROUTE_WRITE_BATCH:
+                        # The tail of the last complete child may not be parsed yet
+                        write_children(out, root, completed - 1, not root_written)
+                        root_written = True
+                        completed = 1
+                elif depth == 0:
+                    write_children(out, root, completed, not root_written)
+                    out.write(f"</{root.tag}>\n")
+    except FileNotFoundError:
+        print(f"Couldn't find: {original_routes_file}")
+        return None
+    return output_file
+
+def write_children(out, root, count, with_start_tag):
+    """
+    Write the first count children of the root element, preceded by its start tag and text
+    if with_start_tag, and remove them from the tree. iterparse may already have added the
+    following (incomplete) children, they are kept. Serializing many children at once is
+    much faster than one ET.tostring call per element.
+    """
+    incomplete = root[count:]
+    del root[count:]
+    content = ET.tostring(root, encoding='unicode')
+    if len(root) or root.text:
+        content = content[:content.rindex("</")]
+    else:
+        content = content[:-len(" />")] + ">"
+    if not with_start_tag:
+        content = content[content.index(">") + 1:]
+    out.write(content)
+    root.text = None
+    root[:] = incomplete
+
+def map_route_file(map_name):
+    """Path of the route file of map_name in the CARLA examples folder."""
+    return os.path.join(sumo_base_dir, "examples", "rou", map_name + ".rou.xml")
+
+def scenario_route_file(map_name):
+    """Path of the route file with the HUD vehicle types that modify_vehicle_routes writes by default."""
+    return os.path.join(sumo_base_dir, "examples", "rou", map_name + ".hud.rou.xml")
+
+def is_file_option(name):
+    """Whether the SUMO option name takes file paths (net-file, additional-files, gui-settings-file, fcd-output, ...)."""
+    return name.endswith(('-file', '-files', '-output', '.file', '.output'))
+
+def write_scenario_sumocfg(map_name, route_files, sumocfg_path=None):
+    """
+    Write a copy of the map's .sumocfg that loads route_files instead of its own route files,
+    for the processes that start SUMO from a config file (sumo-gui, CARLA's run_synchronization.py).
+    sumocfg_path defaults to <map>.hud.sumocfg next to the original; the relative paths of all
+    file options (see is_file_option), e.g. gui_only/gui-settings-file, are adjusted to its folder.
+    Returns sumocfg_path.
+    """
+    original_sumocfg = maps[map_name]
+    sumocfg_path = sumocfg_path or os.path.join(sumo_base_dir, "examples", map_name + ".hud.sumocfg")
+    original_dir = os.path.dirname(os.path.abspath(original_sumocfg))
+    target_dir = os.path.dirname(os.path.abspath(sumocfg_path))
+
+    def relocate(path, base_dir):
+        path = os.path.join(base_dir, path)
+        try:
+            return os.path.relpath(path, target_dir).replace(os.sep, "/")
+        except ValueError:
+            # On another drive
+            return os.path.abspath(path)
+
+    tree = ET.parse(original_sumocfg)
+    input_elem = tree.getroot().find('input')
+    if input_elem is None:
+        input_elem = ET.SubElement(tree.getroot(), 'input')
+    for option in tree.getroot().iter():
+        value = option.get('value')
+        if value and is_file_option(option.tag) and option.tag != 'route-files':
+            option.set('value', ",".join(relocate(path, original_dir) for path in value.split(",")))
+
+    route_elem = input_elem.find('route-files')
+    if route_elem is None:
+        route_elem = ET.SubElement(input_elem, 'route-files')
+    route_elem.set('value', ",".join(relocate(path, os.getcwd()) for path in route_files))
+
+    tree.write(sumocfg_path, encoding='utf-8', xml_declaration=True)
+    return sumocfg_path
+
+def writeXML(hud_list, xml_file_path="hudconfig.xml"):
+    """
+    Writes hudconfig.xml for the spectator client, storing user-chosen strings.
+    """
+    root = ET.Element("Vehicles")
+
+    for hud in hud_list:
+        vehicle_type = hud['vehicle_type']
+        # base_frame holds numeric brightness/FoV
+        brightness_str = str(hud['brightness_var'])
+        frequency = hud['frequency_var']
+        relevance = hud['relevance_var']
+        fov_str = str(hud['fov_var'])
+        hud_name = hud['HUDname']
+
+        vehicle_element = ET.SubElement(root, "Vehicle", type_id=vehicle_type)
+        ET.SubElement(vehicle_element, "HUDName").text = hud_name
+        ET.SubElement(vehicle_element, "Brightness").text = brightness_str
+        ET.SubElement(vehicle_element, "Frequency").text = frequency
+        ET.SubElement(vehicle_element, "Relevance").text = relevance
+        ET.SubElement(vehicle_element, "FoV").text = fov_str
+
+    tree = ET.ElementTree(root)
+    tree.write(xml_file_path, encoding="utf-8", xml_declaration=True)
+
+    import xml.dom.minidom as minidom
+    dom = minidom.parseString(ET.tostring(root))
+    pretty_xml = dom.toprettyxml()
+    with open(xml_file_path, "w") as f:
+        f.write(pretty_xml)
+
+    return xml_file_path
+
+def read_hud_config(xml_file_path="hudconfig.xml"):
+    """
+    Read the HUDs written by writeXML back into the format of string_hud_frames
+    (without probability and hud_id, which are not stored).
+    """
+    huds = []
+    for vehicle in ET.parse(xml_file_path).getroot().findall('Vehicle'):
+        huds.append({
+            'HUDname':        vehicle.findtext('HUDName', ""),
+            'brightness_var': vehicle.findtext('Brightness', "0.4"),
+            'frequency_var':  vehicle.findtext('Frequency', "average"),
+            'relevance_var':  vehicle.findtext('Relevance', "neutral"),
+            'fov_var':        vehicle.findtext('FoV', "60"),
+            'vehicle_type':   vehicle.get('type_id')
+        })
+    return huds
+
+def map_vehicle_type_to_hud_id():
+    """
+    For each HUD in string_hud_frames, map the SUMO vType to the hud_id in hud_id_mapping.
+    """
+    hud_id_mapping.clear()
+    for hud in string_hud_frames:
+        vehicle_type = hud['vehicle_type']
+        hud_id = hud['hud_id']
+        hud_id_mapping[vehicle_type] = hud_id
+
+# -----------------------------------------------------------------------
+# prepare_scenario
+# -----------------------------------------------------------------------
+Scenario = namedtuple('Scenario', ['directory', 'sumocfg', 'vtypes_file', 'routes_file', 'hud_config', 'seed'])
+
+def scenario_key(map_name, huds, seed):
+    """
+    Hash of everything the generated scenario files depend on: the map, the HUDs
+    (string_hud_frames), the seed and the vType and route files they are generated from.
+    """
+    content = json.dumps({
+        'map': map_name,
+        'huds': huds,
+        'seed': seed,
+        'vtypes': file_signature(vtypes_xml_path),
+        'routes': file_signature(map_route_file(map_name)),
+    }, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+def vtypes_key(local_data):
+    """Hash of what the vType file with the HUD behaviors depends on: the vType updates and the original file."""
+    content = json.dumps({
+        'updates': vtype_updates(local_data),
+        'vtypes': file_signature(vtypes_xml_path),
+    }, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+def prepare_vtypes_file(local_data, cache_dir=SCENARIO_CACHE_DIR):
+    """
+    Provide the vType file with the HUD behaviors of local_data (hud_data) as
+    cache_dir/vtypes/<vtypes_key>_carlavtypes.rou.xml. It depends on the HUD attributes only,
+    not on the seed, so it is generated once and shared by all scenarios with the same HUDs.
+    The colors are drawn from a generator seeded with the key, so the file is the same
+    whenever it is generated again (e.g. after the cache was cleaned up).
+    Returns the path of the file.
+    """
+    key = vtypes_key(local_data)
+    vtypes_dir = os.path.join(cache_dir, "vtypes")
+    vtypes_file = os.path.join(vtypes_dir, f"{key}_{os.path.basename(vtypes_xml_path)}")
+    if os.path.isfile(vtypes_file):
+        # Marks it as recently used for evict_scenarios
+        os.utime(vtypes_file)
+        return vtypes_file
+
+    os.makedirs(vtypes_dir, exist_ok=True)
+    build_file = f"{vtypes_file}.{os.getpid()}.tmp"
+    shutil.copyfile(vtypes_xml_path, build_file)
+    update_vehicles(build_file, local_data, random.Random(key))
+    # Concurrent runs write the same content, so the last replace wins harmlessly
+    os.replace(build_file, vtypes_file)
+    print(f"vTypes written to {vtypes_file}")
+    return vtypes_file
+
+def evict_scenarios(cache_dir=SCENARIO_CACHE_DIR, keep=None):
+    """
+    Remove all but the keep (default: SCENARIO_CACHE_SIZE) most recently used scenario folders
+    and vType files of cache_dir, by modification time (prepare_scenario and
+    prepare_vtypes_file touch what they reuse).
+    A removed vType file is generated again by prepare_vtypes_file when a kept scenario needs it.
+    """
+    if keep is None:
+        keep = SCENARIO_CACHE_SIZE
+    vtypes_dir = os.path.join(cache_dir, "vtypes")
+    scenarios = [entry for entry in os.scandir(cache_dir)
+                 if entry.is_dir() and entry.path != vtypes_dir and not entry.name.endswith(".tmp")]
+    vtypes_files = [entry for entry in os.scandir(vtypes_dir)
+                    if entry.is_file() and not entry.name.endswith(".tmp")] if os.path.isdir(vtypes_dir) else []
+
+    for entries in (scenarios, vtypes_files):
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+        for entry in entries[keep:]:
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+def prepare_scenario(map_name, seed=None, cache_dir=SCENARIO_CACHE_DIR):
+    """
+    Build hud_id_mapping and hud_data for the HUDs in string_hud_frames and provide the
+    scenario files of map_name: the vType file with the HUD behaviors (see prepare_vtypes_file,
+    shared by all seeds), the route file with the assigned vehicle types, hudconfig.xml for the
+    spectator and a .sumocfg loading them.
+    The files are generated once into cache_dir/<map>_<scenario_key> and reused by all
+    later runs with the same map, HUDs and seed; vehicle_type_mapping is then loaded from
+    vehicle_types.json instead of drawing the types again. Scenario folders are never modified
+    after they are complete, so concurrent runs can share them, and the files in the CARLA
+    folder are only read. Only the SCENARIO_CACHE_SIZE most recently used scenarios are kept
+    (see evict_scenarios).
+    seed makes the route type assignment reproducible. Without a seed,
+    a fresh one is drawn for every call, so every run gets new vehicle types; it is printed
+    and returned, and passing it again reuses that scenario.
+    Returns a Scenario with the folder, the absolute paths of the files, so they stay
+    valid for processes started in another working directory, and the seed.
+    """
+    if seed is None:
+        # Not from the random module, which an earlier scenario may have seeded
+        seed = random.SystemRandom().randrange(2**31)
+    map_vehicle_type_to_hud_id()
+    local_data = hudSelection()
+
+    cache_dir = os.path.abspath(cache_dir)
+    vtypes_file = prepare_vtypes_file(local_data, cache_dir)
+    directory = os.path.join(cache_dir, f"{map_name}_{scenario_key(map_name, string_hud_frames, seed)}")
+    scenario = Scenario(
+        directory=directory,
+        sumocfg=os.path.join(directory, map_name + ".sumocfg"),
+        vtypes_file=vtypes_file,
+        routes_file=os.path.join(directory, os.path.basename(map_route_file(map_name))),
+        hud_config=os.path.join(directory, "hudconfig.xml"),
+        seed=seed
+    )
+    mapping_file = os.path.join(directory, "vehicle_types.json")
+
+    if not os.path.isdir(directory):
+        # Generate into a private folder that is renamed once complete,
+        # so no run ever sees a partially written scenario
+        os.makedirs(cache_dir, exist_ok=True)
+        build_dir = f"{directory}.{os.getpid()}.tmp"
+        shutil.rmtree(build_dir, ignore_errors=True)
+        os.makedirs(build_dir)
+        routes_file = os.path.join(build_dir, os.path.basename(scenario.routes_file))
+
+        # A local generator, so the global random module of the (GUI) process is not reseeded
+        rng = random.Random(seed)
+        if modify_vehicle_routes(map_name, output_file=routes_file, rng=rng) is None:
+            shutil.rmtree(build_dir)
+            raise FileNotFoundError(map_route_file(map_name))
+        writeXML(string_hud_frames, os.path.join(build_dir, os.path.basename(scenario.hud_config)))
+        with open(os.path.join(build_dir, os.path.basename(mapping_file)), 'w') as f:
+            json.dump(vehicle_type_mapping, f)
+        write_scenario_sumocfg(map_name, [vtypes_file, routes_file],
+                               os.path.join(build_dir, os.path.basename(scenario.sumocfg)))
+
+        try:
+            os.rename(build_dir, directory)
+            print(f"Scenario files written to {directory} (seed {seed})")
+            evict_scenarios(cache_dir)
+            return scenario
+        except OSError:
+            # Another run has just generated the same scenario
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+    with open(mapping_file) as f:
+        vehicle_type_mapping.clear()
+        vehicle_type_mapping.update(json.load(f))
+    os.utime(directory)
+    print(f"Reusing scenario files from {directory} (seed {seed})")
+    return scenario
+
+# -----------------------------------------------------------------------
+# run_headless
+# -----------------------------------------------------------------------
+def run_headless(huds, map_name, selected_columns, seed=None, output_format="csv", backend="traci",
+                 cache_dir=SCENARIO_CACHE_DIR, port=None, output_dir="Simulation_data", run_name=None,
+                 recording_policy=None, output_mode="both", fcd_attributes=None, fcd_period=None):
+    """
+    Run the whole pipeline for one HUD configuration without the GUI:
+    prepare_scenario (hud_id mapping, hudSelection, vType and route files) and run_simulation.
+    huds is a list of HUD dicts with the fields of string_hud_frames (see convert_hudFrames in main.py);
+    short vehicle type names are accepted as well.
+    seed makes the route type assignment and SUMO reproducible;
+    without a seed, prepare_scenario draws one, which is passed to SUMO as well.
+    The scenario files are generated in (or reused from) cache_dir; the files in the CARLA folder are not modified.
+    recording_policy, output_mode, fcd_attributes and fcd_period are passed to run_simulation.
+    Returns the filename of the saved simulation data, or None.
+    """
+    string_hud_frames.clear()
+    for hud in huds:
+        hud = dict(hud)
+        hud['vehicle_type'] = vehicle_ui_map.get(hud['vehicle_type'], hud['vehicle_type'])
+        string_hud_frames.append(hud)
+
+    scenario = prepare_scenario(map_name, seed, cache_dir)
+
+    return run_simulation(
+        map_name, selected_columns, output_format, backend=backend,
+        route_files=[scenario.vtypes_file, scenario.routes_file],
+        port=port, output_dir=output_dir, run_name=run_name, seed=scenario.seed, recording_policy=recording_policy,
+        output_mode=output_mode, fcd_attributes=fcd_attributes, fcd_period=fcd_period
+    )
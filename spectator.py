@@ -1,14 +1,19 @@
+import argparse
 import carla
 import numpy as np
 import cv2
 import os
-import time
+import threading
 import xml.etree.ElementTree as ET
 
 from collections import deque
 
+from frame_exchange import FrameExchange
+from hud_overlay import HUD_ICONS, HudCompositor, IconCache
+from vehicle_index import VehicleIndex
+
 class CarlaCameraClient:
-    def __init__(self, host='127.0.0.1', port=2000):
+    def __init__(self, host='127.0.0.1', port=2000, hud_config="hudconfig.xml", hud_only=False):
         # Initialize the CARLA client and world
         self.client = carla.Client(host, port)
         self.client.set_timeout(10.0)  # Timeout for connection attempts
@@ -16,19 +21,20 @@ class CarlaCameraClient:
         self.blueprint_library = self.world.get_blueprint_library()
         self.camera = None
         self.vehicle = None
-        self.vehicles = []
-        self.current_vehicle_index = -1
-        self.image_data = None
+        self.current_vehicle_id = None
+        # Camera frames from the sensor thread, drawn into in place by the display loop
+        self.frames = FrameExchange()
         self.exit_flag = False
 
-        # Speed-related attributes
-        self.speed = 0.0  
-        self.current_location = None  
-        self.previous_location = None  
-        self.current_location_timestamp = None  
-        self.previous_location_timestamp = None  
+        # Speed-related attributes, updated from the world snapshot of every tick (see on_world_tick);
+        # speed_lock guards them against the main thread switching vehicles
+        self.speed_lock = threading.Lock()
+        self.speed = 0.0
         self.speed_history = deque(maxlen=100)
         self.smoothing_timestamp = None
+        self.last_location = None
+        self.last_location_time = None
+        self.vehicle_finished = False
         self.speed_hud_location = (0.0, 0.0)
         self.speed_number_offset = (0, 0, 0)
 
@@ -42,20 +48,7 @@ class CarlaCameraClient:
         # HUD icons configuration
         self.hud_area_start = (0.0, 0.0)
         self.icon_path = "icons/"
-        self.icons = {
-            'icon_stopwatch':      'stopwatch-svgrepo-com.png',
-            'icon_battery':        'battery-svgrepo-com.png',
-            'icon_calendar':       'calendar-svgrepo-com.png',
-            'icon_clock':          'clock-svgrepo-com.png',
-            'icon_music_player':   'music-player-svgrepo-com.png',
-            'icon_smartphone':     'smartphone-svgrepo-com.png',
-            'icon_speaker':        'speaker-svgrepo-com.png',
-            'icon_compass':        'compass-svgrepo-com.png',
-            'icon_placeholder':    'placeholder-svgrepo-com.png',
-            'icon_idea':           'idea-svgrepo-com.png',
-            'icon_minus':          'minus-svgrepo-com.png',
-            'icon_navigation':     'navigation-svgrepo-com.png'
-        }
+        self.icons = HUD_ICONS
         # Default positions for up to 11 icons
         self.icon_positions = [(0.0, 0.0)] * 11
 
@@ -81,7 +74,20 @@ class CarlaCameraClient:
         cv2.namedWindow('Camera Output', cv2.WINDOW_NORMAL)
         
         # Load the numeric HUD configuration from XML
-        self.hud_xml_config = self.load_xml_config("hudconfig.xml")
+        self.hud_xml_config = self.load_xml_config(hud_config)
+
+        # Icons are decoded once, resized and blended planes are rebuilt when scale or alpha change
+        self.icon_cache = IconCache(self.icon_path, self.icons)
+        # All shown icons are composited into one layer whenever the HUD configuration changes
+        self.hud_compositor = HudCompositor(self.icon_cache)
+        self.update_hud_layer()
+
+        # Vehicles to switch to, optionally only those with a HUD in hudconfig.xml,
+        # and the telemetry of the followed vehicle come with every world tick instead of requests
+        self.vehicle_index = VehicleIndex(
+            (lambda actor: actor.type_id in self.hud_xml_config) if hud_only else None
+        )
+        self.tick_callback_id = self.world.on_tick(self.on_world_tick)
 
     def load_xml_config(self, xml_file):
         """
@@ -232,26 +238,44 @@ class CarlaCameraClient:
         else:
             # If no XML config found for this vehicle, reset everything
             self.reset_hud()
+        self.update_hud_layer()
+
+    def update_hud_layer(self):
+        """Composite the shown icons at their positions into the HUD layer drawn by add_hud."""
+        self.icon_cache.prepare(self.iconscale, self.hud_alpha)
+        layout = []
+        poscount = 0
+        for icon_name in self.icons:
+            if getattr(self, f'show_{icon_name}', False):
+                if icon_name == 'icon_stopwatch':
+                    # Special position for speedometer icon
+                    layout.append((icon_name, self.speed_hud_location))
+                else:
+                    layout.append((icon_name, self.icon_positions[poscount]))
+                    poscount += 1
+        self.hud_compositor.set_layout(layout)
 
-    def get_all_vehicles(self):
-        """Retrieve all vehicles in the world."""
-        self.vehicles = []
-        while len(self.vehicles) == 0:
+    def update_vehicle_index(self):
+        """Add the vehicles that appeared since the last call to the index, waiting for ticks until there is one."""
+        self.vehicle_index.resolve(self.world.get_actors)
+        while len(self.vehicle_index) == 0:
             self.world.wait_for_tick()
-            self.vehicles = self.world.get_actors().filter("vehicle.*")
-        print(f"Found {len(self.vehicles)} vehicles")
+            self.vehicle_index.resolve(self.world.get_actors)
+        print(f"Found {len(self.vehicle_index)} vehicles")
 
     def clear_old_vehicle(self):
         """Clear the old vehicle and reset locations."""
         if self.camera:
             self.camera.stop()
             self.camera.destroy()
-        self.current_location = None
-        self.previous_location = None
-        self.current_location_timestamp = None
-        self.previous_location_timestamp = None
-        self.speed_history.clear()
-        self.smoothing_timestamp = None
+        with self.speed_lock:
+            self.vehicle = None
+            self.vehicle_finished = False
+            self.speed = 0.0
+            self.speed_history.clear()
+            self.smoothing_timestamp = None
+            self.last_location = None
+            self.last_location_time = None
         self.first_person_location = [0.0, 0.0, 0.0]
         self.reset_hud()
 
@@ -277,6 +301,7 @@ class CarlaCameraClient:
         self.hud_area_start = (0.0, 0.0)
         self.speed_hud_location = (0.0, 0.0)
         self.speed_number_offset = (0, 0, 0)
+        self.update_hud_layer()
 
     def set_vehicle_configuration(self, vehicle):
         """Set the first-person camera location based on vehicle type."""
@@ -345,72 +370,68 @@ class CarlaCameraClient:
         print(f"Camera attached to vehicle {vehicle.type_id} at {vehicle.get_location()}")
 
     def process_image(self, image):
-        """Process the image from the camera sensor."""
-        array = np.frombuffer(image.raw_data, dtype=np.uint8)
-        array = np.reshape(array, (image.height, image.width, 4))
-        self.image_data = array.copy()
+        """Process the image from the camera sensor (runs on the sensor thread)."""
+        self.frames.publish(image.raw_data, image.height, image.width)
 
     def display_camera_output(self):
-        """Display the camera output using OpenCV."""
-        if self.image_data is not None:
-            hud_image = self.image_data.copy()
+        """Display the newest camera frame with the HUD using OpenCV; the window keeps the last one otherwise."""
+        hud_image = self.frames.acquire()
+        if hud_image is not None:
             self.add_hud(hud_image)
             cv2.imshow('Camera Output', hud_image)
 
-    def get_vehicle_speed(self):
-        """Get the speed of the current vehicle (km/h)."""
-        if self.vehicle is not None:
-            self.current_location = self.vehicle.get_location()
-            self.current_location_timestamp = time.perf_counter()
-
-            if self.previous_location is None or self.previous_location_timestamp is None:
-                self.previous_location = self.current_location
-                self.previous_location_timestamp = self.current_location_timestamp
-            else:
-                distance = np.sqrt((self.current_location.x - self.previous_location.x) ** 2 +
-                                   (self.current_location.y - self.previous_location.y) ** 2 +
-                                   (self.current_location.z - self.previous_location.z) ** 2)
-                period = self.current_location_timestamp - self.previous_location_timestamp
-
-                current_speed = 3.6 * (distance / period)  # m/s -> km/h
-                self.speed_history.append(round(current_speed))
-
-                # Simple smoothing: average of speed_history
-                # Use a small threshold so we don't spam-smooth constantly.
-                if (not self.smoothing_timestamp or 
-                    abs(self.current_location_timestamp - self.smoothing_timestamp) > 0.1):
-                    self.smoothing_timestamp = self.current_location_timestamp
-                    self.speed = sum(self.speed_history) / len(self.speed_history)
+    def on_world_tick(self, snapshot):
+        """
+        Update the telemetry of the followed vehicle from the world snapshot of a tick
+        (runs on CARLA's callback thread, no requests to the server).
+        The speed (km/h) is the distance between the locations of successive snapshots over
+        their simulation time, as vehicles synchronized from SUMO are moved by set_transform
+        with physics disabled and report no velocity. It is smoothed over the ticks,
+        refreshed every 0.1 s of simulation time.
+        """
+        self.vehicle_index.update(actor_snapshot.id for actor_snapshot in snapshot)
 
-                self.previous_location = self.current_location
-                self.previous_location_timestamp = self.current_location_timestamp
+        vehicle = self.vehicle
+        if vehicle is None:
+            return
+        actor_snapshot = snapshot.find(vehicle.id)
+        if actor_snapshot is None:
+            finished = True
+        else:
+            location = actor_snapshot.get_transform().location
+            location = (location.x, location.y, location.z)
+            finished = location == (0.0, 0.0, 0.0)
+        sim_time = snapshot.timestamp.elapsed_seconds
+
+        with self.speed_lock:
+            if vehicle is not self.vehicle:
+                # Switched to another vehicle meanwhile
+                return
+            if finished:
+                self.vehicle_finished = True
+                return
+
+            last_location, last_location_time = self.last_location, self.last_location_time
+            self.last_location, self.last_location_time = location, sim_time
+            if last_location is None or sim_time <= last_location_time:
+                return
+            distance = np.sqrt(sum((a - b) ** 2 for a, b in zip(location, last_location)))
+            current_speed = 3.6 * distance / (sim_time - last_location_time)  # m/s -> km/h
+            self.speed_history.append(round(current_speed))
+
+            # Simple smoothing: average of speed_history
+            if self.smoothing_timestamp is None or abs(sim_time - self.smoothing_timestamp) > 0.1:
+                self.smoothing_timestamp = sim_time
+                self.speed = sum(self.speed_history) / len(self.speed_history)
 
     def add_hud(self, image):
         """Overlay icons and speed text on the camera image."""
         height, width, _ = image.shape
         
-        # Show icons that are True
-        poscount = 0
-        for icon_name, filename in self.icons.items():
-            if getattr(self, f'show_{icon_name}', False):
-                icon = cv2.imread(os.path.join(self.icon_path, filename), cv2.IMREAD_UNCHANGED)
-                icon = cv2.resize(icon, self.iconscale)
-                if icon_name == 'icon_stopwatch':
-                    # Special position for speedometer icon
-                    abs_position = (
-                        int(height * self.speed_hud_location[0]),
-                        int(width  * self.speed_hud_location[1])
-                    )
-                else:
-                    abs_position = (
-                        int(height * self.icon_positions[poscount][0]),
-                        int(width  * self.icon_positions[poscount][1])
-                    )
-                    poscount += 1
-                self.overlay_icon(image, icon, abs_position)
+        # Static icons, composited by update_hud_layer
+        self.hud_compositor.blend(image)
 
         # Speed text
-        self.get_vehicle_speed()
         speed_text = f"{round(self.speed)}"
 
         font         = cv2.FONT_HERSHEY_SIMPLEX
@@ -459,62 +480,33 @@ class CarlaCameraClient:
                     cv2.LINE_AA
                 )
 
-    def overlay_icon(self, image, icon, position):
-        """Overlay an RGBA icon onto the image at the given position, factoring in hud_alpha."""
-        y, x = position
-        h, w = icon.shape[:2]
-
-        # Clipping if the icon is out of bounds
-        if y + h > image.shape[0] or x + w > image.shape[1]:
-            return  # or clip to the available area
-
-        if icon.shape[2] == 4:  # If icon has an alpha channel
-            alpha_s = (icon[:, :, 3] / 255.0) * self.hud_alpha
-            alpha_l = 1.0 - alpha_s
-            for c in range(3):
-                image[y:y+h, x:x+w, c] = alpha_s * icon[:, :, c] + alpha_l * image[y:y+h, x:x+w, c]
-        else:
-            # No alpha channel, do a simpler overlay
-            for c in range(3):
-                image[y:y+h, x:x+w, c] = (
-                    self.hud_alpha * icon[:, :, c] + (1.0 - self.hud_alpha) * image[y:y+h, x:x+w, c]
-                )
-
     def switch_vehicle(self):
         """Switch to the next available vehicle."""
-        self.get_all_vehicles()
-        if not self.vehicles:
-            print("No vehicles available to switch.")
-            return
+        self.update_vehicle_index()
 
-        num_vehicles = len(self.vehicles)
-        self.current_vehicle_index = (self.current_vehicle_index + 1) % num_vehicles
-
-        while True:
-            vehicle = self.vehicles[self.current_vehicle_index]
+        for _ in range(len(self.vehicle_index)):
+            vehicle = self.vehicle_index.next_vehicle(self.current_vehicle_id)
+            if vehicle is None:
+                break
+            self.current_vehicle_id = vehicle.id
             try:
                 print(f"Switching to vehicle {vehicle.type_id} at {vehicle.get_location()}")
                 self.attach_camera_to_vehicle(vehicle)
                 self.set_xml_config(vehicle)
-                break
+                return
             except Exception as e:
                 print(f"Error switching to vehicle: {str(e)}")
                 print(f"Skipping vehicle {vehicle.type_id} due to error.")
-                self.current_vehicle_index = (self.current_vehicle_index + 1) % num_vehicles
-                if self.current_vehicle_index == 0:
-                    print("No valid vehicles found to switch to.")
-                    self.exit_flag = True
-                    return
+
+        print("No valid vehicles found to switch to.")
+        self.exit_flag = True
 
     def run(self):
         """Run the main loop to display camera output and switch vehicles."""
         self.switch_vehicle()
         print("Press 'n' to switch to the next vehicle. Press 'o' to toggle overlay. Press 'q' to quit.")
         while not self.exit_flag:
-            if (self.vehicle and 
-                self.vehicle.get_location().x == 0.0 and 
-                self.vehicle.get_location().y == 0.0 and 
-                self.vehicle.get_location().z == 0.0):
+            if self.vehicle and self.vehicle_finished:
                 print("Vehicle finished or was removed—switching to next vehicle.")
                 self.switch_vehicle()
 
@@ -533,11 +525,16 @@ class CarlaCameraClient:
                 print("Window closed by user.")
                 self.exit_flag = True
 
+        print(f"Camera frames: {self.frames.received} received, {self.frames.displayed} displayed, "
+              f"{self.frames.dropped} dropped")
         self.cleanup()
 
     def cleanup(self):
         """Clean up resources."""
         print("Cleaning up resources...")
+        if self.tick_callback_id is not None:
+            self.world.remove_on_tick(self.tick_callback_id)
+            self.tick_callback_id = None
         if self.camera:
             self.camera.stop()
             self.camera.destroy()
@@ -545,8 +542,13 @@ class CarlaCameraClient:
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="First-person spectator client with the HUD of the followed vehicle.")
+    # The launcher passes the hudconfig.xml of the scenario
+    parser.add_argument("hud_config", nargs="?", default="hudconfig.xml")
+    parser.add_argument("--hud-only", action="store_true", help="only switch between vehicles with a HUD")
+    args = parser.parse_args()
     try:
-        client = CarlaCameraClient()
+        client = CarlaCameraClient(hud_config=args.hud_config, hud_only=args.hud_only)
         client.run()
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -0,0 +1,57 @@
+import socket
+import time
+
+
+class StartupTimer:
+    """
+    Records how long each startup phase of a run takes (e.g. CARLA launch until its
+    RPC port accepts connections, TraCI connection, first simulation step).
+    """
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.last_time = self.start_time
+        self.phases = []
+
+    def mark(self, phase):
+        """End the current phase and store its duration under the given name."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last_time))
+        self.last_time = now
+
+    def total(self):
+        return self.last_time - self.start_time
+
+    def report(self):
+        print("Startup phase timings:")
+        for phase, seconds in self.phases:
+            print(f"  {phase:<20} {seconds:7.2f} s")
+        print(f"  {'launch to first step':<20} {self.total():7.2f} s")
+
+
+def wait_for_port(host, port, timeout=60.0, initial_delay=0.1, max_delay=2.0, backoff=1.5, cancel_event=None):
+    """
+    Poll host:port until it accepts a TCP connection.
+    The delay between attempts starts at initial_delay and grows by backoff up to max_delay.
+    Returns True once the port is ready, False on timeout or if cancel_event is set.
+    Only use this for servers that accept any number of connections (like the CARLA RPC port);
+    a SUMO TraCI server would treat the probe as its client.
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=max(0.1, min(delay, 1.0))):
+                return True
+        except OSError:
+            pass
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        wait = min(delay, remaining)
+        if cancel_event is not None:
+            if cancel_event.wait(wait):
+                return False
+        else:
+            time.sleep(wait)
+        delay = min(delay * backoff, max_delay)
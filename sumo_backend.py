@@ -0,0 +1,19 @@
+"""
+Function that takes the name of a SUMO control backend ("traci" or "libsumo")
+and returns the module implementing the TraCI API for it.
+libsumo runs SUMO inside the Python process, which removes the socket
+serialization of traci but cannot show sumo-gui.
+If libsumo is not installed, traci is returned instead.
+Both are imported here, on first use, to keep them out of the launcher's startup.
+"""
+def load_sumo_backend(name="traci"):
+    if name == "libsumo":
+        try:
+            import libsumo
+            return libsumo
+        except ImportError:
+            print("libsumo is not installed, falling back to traci.")
+    elif name != "traci":
+        print(f"Unknown SUMO backend '{name}', using traci.")
+    import traci
+    return traci
@@ -0,0 +1,205 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import traceback
+from datetime import datetime
+
+import data_output
+import simulation
+
+# Settings of the single HUD that is varied in a sweep
+SWEEP_VEHICLE_TYPE = "vehicle.audi.a2"
+SWEEP_HUD_ID = "1"
+
+# Default TraCI port of the first worker, every worker uses base_port + worker index
+BASE_PORT = 8813
+
+# Port of the current worker process, set by init_worker
+worker_port = None
+
+
+def grid_configurations(brightness, fov, frequency, relevance, probability=(1,), hudless=False):
+    """
+    Return one HUD configuration per combination (full grid) of the brightness, fov,
+    frequency, relevance and probability values.
+    Each configuration is a list of HUD dicts in the format of string_hud_frames,
+    optionally followed by the HUD-less baseline car.
+    """
+    configurations = []
+    for b, f, freq, rel, prob in itertools.product(brightness, fov, frequency, relevance, probability):
+        configurations.append(hud_configuration(b, f, freq, rel, prob, hudless))
+    return configurations
+
+
+def sample_configurations(n, seed=None, frequency=("minimum", "average", "maximum"),
+                          relevance=("unimportant", "neutral", "important"), probability=(1,), hudless=False):
+    """
+    Draw n random HUD configurations, with brightness in [0,0.9] and fov in [30,100]
+    rounded like the GUI sliders, and frequency/relevance/probability chosen from the given lists.
+    """
+    rng = random.Random(seed)
+    configurations = []
+    for _ in range(n):
+        configurations.append(hud_configuration(
+            round(rng.uniform(0.0, 0.9), 2),
+            rng.randint(30, 100),
+            rng.choice(frequency),
+            rng.choice(relevance),
+            rng.choice(probability),
+            hudless
+        ))
+    return configurations
+
+
+def hud_configuration(brightness, fov, frequency, relevance, probability, hudless=False):
+    """The HUD dicts of one configuration: the swept HUD and optionally the HUD-less baseline car."""
+    huds = [{
+        'HUDname':        f"HUD b{brightness} fov{fov} {frequency} {relevance}",
+        'entry':          str(probability),
+        'brightness_var': str(brightness),
+        'frequency_var':  frequency,
+        'relevance_var':  relevance,
+        'fov_var':        str(fov),
+        'vehicle_type':   SWEEP_VEHICLE_TYPE,
+        'hud_id':         SWEEP_HUD_ID
+    }]
+    if hudless:
+        huds.append(dict(simulation.base_frame))
+    return huds
+
+
+def init_worker(worker_counter, base_port):
+    """Give every pool process its own TraCI port."""
+    global worker_port
+    with worker_counter.get_lock():
+        worker_index = worker_counter.value
+        worker_counter.value += 1
+    worker_port = base_port + worker_index
+
+
+def run_configuration(job):
+    """
+    Run one HUD configuration on one map with its own output directory.
+    The scenario files come from the shared scenario cache, which concurrent runs can use
+    safely, so the shared files under the CARLA folder are never modified.
+    Only the CSV data is written, as the sweep consolidates nothing else.
+    Returns (run_index, data file, None), or (run_index, None, error message) if the run failed,
+    so one failed run does not stop the sweep.
+    """
+    run_index, map_name, huds, seed, backend, sweep_dir = job
+    run_name = f"run_{run_index:04d}_{map_name}"
+    run_dir = os.path.join(sweep_dir, run_name)
+    os.makedirs(run_dir, exist_ok=True)
+
+    try:
+        data_file = simulation.run_headless(
+            huds, map_name, [True] * len(data_output.COLUMNS), seed=seed, backend=backend,
+            port=worker_port if backend == "traci" else None, output_dir=run_dir, run_name=run_name,
+            output_mode="traci"
+        )
+    except Exception as e:
+        traceback.print_exc()
+        return run_index, None, f"{type(e).__name__}: {e}"
+    return run_index, data_file, None
+
+
+def run_sweep(configurations, map_names, workers=None, seed=0, backend="traci", base_port=BASE_PORT, output_dir="Simulation_data"):
+    """
+    Run every configuration on every map, each as its own SUMO process in a process pool
+    with one worker per available core (or workers).
+    Writes sweep_configurations.csv and the consolidated sweep_results.csv to a new
+    sweep folder in output_dir and returns the path of that folder.
+    Failed runs are reported and left out of the results; the other runs are still consolidated.
+    """
+    sweep_dir = os.path.join(output_dir, f"sweep_{datetime.now().strftime('%H-%M-%S_%Y-%m-%d')}")
+    os.makedirs(sweep_dir, exist_ok=True)
+
+    jobs = []
+    for map_name in map_names:
+        for huds in configurations:
+            jobs.append((len(jobs), map_name, huds, seed + len(jobs), backend, sweep_dir))
+
+    with open(os.path.join(sweep_dir, "sweep_configurations.csv"), mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['run', 'map', 'seed', 'huds'])
+        for run_index, map_name, huds, run_seed, _, _ in jobs:
+            writer.writerow([run_index, map_name, run_seed, json.dumps(huds)])
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    print(f"Running {len(jobs)} simulations with {workers} workers in {sweep_dir}")
+    worker_counter = multiprocessing.Value('i', 0)
+    results = {}
+    failures = {}
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(worker_counter, base_port)) as pool:
+        for run_index, data_file, error in pool.imap_unordered(run_configuration, jobs):
+            if error is None:
+                results[run_index] = data_file
+                print(f"Finished run {run_index + 1}/{len(jobs)}")
+            else:
+                failures[run_index] = error
+                print(f"Run {run_index + 1}/{len(jobs)} failed: {error}")
+
+    consolidate_results(results, os.path.join(sweep_dir, "sweep_results.csv"))
+    if failures:
+        print(f"{len(failures)} of {len(jobs)} runs failed:")
+        for run_index in sorted(failures):
+            print(f"  run {run_index}: {failures[run_index]}")
+    return sweep_dir
+
+
+def consolidate_results(results, output_file):
+    """Concatenate the per-run CSV files into one file with a leading 'run' column."""
+    header_written = False
+    with open(output_file, mode='w', newline='') as output:
+        writer = csv.writer(output)
+        for run_index in sorted(results):
+            data_file = results[run_index]
+            if not data_file:
+                print(f"Run {run_index} produced no data.")
+                continue
+            with open(data_file, newline='') as file:
+                reader = csv.reader(file)
+                header = next(reader)
+                if not header_written:
+                    writer.writerow(['run'] + header)
+                    header_written = True
+                for row in reader:
+                    writer.writerow([run_index] + row)
+    print(f"Consolidated sweep results written to {output_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless sweep over HUD configurations.")
+    parser.add_argument("--maps", nargs="+", default=list(simulation.maps), choices=list(simulation.maps))
+    parser.add_argument("--brightness", nargs="+", type=float, default=[0.0, 0.4, 0.9])
+    parser.add_argument("--fov", nargs="+", type=float, default=[30, 60, 100])
+    parser.add_argument("--frequency", nargs="+", default=["minimum", "average", "maximum"])
+    parser.add_argument("--relevance", nargs="+", default=["unimportant", "neutral", "important"])
+    parser.add_argument("--probability", nargs="+", type=int, default=[1])
+    parser.add_argument("--samples", type=int, help="draw this many random configurations instead of the full grid")
+    parser.add_argument("--hudless", action="store_true", help="add the HUD-less baseline car to every configuration")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="number of parallel SUMO processes (default: number of cores)")
+    parser.add_argument("--backend", default="traci", choices=["traci", "libsumo"])
+    parser.add_argument("--base-port", type=int, default=BASE_PORT)
+    parser.add_argument("--output-dir", default="Simulation_data")
+    args = parser.parse_args()
+
+    if args.samples:
+        configurations = sample_configurations(
+            args.samples, args.seed, args.frequency, args.relevance, args.probability, args.hudless
+        )
+    else:
+        configurations = grid_configurations(
+            args.brightness, args.fov, args.frequency, args.relevance, args.probability, args.hudless
+        )
+
+    run_sweep(configurations, args.maps, args.workers, args.seed, args.backend, args.base_port, args.output_dir)
+
+
+if __name__ == '__main__':
+    main()
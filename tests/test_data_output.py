@@ -0,0 +1,145 @@
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_output
+
+HUD_DATA = {
+    'vehicle.audi.tt': {'HUDname': "HUD 1", 'max_speed': 136, 'min_Gap': 1.2, 'frequency': "average"},
+}
+HUD_ID_MAPPING = {'vehicle.audi.tt': "1"}
+VEHICLE_TYPES = {'v0': "vehicle.audi.tt", 'v1': "vehicle.tesla.model3"}
+
+SAMPLES = [
+    ['v0', 0.0, 1.0, 2.0, 10.0, 5.0, 0.5, 0.0, 0.0],
+    ['v1', 0.0, 3.0, 4.0, 20.0, -1.0, 1.0, 0.0, 0.1],
+    ['v0', 0.05, 1.5, 2.0, 11.0, 4.5, 0.4, 0.5, 0.0],
+]
+
+
+def selected(*names):
+    return [name in names for name in data_output.COLUMNS]
+
+
+def write(writer, samples=SAMPLES):
+    for sample in samples:
+        writer.add(sample)
+    writer.close()
+
+
+def read_rows(filename):
+    with open(filename, newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_sample_buffer_interns_vehicle_ids():
+    samples = data_output.SampleBuffer()
+    for sample in SAMPLES:
+        samples.append(sample[0], sample[1:])
+
+    assert len(samples) == 3
+    assert samples.vehicle_ids == ['v0', 'v1']
+    assert list(samples.vehicle_codes) == [0, 1, 0]
+    assert list(samples.column('current_speed')) == [10.0, 20.0, 11.0]
+
+    samples.clear()
+    assert len(samples) == 0
+    assert samples.append('v1', SAMPLES[1][1:]) == 1
+    # The codes stay valid across chunks
+    assert list(samples.vehicle_codes) == [1]
+
+
+def test_csv_writer_writes_the_selected_columns(tmp_path):
+    filename = str(tmp_path / "data.csv")
+    writer = data_output.SimulationDataWriter(
+        filename, "Town01", selected('map', 'vehicle_id', 'hud_id', 'current_speed', 'maxSpeed', 'information_frequency'),
+        HUD_DATA, HUD_ID_MAPPING, VEHICLE_TYPES
+    )
+
+    write(writer)
+
+    assert read_rows(filename) == [
+        ['map', 'vehicle_id', 'hud_id', 'current_speed', 'maxSpeed', 'information_frequency'],
+        ['Town01', 'v0', '1_HUD 1', '10.0', '136', 'average'],
+        ['Town01', 'v1', 'unknown_N/A', '20.0', 'N/A', 'N/A'],
+        ['Town01', 'v0', '1_HUD 1', '11.0', '136', 'average'],
+    ]
+    assert writer.rows_written == 3
+
+
+def test_csv_writer_with_a_single_column(tmp_path):
+    filename = str(tmp_path / "data.csv")
+    writer = data_output.SimulationDataWriter(filename, "Town01", selected('simulation_time'), {}, {}, {})
+
+    write(writer)
+
+    assert read_rows(filename) == [['simulation_time'], ['0.0'], ['0.0'], ['0.05']]
+
+
+def test_csv_writer_flushes_in_chunks(tmp_path):
+    filename = str(tmp_path / "data.csv")
+    writer = data_output.SimulationDataWriter(
+        filename, "Town01", selected('vehicle_id', 'current_gap'), HUD_DATA, HUD_ID_MAPPING, VEHICLE_TYPES,
+        chunk_size=2
+    )
+
+    for sample in SAMPLES[:2]:
+        writer.add(sample)
+    # The first chunk is on disk before the run ends
+    assert read_rows(filename) == [['vehicle_id', 'current_gap'], ['v0', '5.0'], ['v1', '-1.0']]
+    assert len(writer.samples) == 0
+
+    writer.add(SAMPLES[2])
+    writer.close()
+    assert read_rows(filename)[1:] == [['v0', '5.0'], ['v1', '-1.0'], ['v0', '4.5']]
+
+
+def test_csv_writer_without_samples_writes_no_file(tmp_path):
+    filename = str(tmp_path / "data.csv")
+    writer = data_output.SimulationDataWriter(filename, "Town01", selected('vehicle_id'), {}, {}, {})
+
+    writer.close()
+
+    assert not os.path.exists(filename)
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_columnar_writer_splits_the_hud_attributes_off(tmp_path, output_format):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    base_filename = str(tmp_path / "Town01")
+    writer = data_output.create_writer(
+        output_format, base_filename, "Town01", selected('vehicle_id', 'current_speed', 'maxSpeed', 'minGapFactor'),
+        HUD_DATA, HUD_ID_MAPPING, VEHICLE_TYPES, chunk_size=2
+    )
+    assert isinstance(writer, data_output.ColumnarSimulationDataWriter)
+
+    write(writer)
+
+    def read(filename):
+        if output_format == "parquet":
+            return pq.read_table(filename)
+        with pa.ipc.open_file(filename) as reader:
+            return reader.read_all()
+
+    assert read(writer.filename).to_pydict() == {
+        'vehicle_id': ['v0', 'v1', 'v0'],
+        'hud_id': ['1_HUD 1', 'unknown_N/A', '1_HUD 1'],
+        'current_speed': [10.0, 20.0, 11.0],
+    }
+    assert read(writer.hud_filename).to_pydict() == {
+        'hud_id': ['1_HUD 1'], 'vehicle_type': ['vehicle.audi.tt'], 'maxSpeed': [136], 'minGapFactor': [1.2],
+    }
+
+
+def test_create_writer_falls_back_to_csv_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_output, "load_pyarrow", lambda: False)
+
+    writer = data_output.create_writer("parquet", str(tmp_path / "Town01"), "Town01", selected('vehicle_id'), {}, {}, {})
+
+    assert isinstance(writer, data_output.SimulationDataWriter)
+    assert writer.filename == str(tmp_path / "Town01_simulation_data.csv")
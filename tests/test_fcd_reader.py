@@ -0,0 +1,98 @@
+import gzip
+import math
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fcd_reader
+
+FCD = """<?xml version="1.0" encoding="UTF-8"?>
+<fcd-export>
+    <timestep time="0.00">
+        <vehicle id="0" type="vehicle.audi.tt" x="1.5" y="2.5" speed="10.0" lane="a_0"/>
+        <vehicle id="1" type="vehicle.nissan.patrol" x="3.0" y="4.0" speed="0.0" lane="b_0"/>
+    </timestep>
+    <timestep time="0.05"/>
+    <timestep time="0.10">
+        <vehicle id="0" type="vehicle.audi.tt" x="2.0" y="2.5" lane="a_0"/>
+        <vehicle id="2" type="vehicle.tesla.model3" x="5.0" y="6.0" speed="7.5"/>
+    </timestep>
+</fcd-export>
+"""
+
+ATTRIBUTES = ['id', 'type', 'x', 'speed', 'lane']
+
+HUD_DATA = {
+    'vehicle.audi.tt': {'HUDname': "HUD 1", 'max_speed': 136, 'frequency': "average", 'field of view': "60"},
+    'vehicle.nissan.patrol': {'HUDname': "HUD-less car", 'max_speed': 18, 'frequency': "none"},
+}
+
+
+@pytest.fixture(params=["fcd.xml", "fcd.xml.gz"])
+def fcd_file(request, tmp_path):
+    filename = str(tmp_path / request.param)
+    opener = gzip.open if filename.endswith(".gz") else open
+    with opener(filename, 'wt') as f:
+        f.write(FCD)
+    return filename
+
+
+def concatenated(chunks):
+    """All rows of the chunks per column, nan as None so they compare equal."""
+    return {
+        name: [None if isinstance(value, float) and math.isnan(value) else value
+               for chunk in chunks for value in chunk[name]]
+        for name in chunks[0]
+    }
+
+
+def test_read_fcd_yields_the_vehicle_records(fcd_file):
+    chunks = list(fcd_reader.read_fcd(fcd_file, ATTRIBUTES))
+
+    assert len(chunks) == 1
+    chunk = chunks[0]
+    assert list(chunk) == ['time'] + ATTRIBUTES
+    assert list(chunk['time']) == [0.0, 0.0, 0.1, 0.1]
+    assert chunk['id'] == ['0', '1', '0', '2']
+    assert list(chunk['x']) == [1.5, 3.0, 2.0, 5.0]
+    # Missing attributes are nan / None
+    assert math.isnan(chunk['speed'][2])
+    assert chunk['lane'] == ['a_0', 'b_0', 'a_0', None]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 100])
+def test_chunks_hold_all_rows(fcd_file, chunk_size):
+    chunks = list(fcd_reader.read_fcd(fcd_file, ATTRIBUTES, chunk_size=chunk_size))
+
+    assert [len(chunk['time']) for chunk in chunks[:-1]] == [chunk_size] * (len(chunks) - 1)
+    assert concatenated(chunks) == concatenated(list(fcd_reader.read_fcd(fcd_file, ATTRIBUTES)))
+
+
+def test_join_hud_attributes_by_vehicle_type(fcd_file):
+    chunk = next(fcd_reader.read_fcd(fcd_file, ATTRIBUTES))
+
+    fcd_reader.join_hud_attributes(chunk, HUD_DATA)
+
+    assert chunk['hud_name'] == ["HUD 1", "HUD-less car", "HUD 1", None]
+    assert chunk['information_frequency'] == ["average", "none", "average", None]
+    assert list(chunk['maxSpeed'])[:3] == [136.0, 18.0, 136.0]
+    assert math.isnan(chunk['maxSpeed'][3])
+    # Numeric attributes are stored as float64, missing ones as nan
+    assert chunk['FoV'][0] == 60.0
+    assert math.isnan(chunk['FoV'][1])
+    assert set(fcd_reader.HUD_COLUMN_KEYS) <= set(chunk)
+
+
+def test_convert_fcd_to_csv(fcd_file, tmp_path):
+    output = str(tmp_path / "fcd.csv")
+
+    rows = fcd_reader.convert_fcd(fcd_file, output, HUD_DATA, ['id', 'type', 'speed'], chunk_size=3)
+
+    assert rows == 4
+    with open(output, newline='') as f:
+        lines = f.read().splitlines()
+    assert lines[0].split(",")[:4] == ['time', 'id', 'type', 'speed']
+    assert len(lines) == 5
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_exchange import FrameExchange
+
+HEIGHT = 2
+WIDTH = 3
+
+
+def raw_frame(value):
+    """Raw BGRA bytes of a frame filled with value, like carla.Image.raw_data."""
+    return bytes([value]) * (HEIGHT * WIDTH * 4)
+
+
+def test_acquire_returns_the_newest_frame_once():
+    exchange = FrameExchange()
+    assert exchange.acquire() is None
+
+    exchange.publish(raw_frame(1), HEIGHT, WIDTH)
+    frame = exchange.acquire()
+
+    assert frame.shape == (HEIGHT, WIDTH, 4)
+    assert frame.dtype == np.uint8
+    assert (frame == 1).all()
+    assert exchange.acquire() is None
+
+
+def test_replaced_frames_are_counted_as_dropped():
+    exchange = FrameExchange()
+    for value in (1, 2, 3):
+        exchange.publish(raw_frame(value), HEIGHT, WIDTH)
+
+    assert (exchange.acquire() == 3).all()
+    assert (exchange.received, exchange.displayed, exchange.dropped) == (3, 1, 2)
+
+
+def test_the_front_buffer_is_not_touched_by_publish():
+    exchange = FrameExchange()
+    exchange.publish(raw_frame(1), HEIGHT, WIDTH)
+    front = exchange.acquire()
+    # The display loop draws into the frame in place
+    front[0, 0] = 255
+
+    exchange.publish(raw_frame(2), HEIGHT, WIDTH)
+    exchange.publish(raw_frame(3), HEIGHT, WIDTH)
+
+    assert (front[0, 0] == 255).all()
+    assert (front[1:] == 1).all()
+
+
+def test_the_three_buffers_are_reused():
+    exchange = FrameExchange()
+    buffers = set()
+    for value in range(10):
+        exchange.publish(raw_frame(value), HEIGHT, WIDTH)
+        frame = exchange.acquire()
+        assert (frame == value).all()
+        buffers.add(id(frame))
+
+    assert len(buffers) <= 3
+
+
+def test_a_new_frame_size_allocates_a_new_buffer():
+    exchange = FrameExchange()
+    exchange.publish(raw_frame(1), HEIGHT, WIDTH)
+    exchange.acquire()
+
+    exchange.publish(bytes(4 * 5 * 4), 4, 5)
+
+    assert exchange.acquire().shape == (4, 5, 4)
@@ -0,0 +1,102 @@
+import math
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recording import RecordingPolicy
+from vehicle_registry import VehicleRegistry
+
+HUD_DATA = {
+    'vehicle.audi.tt': {'min_Gap': 1.2},
+    'vehicle.nissan.patrol': {'min_Gap': 1.5},
+}
+VEHICLE_TYPES = {'hud': "vehicle.audi.tt", 'hudless': "vehicle.nissan.patrol", 'other': "vehicle.tesla.model3"}
+
+
+def recorded_steps(policy, steps, step_length):
+    return [step for step in range(steps) if policy.record_step(step, step * step_length)]
+
+
+def test_default_policy_records_everything():
+    policy = RecordingPolicy()
+
+    assert policy.records_every_sample
+    assert recorded_steps(policy, 5, 0.05) == [0, 1, 2, 3, 4]
+
+
+def test_every_n_steps():
+    policy = RecordingPolicy(every_n_steps=3)
+
+    assert not policy.records_every_sample
+    assert recorded_steps(policy, 10, 0.05) == [0, 3, 6, 9]
+
+
+@pytest.mark.parametrize("step_length, expected", [
+    (0.05, [0, 10, 20, 30]),
+    # The first step at or after each multiple of the interval
+    (0.3, [0, 2, 4, 5]),
+])
+def test_interval_in_simulated_time(step_length, expected):
+    policy = RecordingPolicy(interval=0.5)
+
+    assert recorded_steps(policy, expected[-1] + 1, step_length) == expected
+
+
+def test_bind_restarts_the_interval():
+    policy = RecordingPolicy(interval=1.0)
+    registry = VehicleRegistry(HUD_DATA, VEHICLE_TYPES)
+    assert policy.record_step(0, 10.0)
+    assert not policy.record_step(1, 0.0)
+
+    policy.bind(registry)
+
+    assert policy.record_step(1, 0.0)
+
+
+@pytest.mark.parametrize("arguments", [{'every_n_steps': 0}, {'interval': 0}, {'interval': -1.0}])
+def test_invalid_arguments(arguments):
+    with pytest.raises(ValueError):
+        RecordingPolicy(**arguments)
+
+
+def test_hud_types_limit_the_recorded_vehicles():
+    policy = RecordingPolicy(hud_types=["vehicle.audi.tt"])
+    registry = VehicleRegistry(HUD_DATA, VEHICLE_TYPES)
+    policy.bind(registry)
+
+    assert policy.filters_vehicles
+    recorded = {vehicle_id: policy.record_vehicle(registry, registry.add(vehicle_id), 10.0, 5.0)
+                for vehicle_id in VEHICLE_TYPES}
+    assert recorded == {'hud': True, 'hudless': False, 'other': False}
+
+
+def test_speed_threshold_records_changes_since_the_last_recorded_sample():
+    policy = RecordingPolicy(speed_threshold=5.0)
+    registry = VehicleRegistry(HUD_DATA, VEHICLE_TYPES)
+    policy.bind(registry)
+    slot = registry.add('hud')
+
+    recorded = [policy.record_vehicle(registry, slot, speed, 5.0) for speed in (50.0, 53.0, 56.0, 52.0, 50.0)]
+
+    # 53 is compared with the recorded 50, 52 and 50 with the recorded 56
+    assert recorded == [True, False, True, False, True]
+    assert registry.last_recorded_speed[slot] == 50.0
+
+
+def test_gap_threshold_and_the_reset_of_a_reused_slot():
+    policy = RecordingPolicy(gap_threshold=1.0)
+    registry = VehicleRegistry(HUD_DATA, VEHICLE_TYPES)
+    policy.bind(registry)
+    slot = registry.add('hud')
+
+    assert policy.record_vehicle(registry, slot, 30.0, 10.0)
+    assert not policy.record_vehicle(registry, slot, 80.0, 10.5)
+    assert policy.record_vehicle(registry, slot, 80.0, 11.0)
+
+    registry.release('hud')
+    assert registry.add('other') == slot
+    assert math.isnan(registry.last_recorded_gap[slot])
+    assert policy.record_vehicle(registry, slot, 80.0, 11.0)
@@ -0,0 +1,137 @@
+import json
+import os
+import random
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import simulation
+
+SUMOCFG = """<configuration>
+    <input>
+        <net-file value="net/Town01.net.xml"/>
+        <route-files value="rou/Town01.rou.xml"/>
+        <additional-files value="add/a.xml,add/b.xml"/>
+    </input>
+    <time>
+        <step-length value="0.05"/>
+    </time>
+    <gui_only>
+        <gui-settings-file value="viewsettings.xml"/>
+    </gui_only>
+</configuration>
+"""
+
+VTYPES = """<routes>
+    <vType id="vehicle.audi.tt" vClass="passenger"/>
+    <vType id="vehicle.nissan.patrol" vClass="passenger"/>
+</routes>
+"""
+
+HUDS = [
+    {'HUDname': "HUD 1", 'entry': "2", 'brightness_var': "0.5", 'frequency_var': "average",
+     'relevance_var': "neutral", 'fov_var': "60", 'vehicle_type': "vehicle.audi.tt", 'hud_id': "1"},
+    dict(simulation.base_frame),
+]
+
+
+@pytest.fixture
+def carla_tree(tmp_path, monkeypatch):
+    """CARLA's Sumo folder with the vType file and a Town01 config and route file of 50 vehicles."""
+    examples = tmp_path / "Sumo" / "examples"
+    (examples / "rou").mkdir(parents=True)
+    (examples / "Town01.sumocfg").write_text(SUMOCFG)
+    (examples / "carlavtypes.rou.xml").write_text(VTYPES)
+    vehicles = "".join(f'    <vehicle id="{i}" depart="{i}"><route edges="a b"/></vehicle>\n' for i in range(50))
+    (examples / "rou" / "Town01.rou.xml").write_text(f"<routes>\n{vehicles}</routes>\n")
+    monkeypatch.setattr(simulation, "sumo_base_dir", str(tmp_path / "Sumo"))
+    monkeypatch.setattr(simulation, "vtypes_xml_path", str(examples / "carlavtypes.rou.xml"))
+    monkeypatch.setitem(simulation.maps, "Town01", str(examples / "Town01.sumocfg"))
+    monkeypatch.setattr(simulation, "string_hud_frames", [dict(hud) for hud in HUDS])
+    return tmp_path
+
+
+def test_prepare_scenario_is_reproducible_and_keeps_the_global_random_state(carla_tree):
+    random.seed(7)
+    expected = random.random()
+
+    random.seed(7)
+    first = simulation.prepare_scenario("Town01", seed=3, cache_dir=str(carla_tree / "first"))
+    assert random.random() == expected
+
+    second = simulation.prepare_scenario("Town01", seed=3, cache_dir=str(carla_tree / "second"))
+    for name in ("routes_file", "vtypes_file"):
+        with open(getattr(first, name)) as a, open(getattr(second, name)) as b:
+            assert a.read() == b.read()
+    with open(os.path.join(first.directory, "vehicle_types.json")) as f:
+        assert len(json.load(f)) == 50
+
+
+def test_seeds_share_the_vtypes_file_of_their_huds(carla_tree):
+    cache_dir = str(carla_tree / "cache")
+    first = simulation.prepare_scenario("Town01", seed=1, cache_dir=cache_dir)
+    written = os.stat(first.vtypes_file).st_ino
+    second = simulation.prepare_scenario("Town01", seed=2, cache_dir=cache_dir)
+
+    assert first.directory != second.directory
+    assert second.vtypes_file == first.vtypes_file
+    assert os.stat(second.vtypes_file).st_ino == written
+    vtype = ET.parse(first.vtypes_file).getroot().find("vType[@id='vehicle.audi.tt']")
+    assert vtype.get('maxSpeed') == str(simulation.hud_data['vehicle.audi.tt']['max_speed'])
+
+    # Regenerated after a clean-up with the same colors
+    with open(first.vtypes_file) as f:
+        content = f.read()
+    os.remove(first.vtypes_file)
+    simulation.prepare_scenario("Town01", seed=1, cache_dir=cache_dir)
+    with open(first.vtypes_file) as f:
+        assert f.read() == content
+
+
+
+def test_only_the_most_recently_used_scenarios_are_kept(carla_tree, monkeypatch):
+    monkeypatch.setattr(simulation, "SCENARIO_CACHE_SIZE", 2)
+    cache_dir = str(carla_tree / "cache")
+    first = simulation.prepare_scenario("Town01", seed=1, cache_dir=cache_dir)
+    second = simulation.prepare_scenario("Town01", seed=2, cache_dir=cache_dir)
+    # Reusing the first scenario makes the second one the least recently used
+    simulation.prepare_scenario("Town01", seed=1, cache_dir=cache_dir)
+    third = simulation.prepare_scenario("Town01", seed=3, cache_dir=cache_dir)
+
+    scenarios = {entry.path for entry in os.scandir(cache_dir) if entry.name != "vtypes"}
+    assert scenarios == {first.directory, third.directory}
+    assert not os.path.exists(second.directory)
+    assert os.path.isfile(third.vtypes_file)
+
+
+def option_values(sumocfg):
+    return {option.tag: option.get('value') for option in ET.parse(sumocfg).getroot().iter() if option.get('value')}
+
+
+def test_scenario_sumocfg_relocates_every_file_option(tmp_path, monkeypatch):
+    examples = tmp_path / "examples"
+    examples.mkdir()
+    original = examples / "Town01.sumocfg"
+    original.write_text(SUMOCFG)
+    monkeypatch.setitem(simulation.maps, "Town01", str(original))
+    scenario_dir = tmp_path / "scenario_cache" / "Town01_key"
+    scenario_dir.mkdir(parents=True)
+    route_file = scenario_dir / "Town01.rou.xml"
+
+    sumocfg = simulation.write_scenario_sumocfg("Town01", [str(route_file)], str(scenario_dir / "Town01.sumocfg"))
+
+    values = option_values(sumocfg)
+    resolved = {
+        name: [os.path.normpath(os.path.join(scenario_dir, path)) for path in value.split(",")]
+        for name, value in values.items() if simulation.is_file_option(name)
+    }
+    assert resolved == {
+        'net-file': [str(examples / "net" / "Town01.net.xml")],
+        'route-files': [str(route_file)],
+        'additional-files': [str(examples / "add" / "a.xml"), str(examples / "add" / "b.xml")],
+        'gui-settings-file': [str(examples / "viewsettings.xml")],
+    }
+    assert values['step-length'] == "0.05"
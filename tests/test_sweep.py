@@ -0,0 +1,50 @@
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import simulation
+import sweep
+
+
+def fake_run_headless(huds, map_name, selected_columns, seed=None, output_dir=None, run_name=None, **kwargs):
+    assert kwargs['output_mode'] == "traci"
+    if seed == 1:
+        raise RuntimeError("port in use")
+    data_file = os.path.join(output_dir, f"{run_name}_simulation_data.csv")
+    with open(data_file, mode='w', newline='') as f:
+        f.write(f"vehicle_id,current_speed\nv{seed},1.5\n")
+    return data_file
+
+
+def test_grid_configurations_cover_every_combination():
+    configurations = sweep.grid_configurations([0.0, 0.9], [30, 100], ["average"], ["neutral", "important"], hudless=True)
+
+    assert len(configurations) == 8
+    assert all(len(huds) == 2 and huds[1]['hud_id'] == "999" for huds in configurations)
+
+
+def test_sample_configurations_are_reproducible():
+    assert sweep.sample_configurations(5, seed=3) == sweep.sample_configurations(5, seed=3)
+
+
+def test_failed_run_is_returned_and_the_others_are_consolidated(tmp_path, monkeypatch):
+    monkeypatch.setattr(simulation, "run_headless", fake_run_headless)
+    huds = sweep.hud_configuration(0.4, 60, "average", "neutral", 1)
+
+    results = {}
+    failures = {}
+    for seed in range(3):
+        run_index, data_file, error = sweep.run_configuration((seed, "Town01", huds, seed, "traci", str(tmp_path)))
+        if error is None:
+            results[run_index] = data_file
+        else:
+            failures[run_index] = error
+
+    assert failures == {1: "RuntimeError: port in use"}
+    output_file = tmp_path / "sweep_results.csv"
+    sweep.consolidate_results(results, str(output_file))
+    with open(output_file, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows == [['run', 'vehicle_id', 'current_speed'], ['0', 'v0', '1.5'], ['2', 'v2', '1.5']]
@@ -0,0 +1,98 @@
+import os
+import sys
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vehicle_index import VehicleIndex
+
+Actor = namedtuple('Actor', ['id', 'type_id'])
+
+ACTORS = {
+    1: Actor(1, "spectator"),
+    2: Actor(2, "vehicle.audi.tt"),
+    3: Actor(3, "vehicle.nissan.patrol"),
+    4: Actor(4, "vehicle.audi.tt"),
+    5: Actor(5, "vehicle.tesla.model3"),
+}
+
+
+class ActorSource:
+    """get_actors of a CARLA world, recording which IDs were fetched."""
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, actor_ids):
+        self.requests.append(sorted(actor_ids))
+        return [ACTORS[actor_id] for actor_id in actor_ids]
+
+
+def indexed_ids(index):
+    return [vehicle.id for vehicle in index.vehicles]
+
+
+def test_only_new_actors_are_fetched_and_only_vehicles_indexed():
+    index = VehicleIndex()
+    get_actors = ActorSource()
+
+    index.update([1, 2, 3])
+    assert index.resolve(get_actors) == 2
+    index.update([1, 2, 3, 4])
+    assert index.resolve(get_actors) == 1
+    assert index.resolve(get_actors) == 0
+
+    assert get_actors.requests == [[1, 2, 3], [4]]
+    assert indexed_ids(index) == [2, 3, 4]
+
+
+def test_removed_actors_are_dropped_at_once():
+    index = VehicleIndex()
+    index.update([2, 3, 4])
+    index.resolve(ActorSource())
+
+    index.update([2, 4])
+
+    assert len(index) == 2
+    assert indexed_ids(index) == [2, 4]
+
+
+def test_actors_removed_before_resolve_are_skipped():
+    index = VehicleIndex()
+    index.update([2, 3])
+    index.update([3])
+
+    assert index.resolve(ActorSource()) == 1
+    assert indexed_ids(index) == [3]
+
+
+def test_vehicle_filter_limits_the_index():
+    index = VehicleIndex(vehicle_filter=lambda actor: actor.type_id == "vehicle.audi.tt")
+    index.update(ACTORS)
+    index.resolve(ActorSource())
+
+    assert indexed_ids(index) == [2, 4]
+
+
+def test_next_vehicle_rotates_by_actor_id():
+    index = VehicleIndex()
+    assert index.next_vehicle() is None
+    index.update([5, 4, 3, 2])
+    index.resolve(ActorSource())
+
+    order = []
+    actor_id = None
+    for _ in range(5):
+        actor_id = index.next_vehicle(actor_id).id
+        order.append(actor_id)
+    assert order == [2, 3, 4, 5, 2]
+
+
+def test_next_vehicle_continues_after_a_removed_vehicle():
+    index = VehicleIndex()
+    index.update([2, 3, 4, 5])
+    index.resolve(ActorSource())
+
+    index.update([2, 4, 5])
+    assert index.next_vehicle(3).id == 4
+    index.update([2, 4])
+    assert index.next_vehicle(5).id == 2
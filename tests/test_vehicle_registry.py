@@ -0,0 +1,59 @@
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vehicle_registry import VehicleRegistry
+
+HUD_DATA = {
+    'vehicle.audi.tt': {'min_Gap': 1.2},
+    'vehicle.nissan.patrol': {},
+}
+VEHICLE_TYPES = {'a': "vehicle.audi.tt", 'b': "vehicle.nissan.patrol", 'c': "vehicle.tesla.model3"}
+
+
+def test_add_resolves_the_hud_once():
+    registry = VehicleRegistry(HUD_DATA, VEHICLE_TYPES)
+
+    slots = [registry.add(vehicle_id) for vehicle_id in ('a', 'b', 'c', 'unmapped')]
+
+    assert slots == [0, 1, 2, 3]
+    assert len(registry) == 4
+    assert list(registry.hud_index) == [0, 1, -1, -1]
+    # Without min_Gap in hud_data or without HUD, the factor is 1
+    assert list(registry.min_gap_factor) == [1.2, 1, 1, 1]
+    assert registry.slots == {'a': 0, 'b': 1, 'c': 2, 'unmapped': 3}
+
+
+def test_released_slots_are_reused():
+    registry = VehicleRegistry(HUD_DATA, VEHICLE_TYPES)
+    registry.add('a')
+    registry.add('b')
+
+    registry.release('a')
+    registry.release('a')
+    assert len(registry) == 1
+    assert registry.vehicle_ids == [None, 'b']
+
+    assert registry.add('c') == 0
+    assert registry.add('a') == 2
+    assert registry.vehicle_ids == ['c', 'b', 'a']
+    assert len(registry.hud_index) == 3
+
+
+def test_a_reused_slot_is_reset():
+    registry = VehicleRegistry(HUD_DATA, VEHICLE_TYPES)
+    slot = registry.add('a')
+    registry.last_min_gap[slot] = 3.0
+    registry.last_recorded_speed[slot] = 50.0
+    registry.last_recorded_gap[slot] = 10.0
+
+    registry.release('a')
+    assert registry.add('c') == slot
+
+    assert registry.hud_index[slot] == -1
+    assert registry.min_gap_factor[slot] == 1
+    assert math.isnan(registry.last_min_gap[slot])
+    assert math.isnan(registry.last_recorded_speed[slot])
+    assert math.isnan(registry.last_recorded_gap[slot])
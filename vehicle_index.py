@@ -0,0 +1,84 @@
+import bisect
+import threading
+
+
+class VehicleIndex:
+    """
+    Vehicles of a CARLA world, maintained incrementally from the actor IDs of the world
+    snapshots instead of fetching the whole actor list.
+    update diffs the actor IDs of every tick against the previous ones: removed actors
+    are dropped at once, new ones wait until resolve fetches them in one batch to learn
+    their type. Vehicles are kept sorted by actor ID, so next_vehicle continues in the
+    same order after the followed vehicle was removed. CARLA assigns increasing IDs, so
+    new vehicles are appended at the end.
+    vehicle_filter (actor -> bool) limits the index, e.g. to vehicle types with a HUD.
+    """
+    def __init__(self, vehicle_filter=None):
+        self.vehicle_filter = vehicle_filter
+        self.lock = threading.Lock()
+        self.actor_ids = set()
+        self.pending_ids = []
+        self.vehicle_ids = []
+        self.vehicles = []
+
+    def __len__(self):
+        return len(self.vehicles)
+
+    def update(self, actor_ids):
+        """Apply the actor IDs of a world snapshot; called from the tick callback."""
+        actor_ids = set(actor_ids)
+        with self.lock:
+            self.pending_ids.extend(actor_ids - self.actor_ids)
+            for actor_id in self.actor_ids - actor_ids:
+                self.remove(actor_id)
+            self.actor_ids = actor_ids
+
+    def resolve(self, get_actors):
+        """
+        Fetch the actors that appeared since the last call with get_actors(list of IDs)
+        (e.g. carla.World.get_actors) and index the vehicles among them.
+        Returns the number of added vehicles.
+        """
+        with self.lock:
+            pending_ids, self.pending_ids = self.pending_ids, []
+        if not pending_ids:
+            return 0
+        actors = get_actors(pending_ids)
+
+        added = 0
+        with self.lock:
+            for actor in actors:
+                if actor.id not in self.actor_ids:
+                    continue
+                position = bisect.bisect_left(self.vehicle_ids, actor.id)
+                if position < len(self.vehicle_ids) and self.vehicle_ids[position] == actor.id:
+                    continue
+                if not actor.type_id.startswith("vehicle."):
+                    continue
+                if self.vehicle_filter is not None and not self.vehicle_filter(actor):
+                    continue
+                self.vehicle_ids.insert(position, actor.id)
+                self.vehicles.insert(position, actor)
+                added += 1
+        return added
+
+    def remove(self, actor_id):
+        """Drop a vehicle; the caller holds the lock."""
+        position = bisect.bisect_left(self.vehicle_ids, actor_id)
+        if position < len(self.vehicle_ids) and self.vehicle_ids[position] == actor_id:
+            del self.vehicle_ids[position]
+            del self.vehicles[position]
+
+    def next_vehicle(self, actor_id=None):
+        """
+        The vehicle with the next higher actor ID than actor_id, wrapping around to the first
+        one, or None if there are no vehicles. actor_id does not have to be indexed (any more),
+        so the rotation continues where it was when the followed vehicle is removed.
+        """
+        with self.lock:
+            if not self.vehicles:
+                return None
+            if actor_id is None:
+                return self.vehicles[0]
+            position = bisect.bisect_right(self.vehicle_ids, actor_id)
+            return self.vehicles[position % len(self.vehicles)]
@@ -0,0 +1,68 @@
+from array import array
+
+
+class VehicleRegistry:
+    """
+    Per-vehicle state of a running simulation, stored in flat arrays indexed by a small
+    integer slot instead of chained dict lookups with the SUMO vehicle ID.
+    A vehicle gets a slot when it is first seen (add) and gives it back on arrival (release),
+    so the arrays only grow up to the maximum number of vehicles in the network at once.
+    For every slot the registry keeps the HUD index (position in hud_types, -1 without HUD),
+    the min-gap factor of its HUD and the last minGap sent to SUMO (nan before the first one),
+    as well as the speed and gap of its last recorded sample for event-triggered recording.
+    """
+    __slots__ = (
+        'vehicle_type_mapping', 'hud_types', 'hud_indices', 'hud_min_gap_factors',
+        'slots', 'vehicle_ids', 'free_slots', 'hud_index', 'min_gap_factor', 'last_min_gap',
+        'last_recorded_speed', 'last_recorded_gap'
+    )
+
+    def __init__(self, hud_data, vehicle_type_mapping):
+        self.vehicle_type_mapping = vehicle_type_mapping
+        self.hud_types = list(hud_data)
+        self.hud_indices = {vehicle_type: index for index, vehicle_type in enumerate(self.hud_types)}
+        self.hud_min_gap_factors = [hud_data[vehicle_type].get("min_Gap", 1) for vehicle_type in self.hud_types]
+
+        self.slots = {}
+        self.vehicle_ids = []
+        self.free_slots = []
+        self.hud_index = array('i')
+        self.min_gap_factor = array('d')
+        self.last_min_gap = array('d')
+        self.last_recorded_speed = array('d')
+        self.last_recorded_gap = array('d')
+
+    def __len__(self):
+        return len(self.slots)
+
+    def add(self, vehicle_id):
+        """Resolve the HUD of vehicle_id once and return its new slot."""
+        vehicle_type = self.vehicle_type_mapping.get(vehicle_id, "unknown")
+        hud_index = self.hud_indices.get(vehicle_type, -1)
+        min_gap_factor = self.hud_min_gap_factors[hud_index] if hud_index >= 0 else 1
+
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.vehicle_ids[slot] = vehicle_id
+            self.hud_index[slot] = hud_index
+            self.min_gap_factor[slot] = min_gap_factor
+            self.last_min_gap[slot] = float('nan')
+            self.last_recorded_speed[slot] = float('nan')
+            self.last_recorded_gap[slot] = float('nan')
+        else:
+            slot = len(self.vehicle_ids)
+            self.vehicle_ids.append(vehicle_id)
+            self.hud_index.append(hud_index)
+            self.min_gap_factor.append(min_gap_factor)
+            self.last_min_gap.append(float('nan'))
+            self.last_recorded_speed.append(float('nan'))
+            self.last_recorded_gap.append(float('nan'))
+        self.slots[vehicle_id] = slot
+        return slot
+
+    def release(self, vehicle_id):
+        """Free the slot of an arrived vehicle for reuse."""
+        slot = self.slots.pop(vehicle_id, None)
+        if slot is not None:
+            self.vehicle_ids[slot] = None
+            self.free_slots.append(slot)